@@ -0,0 +1,25 @@
+# AI module - async, cached content analysis against Azure OpenAI
+
+from .constants import AnalysisTypes
+from .views import AIAnalysis, PageVerdict
+from .cache import ResponseCache, cache_key
+from .tokens import estimate_tokens, truncate_to_tokens
+from .service import AIAnalysisService, AIServiceError, get_ai_service
+from .batching import BatchScheduler, PageText, get_batch_scheduler, to_check_results
+
+__all__ = [
+    "AnalysisTypes",
+    "AIAnalysis",
+    "PageVerdict",
+    "ResponseCache",
+    "cache_key",
+    "estimate_tokens",
+    "truncate_to_tokens",
+    "AIAnalysisService",
+    "AIServiceError",
+    "get_ai_service",
+    "BatchScheduler",
+    "PageText",
+    "get_batch_scheduler",
+    "to_check_results",
+]
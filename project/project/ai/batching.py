@@ -0,0 +1,231 @@
+"""
+Per-page AI verdicts, several pages per request.
+
+Pages are truncated to a per-page budget and packed greedily, in order, into
+requests of at most ai.batch.max_input_tokens (system prompt, instructions and
+page blocks together) and ai.batch.max_pages pages. The model answers with one
+JSON verdict per page id, so the system prompt and instructions are paid once
+per batch instead of once per page. Pages above ai.batch.max_page_tokens are
+sent alone. A page the batch answer leaves out (or a batch that fails) is
+retried in a request of its own. Verdicts are cached per page like
+AIAnalysisService.analyze results.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import orjson
+
+from infra.files import CONFIG
+from infra.metrics import AI_BATCH_PAGES, AI_REQUESTS, CACHE_LOOKUPS
+from .cache import cache_key
+from .constants import AnalysisTypes
+from .prompts import PROMPT_VERSION, PROMPTS, SYSTEM_PROMPT, VERDICT_INSTRUCTIONS
+from .service import AIAnalysisService, AIServiceError, get_ai_service
+from .tokens import estimate_tokens, truncate_to_tokens
+from .views import PageVerdict
+
+
+VERDICT_STATUSES = {"pass", "warn", "fail"}
+# Tokens of the <page id="..."></page> wrapper around each page.
+_PAGE_WRAPPER_TOKENS = 10
+
+# Check each analysis type's verdicts are reported as (see to_check_results).
+AI_REVIEW_CHECKS = {
+    AnalysisTypes.SEO: dict(id=12, category="Content", check_item="AI content review",
+                            what_to_verify="Keyword usage, meta information and content quality", impact="Medium"),
+    AnalysisTypes.GEO: dict(id=13, category="Content", check_item="AI content review",
+                            what_to_verify="Factual accuracy, transparent intent and no AI spam", impact="High"),
+    AnalysisTypes.AEO: dict(id=14, category="EEAT", check_item="AI content review",
+                            what_to_verify="Factual accuracy and EEAT compliance", impact="High"),
+}
+
+
+@dataclass(frozen=True)
+class PageText:
+    page_id: str
+    text: str
+    url: Optional[str] = None
+
+
+@dataclass
+class _Item:
+    page: PageText
+    text: str
+    truncated: bool
+    key: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text) + _PAGE_WRAPPER_TOKENS
+
+
+class BatchScheduler:
+    def __init__(
+        self,
+        service: AIAnalysisService,
+        max_input_tokens: int,
+        max_pages: int,
+        max_page_tokens: int,
+        output_tokens_per_page: int,
+    ):
+        self.service = service
+        self.max_input_tokens = max_input_tokens
+        self.max_pages = max(1, max_pages)
+        self.max_page_tokens = max_page_tokens
+        self.output_tokens_per_page = output_tokens_per_page
+
+    def _overhead(self, analysis_type: AnalysisTypes) -> int:
+        return estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(PROMPTS[analysis_type]) + estimate_tokens(VERDICT_INSTRUCTIONS)
+
+    def pack(self, items: Sequence[_Item], analysis_type: AnalysisTypes) -> Tuple[List[List[_Item]], List[_Item]]:
+        """Greedy in-order packing; returns (batches, pages to send alone)."""
+        budget = self.max_input_tokens - self._overhead(analysis_type)
+        batches: List[List[_Item]] = []
+        singles: List[_Item] = []
+        current: List[_Item] = []
+        used = 0
+        for item in items:
+            if estimate_tokens(item.page.text) > self.max_page_tokens or item.tokens > budget:
+                singles.append(item)
+                continue
+            if current and (used + item.tokens > budget or len(current) >= self.max_pages):
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += item.tokens
+        if current:
+            batches.append(current)
+        # A batch of one is just a single request.
+        singles.extend(batch[0] for batch in batches if len(batch) == 1)
+        return [batch for batch in batches if len(batch) > 1], singles
+
+    async def _request(self, items: Sequence[_Item], analysis_type: AnalysisTypes) -> Dict[str, Tuple[str, str]]:
+        """One request for the given pages; returns {page index: (status, findings)} for valid verdicts."""
+        blocks = "\n\n".join(f'<page id="{i}">\n{item.text}\n</page>' for i, item in enumerate(items))
+        answer = await self.service.chat(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"{PROMPTS[analysis_type]}\n\n{VERDICT_INSTRUCTIONS}\n\n{blocks}"},
+            ],
+            max_tokens=self.output_tokens_per_page * len(items),
+            response_format={"type": "json_object"},
+        )
+        try:
+            entries = orjson.loads(answer).get("pages") or []
+        except (orjson.JSONDecodeError, AttributeError):
+            return {}
+        verdicts: Dict[str, Tuple[str, str]] = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            status = str(entry.get("status", "")).lower()
+            if status in VERDICT_STATUSES:
+                verdicts[str(entry.get("id"))] = (status, str(entry.get("findings") or ""))
+        return verdicts
+
+    def _verdict(self, item: _Item, status: str, findings: str, **flags: bool) -> PageVerdict:
+        return PageVerdict(
+            page_id=item.page.page_id, url=item.page.url, status=status, findings=findings,
+            truncated=item.truncated, **flags,
+        )
+
+    async def _store(self, item: _Item, status: str, findings: str) -> None:
+        if self.service.cache is not None:
+            await asyncio.to_thread(self.service.cache.put, item.key, orjson.dumps([status, findings]).decode())
+
+    async def _single(self, item: _Item, analysis_type: AnalysisTypes) -> PageVerdict:
+        AI_REQUESTS.labels(kind="single").inc()
+        try:
+            verdicts = await self._request([item], analysis_type)
+        except AIServiceError as e:
+            return self._verdict(item, "not_evaluated", f"Not evaluated: {e}")
+        if "0" not in verdicts:
+            return self._verdict(item, "not_evaluated", "Not evaluated: the model returned no valid verdict.")
+        status, findings = verdicts["0"]
+        await self._store(item, status, findings)
+        return self._verdict(item, status, findings)
+
+    async def _batch(self, items: List[_Item], analysis_type: AnalysisTypes) -> List[PageVerdict]:
+        AI_REQUESTS.labels(kind="batch").inc()
+        AI_BATCH_PAGES.observe(len(items))
+        try:
+            verdicts = await self._request(items, analysis_type)
+        except AIServiceError:
+            verdicts = {}
+        results: List[Optional[PageVerdict]] = []
+        missing: List[int] = []
+        for i, item in enumerate(items):
+            if str(i) in verdicts:
+                status, findings = verdicts[str(i)]
+                await self._store(item, status, findings)
+                results.append(self._verdict(item, status, findings, batched=True))
+            else:
+                results.append(None)
+                missing.append(i)
+        # Pages the batch answer dropped (or a failed batch) get a request of their own.
+        retried = await asyncio.gather(*(self._single(items[i], analysis_type) for i in missing))
+        for i, verdict in zip(missing, retried):
+            results[i] = verdict
+        return results
+
+    async def analyze(self, pages: Sequence[PageText], analysis_type: Union[AnalysisTypes, str]) -> List[PageVerdict]:
+        """One verdict per page, in input order."""
+        analysis_type = AnalysisTypes(analysis_type)
+        single_budget = self.service.max_input_tokens - self._overhead(analysis_type) - _PAGE_WRAPPER_TOKENS
+        verdicts: Dict[int, PageVerdict] = {}
+        todo: List[Tuple[int, _Item]] = []
+        for index, page in enumerate(pages):
+            text, truncated = truncate_to_tokens(page.text, max(1, single_budget))
+            item = _Item(page, text, truncated, cache_key(text, f"{analysis_type.value}:verdict", PROMPT_VERSION, self.service.deployment))
+            if self.service.cache is not None:
+                cached = await asyncio.to_thread(self.service.cache.get, item.key)
+                CACHE_LOOKUPS.labels(cache="ai", result="hit" if cached is not None else "miss").inc()
+                if cached is not None:
+                    status, findings = orjson.loads(cached)
+                    verdicts[index] = self._verdict(item, status, findings, cached=True)
+                    continue
+            todo.append((index, item))
+
+        index_of = {id(item): index for index, item in todo}
+        batches, singles = self.pack([item for _, item in todo], analysis_type)
+        results = await asyncio.gather(
+            *(self._batch(batch, analysis_type) for batch in batches),
+            *(self._single(item, analysis_type) for item in singles),
+        )
+        sent = [*batches, *([item] for item in singles)]
+        for group, outcome in zip(sent, results):
+            for item, verdict in zip(group, outcome if isinstance(outcome, list) else [outcome]):
+                verdicts[index_of[id(item)]] = verdict
+        return [verdicts[i] for i in range(len(pages))]
+
+
+def get_batch_scheduler(service: Optional[AIAnalysisService] = None) -> BatchScheduler:
+    settings = CONFIG.ai.batch
+    return BatchScheduler(
+        service or get_ai_service(),
+        max_input_tokens=settings.max_input_tokens,
+        max_pages=settings.max_pages,
+        max_page_tokens=settings.max_page_tokens,
+        output_tokens_per_page=settings.output_tokens_per_page,
+    )
+
+
+def to_check_results(verdicts: Sequence[PageVerdict], analysis_type: Union[AnalysisTypes, str]) -> Dict[str, "EOCheckResult"]:
+    """Split verdicts back into one check result per page id (see AI_REVIEW_CHECKS)."""
+    from analysis.engines_optimization.views import EOCheckResult
+
+    analysis_type = AnalysisTypes(analysis_type)
+    template = AI_REVIEW_CHECKS[analysis_type]
+    return {
+        v.page_id: EOCheckResult(
+            type=analysis_type.value,
+            status=v.status,
+            details=v.findings,
+            evidence={"ai": {"cached": v.cached, "batched": v.batched, "truncated": v.truncated}},
+            **template,
+        )
+        for v in verdicts
+    }
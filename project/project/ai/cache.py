@@ -0,0 +1,62 @@
+"""
+Persistent cache of AI responses in a local SQLite database.
+
+Keys combine a hash of the exact content sent, the analysis type, the prompt
+version and the model, so rescanning unchanged pages costs no requests and a
+prompt or model change never serves stale answers.
+"""
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+import xxhash
+
+from infra.files import ensure_dirs
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def cache_key(content: str, analysis_type: str, prompt_version: int, model: str) -> str:
+    digest = xxhash.xxh3_128(content.encode("utf-8")).hexdigest()
+    return f"{analysis_type}:v{prompt_version}:{model}:{digest}"
+
+
+class ResponseCache:
+    def __init__(self, path: Path, ttl_sec: float):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        ensure_dirs()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?", (key, time.time() - self.ttl_sec)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, time.time()),
+            )
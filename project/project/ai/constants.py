@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class AnalysisTypes(Enum):
+    SEO = "SEO"
+    GEO = "GEO"
+    AEO = "AEO"
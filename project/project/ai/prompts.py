@@ -0,0 +1,21 @@
+from .constants import AnalysisTypes
+
+
+# Part of every cache key: bump it whenever a prompt below changes, so cached
+# answers to the old wording are not served for the new one.
+PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = "You are an expert in web content optimization for search engines and AI systems."
+
+PROMPTS = {
+    AnalysisTypes.SEO: "Analyze the following content for SEO optimization. Provide insights on keyword usage, meta information, and content quality:",
+    AnalysisTypes.GEO: "Analyze the following content for Generative Engine Optimization (GEO). Check for factual accuracy, transparent intent, and AI spam:",
+    AnalysisTypes.AEO: "Analyze the following content for Answer Engine Optimization (AEO). Verify factual accuracy and EEAT compliance:",
+}
+
+# Per-page verdicts (ai.batching): several pages per request, one JSON verdict each.
+VERDICT_INSTRUCTIONS = (
+    "Each page below is wrapped in a page tag with an id attribute. Judge every page on its own. "
+    'Answer with JSON only, in the form {"pages": [{"id": "<page id>", "status": "pass" | "warn" | "fail", '
+    '"findings": "<one or two sentences>"}]}, with exactly one entry per page.'
+)
@@ -0,0 +1,168 @@
+"""
+Async AI content analysis against an OpenAI-compatible endpoint (Azure AI Foundry).
+
+Requests go through AsyncOpenAI under a per-process concurrency bound, content
+is truncated to the ai.max_input_tokens budget, and responses are cached on
+disk (see ai.cache). Point AZURE_OPENAI_ENDPOINT at the stand-in from
+benchmarks.servers (serve("openai")) to run offline.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from infra.files import CONFIG
+from infra.metrics import AI_REQUESTS, CACHE_LOOKUPS
+from .cache import ResponseCache, cache_key
+from .constants import AnalysisTypes
+from .prompts import PROMPT_VERSION, PROMPTS, SYSTEM_PROMPT
+from .tokens import estimate_tokens, truncate_to_tokens
+from .views import AIAnalysis
+
+
+DEFAULT_ENDPOINT = "https://johngeorge-2562-resource.openai.azure.com/openai/v1/"
+DEFAULT_DEPLOYMENT = "gpt-4o"
+
+
+class AIServiceError(RuntimeError):
+    """The endpoint could not produce an answer (after the client's own retries)."""
+
+
+class AIAnalysisService:
+    def __init__(
+        self,
+        endpoint: str,
+        api_key: str,
+        deployment: str,
+        concurrency: int,
+        max_input_tokens: int,
+        max_output_tokens: int,
+        temperature: float,
+        timeout_sec: float,
+        max_retries: int,
+        cache: Optional[ResponseCache] = None,
+    ):
+        from openai import AsyncOpenAI
+
+        self.deployment = deployment
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.temperature = temperature
+        self.cache = cache
+        self.client = AsyncOpenAI(base_url=endpoint, api_key=api_key, timeout=timeout_sec, max_retries=max_retries)
+        self._slots = asyncio.Semaphore(concurrency)
+        # Identical requests already on their way share one answer.
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        **extra: Any,
+    ) -> str:
+        """One chat completion, waiting for a free concurrency slot first."""
+        async with self._slots:
+            try:
+                completion = await self.client.chat.completions.create(
+                    model=self.deployment,
+                    messages=messages,
+                    temperature=self.temperature if temperature is None else temperature,
+                    max_tokens=max_tokens or self.max_output_tokens,
+                    **extra,
+                )
+            except Exception as e:
+                raise AIServiceError(f"AI request failed: {e}") from e
+        return completion.choices[0].message.content or ""
+
+    def _content_budget(self, prompt: str) -> int:
+        return max(1, self.max_input_tokens - estimate_tokens(SYSTEM_PROMPT) - estimate_tokens(prompt))
+
+    async def analyze(self, content: str, analysis_type: Union[AnalysisTypes, str] = AnalysisTypes.SEO) -> AIAnalysis:
+        """Analyze one page's content; cached by (content, analysis type, prompt version, model)."""
+        analysis_type = AnalysisTypes(analysis_type)
+        prompt = PROMPTS[analysis_type]
+        content, truncated = truncate_to_tokens(content, self._content_budget(prompt))
+        user = f"{prompt}\n\n{content}"
+        result = dict(
+            analysis_type=analysis_type,
+            model=self.deployment,
+            truncated=truncated,
+            prompt_tokens_est=estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(user),
+        )
+
+        key = cache_key(content, analysis_type.value, PROMPT_VERSION, self.deployment)
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            CACHE_LOOKUPS.labels(cache="ai", result="hit" if cached is not None else "miss").inc()
+            if cached is not None:
+                return AIAnalysis(text=cached, cached=True, **result)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return AIAnalysis(text=await asyncio.shield(pending), **result)
+        pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            AI_REQUESTS.labels(kind="single").inc()
+            text = await self.chat([
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user},
+            ])
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, key, text)
+            pending.set_result(text)
+        except BaseException as e:
+            pending.set_exception(e)
+            # Mark it retrieved, or a failure nobody else waited for logs "exception was never retrieved".
+            pending.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return AIAnalysis(text=text, **result)
+
+    async def analyze_many(
+        self, contents: Sequence[str], analysis_type: Union[AnalysisTypes, str] = AnalysisTypes.SEO
+    ) -> List[AIAnalysis]:
+        """Analyze several contents concurrently (bounded by ai.concurrency), in input order."""
+        return list(await asyncio.gather(*(self.analyze(c, analysis_type) for c in contents)))
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+# One service per event loop: the HTTP client and the semaphore are loop-bound.
+_services: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AIAnalysisService]" = weakref.WeakKeyDictionary()
+_cache: Optional[ResponseCache] = None
+
+
+def _response_cache() -> Optional[ResponseCache]:
+    global _cache
+    settings = CONFIG.ai.cache
+    if not settings.enabled:
+        return None
+    if _cache is None:
+        _cache = ResponseCache(CONFIG.paths.ai_cache, ttl_sec=settings.ttl_sec)
+    return _cache
+
+
+def get_ai_service() -> AIAnalysisService:
+    loop = asyncio.get_running_loop()
+    service = _services.get(loop)
+    if service is None:
+        settings = CONFIG.ai
+        service = AIAnalysisService(
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", DEFAULT_ENDPOINT),
+            api_key=os.getenv("AZURE_OPENAI_API_KEY", "<your-api-key>"),
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT", DEFAULT_DEPLOYMENT),
+            concurrency=settings.concurrency,
+            max_input_tokens=settings.max_input_tokens,
+            max_output_tokens=settings.max_output_tokens,
+            temperature=settings.temperature,
+            timeout_sec=settings.timeout_sec,
+            max_retries=settings.max_retries,
+            cache=_response_cache(),
+        )
+        _services[loop] = service
+    return service
@@ -0,0 +1,27 @@
+"""
+Token estimates for budgeting prompts.
+
+No tokenizer is bundled, so counts use the ~4 characters per token average of
+English text with GPT-4-class tokenizers. Budgets built on it should keep some
+headroom below the model's real limit.
+"""
+import math
+from typing import Tuple
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[content truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, bool]:
+    """Keep the start of the text within max_tokens, cut at a word boundary; returns (text, truncated)."""
+    if estimate_tokens(text) <= max_tokens:
+        return text, False
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    cut = text.rfind(" ", 0, limit + 1)
+    if cut < limit // 2:
+        cut = limit
+    return text[:cut].rstrip() + TRUNCATION_MARKER, True
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .constants import AnalysisTypes
+
+
+class AIAnalysis(BaseModel):
+    analysis_type: AnalysisTypes
+    text: str
+    model: str
+    # Served from the response cache rather than the endpoint.
+    cached: bool = False
+    # The content was cut to the ai.max_input_tokens budget before sending.
+    truncated: bool = False
+    prompt_tokens_est: int = 0
+
+
+class PageVerdict(BaseModel):
+    page_id: str
+    url: Optional[str] = None
+    status: str  # "pass" | "warn" | "fail" | "not_evaluated"
+    findings: str
+    cached: bool = False
+    # Answered as part of a multi-page request.
+    batched: bool = False
+    truncated: bool = False
@@ -1,10 +1,31 @@
 # Analysis module - SEO, GEO, AEO analyzers
 
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .views import BaseAnalyser
 from .constants import ANALYSERS
-from .engines_optimization.seo.service import SeoAnalyzer
-from .engines_optimization.geo.service import GeoAnalyzer
-from .engines_optimization.aeo.service import AeoAnalyzer
+
+if TYPE_CHECKING:
+    from .engines_optimization.seo.service import SeoAnalyzer
+    from .engines_optimization.geo.service import GeoAnalyzer
+    from .engines_optimization.aeo.service import AeoAnalyzer
+
+# The analysers pull in parsers, HTTP clients and the fetch layer; load them on first use (PEP 562).
+_LAZY = {
+    "SeoAnalyzer": ".engines_optimization.seo.service",
+    "GeoAnalyzer": ".engines_optimization.geo.service",
+    "AeoAnalyzer": ".engines_optimization.aeo.service",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "BaseAnalyser",
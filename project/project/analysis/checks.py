@@ -0,0 +1,96 @@
+"""
+Declarative registry of the SEO/AEO/GEO checks.
+
+Each check declares its id, analyser, display metadata and the inputs it
+needs. A scan limited to some checks (ScanOptions.checks) runs only the
+analysers that own them and computes only the inputs they declare, so asking
+for check 4 alone skips GSC, Safe Browsing and the cloaking fetches.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .constants import ANALYSERS, CheckInputs
+
+if TYPE_CHECKING:
+    from analysis.engines_optimization.views import EOCheckResult
+
+
+@dataclass(frozen=True)
+class CheckSpec:
+    id: int
+    analyser: ANALYSERS
+    category: str
+    check_item: str
+    what_to_verify: str
+    impact: str
+    inputs: FrozenSet[CheckInputs]
+    # Evidence fields kept when a scan asks for evidence="summary".
+    summary_evidence: Tuple[str, ...] = ()
+
+    @property
+    def type(self) -> str:
+        return self.analyser.value.upper()
+
+    def result(self, status: str, details: str, evidence: Optional[Dict[str, Any]] = None) -> "EOCheckResult":
+        from analysis.engines_optimization.views import EOCheckResult
+
+        return EOCheckResult(
+            id=self.id,
+            type=self.type,
+            category=self.category,
+            check_item=self.check_item,
+            what_to_verify=self.what_to_verify,
+            impact=self.impact,
+            status=status,
+            details=details,
+            evidence=evidence if evidence is not None else {},
+        )
+
+
+def _check(
+    id: int,
+    analyser: ANALYSERS,
+    category: str,
+    check_item: str,
+    what_to_verify: str,
+    impact: str,
+    *inputs: CheckInputs,
+    summary: Tuple[str, ...] = (),
+) -> CheckSpec:
+    return CheckSpec(id, analyser, category, check_item, what_to_verify, impact, frozenset(inputs), summary)
+
+
+_PAGE_SUMMARY = ("author", "dates", "outbound_citations", "text_length", "rendering")
+
+
+CHECKS: Dict[int, CheckSpec] = {c.id: c for c in (
+    _check(1, ANALYSERS.SEARCH_EO, "GSC", "Manual actions", "No penalties", "Critical", CheckInputs.GSC, summary=("site",)),
+    _check(2, ANALYSERS.SEARCH_EO, "GSC", "Security issues", "No malware/hacks", "Critical", CheckInputs.GSC, summary=("site",)),
+    _check(3, ANALYSERS.SEARCH_EO, "Trust", "Safe browsing", "No malware/phishing", "Critical", CheckInputs.SAFE_BROWSING, summary=("configured", "error")),
+    _check(4, ANALYSERS.SEARCH_EO, "Trust", "Spam protection", "No injected spam pages", "Critical", CheckInputs.SITE_INDEX, summary=("flagged_count",)),
+    _check(5, ANALYSERS.AI_EO, "Content", "Factual accuracy", "Content is verifiable and up to date", "Critical", CheckInputs.SITE_INDEX, summary=_PAGE_SUMMARY),
+    _check(6, ANALYSERS.AI_EO, "EEAT", "No misleading claims", "Content aligns with facts", "Critical", CheckInputs.SITE_INDEX, summary=("site_identity",)),
+    _check(7, ANALYSERS.GEN_EO, "Trust", "Factual accuracy", "Content is verifiable and current", "Critical", CheckInputs.SITE_INDEX, summary=_PAGE_SUMMARY),
+    _check(8, ANALYSERS.GEN_EO, "Trust", "Transparent intent", "No misleading or deceptive framing", "Critical", CheckInputs.SITE_INDEX, summary=("site_identity",)),
+    _check(9, ANALYSERS.GEN_EO, "Risk", "No AI spam", "No auto-generated low-quality content", "Critical", CheckInputs.SITE_INDEX,
+           summary=("thin_content", "text_length", "duplicate_cluster", "hidden_pattern_hits", "spam_keywords", "rendering")),
+    _check(10, ANALYSERS.GEN_EO, "Risk", "No hallucination bait", "Avoid speculative or false claims", "Critical", CheckInputs.SITE_INDEX, summary=("matched_phrases",)),
+    _check(11, ANALYSERS.GEN_EO, "Risk", "No cloaking", "Same content for users & bots", "Critical", CheckInputs.BOT_FETCH, summary=("text_similarity",)),
+)}
+
+
+def selected_checks(check_ids: Optional[Iterable[int]] = None) -> List[CheckSpec]:
+    """Registry entries for check_ids (all checks when None), in id order."""
+    if check_ids is None:
+        return list(CHECKS.values())
+    return [CHECKS[i] for i in sorted(set(check_ids))]
+
+
+def required_inputs(check_ids: Optional[Iterable[int]] = None) -> Set[CheckInputs]:
+    return {i for c in selected_checks(check_ids) for i in c.inputs}
+
+
+def required_analysers(check_ids: Optional[Iterable[int]] = None) -> Set[ANALYSERS]:
+    return {c.analyser for c in selected_checks(check_ids)}
@@ -4,3 +4,10 @@ class ANALYSERS(Enum):
     SEARCH_EO = 'seo'
     GEN_EO = 'geo'
     AI_EO = 'aeo'
+
+
+class CheckInputs(Enum):
+    SITE_INDEX = "site_index"  # sampled pages fetched once and indexed (pipeline.site_index)
+    BOT_FETCH = "bot_fetch"  # extra user + Googlebot fetch of each page (cloaking)
+    GSC = "gsc"  # Google Search Console token and API calls
+    SAFE_BROWSING = "safe_browsing"  # Google Safe Browsing lookup
@@ -0,0 +1,237 @@
+"""
+Record/replay archive of the responses a scan's analysers received.
+
+Recording (ScanOptions.record) keeps every PageFetcher result, and every page
+rendered for a JS shell, keyed by (URL, user agent): status, final URL, trace,
+and body. Bodies are content-addressed by xxh3-128, so identical responses
+(the user and Googlebot fetch of a page that doesn't cloak, repeated error
+pages) are stored once. Each body is zlib-compressed with a preset dictionary
+built per host from that host's first pages, where the shared template
+(header, navigation, footer) lives. The archive is written to one SQLite file
+when the scan ends.
+
+Replaying (pipeline.replay) loads that file and answers PageFetcher.get from it,
+so a site can be re-scored after a threshold or heuristic change without
+touching the network.
+"""
+from __future__ import annotations
+
+import sqlite3
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import orjson
+import xxhash
+
+from infra.files import ensure_dirs
+from .common import FetchResult
+from .fetcher import BudgetExhausted
+from .resilience import FetchFailed
+
+# User-agent key under which browser-rendered HTML is recorded (see rendering.PageRenderer).
+RENDER_KEY = "render"
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE dictionaries (id INTEGER PRIMARY KEY, host TEXT NOT NULL, data BLOB NOT NULL);
+CREATE TABLE bodies (hash TEXT PRIMARY KEY, dictionary INTEGER REFERENCES dictionaries(id), data BLOB NOT NULL);
+CREATE TABLE responses (
+    url TEXT NOT NULL,
+    user_agent TEXT NOT NULL,
+    status_code INTEGER,
+    final_url TEXT,
+    body TEXT REFERENCES bodies(hash),
+    num_bytes INTEGER NOT NULL DEFAULT 0,
+    retry_after REAL,
+    trace TEXT,
+    error TEXT,
+    PRIMARY KEY (url, user_agent)
+);
+"""
+
+
+class NotArchived(BudgetExhausted):
+    """The replayed scan asks for a response the recording doesn't have (it was never fetched)."""
+
+
+def _train_dictionary(samples: List[bytes], size: int) -> bytes:
+    """
+    Preset dictionary from a host's first bodies: their heads and tails, where
+    the page template repeats. zlib only looks back 32 KB and the end of the
+    dictionary is the cheapest to reference, so it is kept to `size`.
+    """
+    per = max(1, size // (2 * len(samples)))
+    parts: List[bytes] = []
+    for body in samples:
+        if len(body) <= 2 * per:
+            parts.append(body)
+        else:
+            parts.extend((body[:per], body[-per:]))
+    return b"".join(parts)[-size:]
+
+
+class FetchArchive:
+    def __init__(self, compression_level: int = 6, dict_samples: int = 4, dict_bytes: int = 32768):
+        self.compression_level = compression_level
+        self.dict_samples = max(1, dict_samples)
+        self.dict_bytes = dict_bytes
+        self.replaying = False
+        self.meta: Dict[str, Any] = {}
+        # (url, user_agent) -> (status_code, final_url, body hash, num_bytes, retry_after, trace, error)
+        self._responses: Dict[Tuple[str, str], tuple] = {}
+        # body hash -> (dictionary id or None, compressed bytes)
+        self._bodies: Dict[str, Tuple[Optional[int], bytes]] = {}
+        self._dictionaries: Dict[int, bytes] = {}
+        self._host_dictionary: Dict[str, int] = {}
+        # Raw bodies of hosts still collecting dictionary samples (at most dict_samples each).
+        self._samples: Dict[str, List[Tuple[str, bytes]]] = {}
+        self._sampled: set[str] = set()
+        self.raw_bytes = 0
+
+    # ----- recording -----
+
+    def _compress(self, data: bytes, dictionary: Optional[int]) -> Tuple[Optional[int], bytes]:
+        """(dictionary id or None, compressed data): with the host dictionary unless plain zlib is smaller."""
+        plain = zlib.compress(data, self.compression_level)
+        if dictionary is None:
+            return None, plain
+        c = zlib.compressobj(self.compression_level, zdict=self._dictionaries[dictionary])
+        packed = c.compress(data) + c.flush()
+        return (dictionary, packed) if len(packed) < len(plain) else (None, plain)
+
+    def _flush_samples(self, host: str) -> None:
+        samples = self._samples.pop(host, [])
+        if not samples:
+            return
+        dictionary = len(self._dictionaries) + 1
+        self._dictionaries[dictionary] = _train_dictionary([raw for _, raw in samples], self.dict_bytes)
+        self._host_dictionary[host] = dictionary
+        for digest, raw in samples:
+            self._bodies[digest] = self._compress(raw, dictionary)
+            self._sampled.discard(digest)
+
+    def _store_body(self, url: str, text: str) -> str:
+        raw = text.encode("utf-8")
+        digest = xxhash.xxh3_128(raw).hexdigest()
+        if digest in self._bodies or digest in self._sampled:
+            return digest
+        self.raw_bytes += len(raw)
+        host = urlparse(url).netloc
+        dictionary = self._host_dictionary.get(host)
+        if dictionary is not None:
+            self._bodies[digest] = self._compress(raw, dictionary)
+            return digest
+        samples = self._samples.setdefault(host, [])
+        samples.append((digest, raw))
+        self._sampled.add(digest)
+        if len(samples) >= self.dict_samples:
+            self._flush_samples(host)
+        return digest
+
+    def record(self, url: str, user_agent: str, result: FetchResult) -> None:
+        digest = self._store_body(result.final_url or url, result.text)
+        self._responses[(url, user_agent)] = (
+            result.status_code, result.final_url, digest, result.num_bytes, result.retry_after, result.trace, None
+        )
+
+    def record_error(self, url: str, user_agent: str, error: FetchFailed) -> None:
+        self._responses[(url, user_agent)] = (None, None, None, 0, None, error.trace, str(error))
+
+    def record_render(self, url: str, html: str) -> None:
+        self._responses[(url, RENDER_KEY)] = (200, url, self._store_body(url, html), len(html), None, (), None)
+
+    def save(self, path: Path) -> None:
+        """Write the recording to path (replacing any file there)."""
+        for host in list(self._samples):
+            self._flush_samples(host)
+        ensure_dirs()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        with closing(sqlite3.connect(path)) as conn, conn:
+            conn.executescript(_SCHEMA)
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, orjson.dumps(v).decode()) for k, v in self.meta.items()])
+            conn.executemany(
+                "INSERT INTO dictionaries VALUES (?, ?, ?)",
+                [(i, host, self._dictionaries[i]) for host, i in self._host_dictionary.items()],
+            )
+            conn.executemany("INSERT INTO bodies VALUES (?, ?, ?)", [(h, d, data) for h, (d, data) in self._bodies.items()])
+            conn.executemany(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (url, ua, status, final_url, body, num_bytes, retry_after, orjson.dumps(trace).decode(), error)
+                    for (url, ua), (status, final_url, body, num_bytes, retry_after, trace, error) in self._responses.items()
+                ],
+            )
+
+    # ----- replay -----
+
+    @classmethod
+    def load(cls, path: Path) -> "FetchArchive":
+        if not path.is_file():
+            raise FileNotFoundError(f"No fetch archive at {path}")
+        archive = cls()
+        archive.replaying = True
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            archive.meta = {k: orjson.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+            archive._dictionaries = dict(conn.execute("SELECT id, data FROM dictionaries"))
+            archive._bodies = {h: (d, data) for h, d, data in conn.execute("SELECT hash, dictionary, data FROM bodies")}
+            for url, ua, status, final_url, body, num_bytes, retry_after, trace, error in conn.execute(
+                "SELECT url, user_agent, status_code, final_url, body, num_bytes, retry_after, trace, error FROM responses"
+            ):
+                trace = tuple(orjson.loads(trace)) if trace else ()
+                archive._responses[(url, ua)] = (status, final_url, body, num_bytes, retry_after, trace, error)
+        return archive
+
+    def _body(self, digest: str) -> str:
+        dictionary, data = self._bodies[digest]
+        if dictionary is None:
+            return zlib.decompress(data).decode("utf-8")
+        d = zlib.decompressobj(zdict=self._dictionaries[dictionary])
+        return (d.decompress(data) + d.flush()).decode("utf-8")
+
+    def lookup(self, url: str, user_agent: str) -> FetchResult:
+        """The recorded result; raises the recorded FetchFailed, or NotArchived when url was never fetched."""
+        entry = self._responses.get((url, user_agent))
+        if entry is None:
+            raise NotArchived(f"{url} is not in the fetch archive")
+        status, final_url, body, num_bytes, retry_after, trace, error = entry
+        if error is not None:
+            raise FetchFailed(error, trace)
+        return FetchResult(
+            url=url,
+            final_url=final_url,
+            status_code=status,
+            text=self._body(body),
+            num_bytes=num_bytes,
+            retry_after=retry_after,
+            trace=trace,
+        )
+
+    def rendered(self, url: str) -> Optional[str]:
+        entry = self._responses.get((url, RENDER_KEY))
+        return self._body(entry[2]) if entry is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        stored = sum(len(data) for _, data in self._bodies.values()) + sum(
+            len(self._dictionaries[i]) for i in self._host_dictionary.values()
+        )
+        return {
+            "responses": len(self._responses),
+            "unique_bodies": len(self._bodies) + len(self._sampled),
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": stored,
+        }
+
+
+class ArchiveRenderer:
+    """Stands in for rendering.PageRenderer during replay: returns the recorded rendered HTML."""
+
+    def __init__(self, archive: FetchArchive):
+        self.archive = archive
+        self.failed = 0
+
+    async def render(self, url: str, timeout_sec: Optional[float] = None) -> Optional[str]:
+        return self.archive.rendered(url)
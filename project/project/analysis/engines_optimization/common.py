@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import re
 from dataclasses import dataclass
 from html.parser import HTMLParser
@@ -11,6 +12,8 @@ from urllib.parse import urlparse
 import httpx
 import xxhash
 
+from infra.metrics import PARSE_DURATION, current_analyser, observe_seconds
+
 
 DEFAULT_UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -20,6 +23,11 @@ GOOGLEBOT_UA = (
     "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)"
 )
 
+# Google API endpoints; overridable so benchmarks can point them at local stand-ins.
+SAFE_BROWSING_ENDPOINT = "https://safebrowsing.googleapis.com/v4/threatMatches:find"
+GSC_TOKEN_URL = "https://oauth2.googleapis.com/token"
+GSC_API_BASE = "https://searchconsole.googleapis.com/webmasters/v3"
+
 
 SPAM_KEYWORDS = {
     "casino",
@@ -61,6 +69,15 @@ class FetchResult:
     final_url: str
     status_code: int
     text: str
+    num_bytes: int = 0
+    retry_after: Optional[float] = None
+    # Resilience decisions taken for this fetch (retries, hedges, throttling).
+    trace: tuple[dict[str, Any], ...] = ()
+
+
+# Mount points client-side frameworks render into (React, Vue, Next, Nuxt, Gatsby, Angular).
+_SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "svelte"}
+_SPA_ROOT_ATTRS = {"ng-app", "ng-version", "data-reactroot", "data-v-app"}
 
 
 class _TextLinkParser(HTMLParser):
@@ -68,6 +85,11 @@ class _TextLinkParser(HTMLParser):
         super().__init__()
         self.in_script = False
         self.in_style = False
+        # JS-shell signals (see extract_from_html "scripts").
+        self.script_chars = 0
+        self.external_scripts = 0
+        self.spa_root = False
+        self.noscript = False
         self._text_parts: list[str] = []
         self.title: Optional[str] = None
         self._in_title = False
@@ -79,8 +101,14 @@ class _TextLinkParser(HTMLParser):
 
     def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]):
         attrs_dict = {k.lower(): (v or "") for k, v in attrs}
+        if not self.spa_root and (attrs_dict.get("id") in _SPA_ROOT_IDS or not _SPA_ROOT_ATTRS.isdisjoint(attrs_dict)):
+            self.spa_root = True
         if tag.lower() == "script":
             self.in_script = True
+            if attrs_dict.get("src"):
+                self.external_scripts += 1
+        elif tag.lower() == "noscript":
+            self.noscript = True
         elif tag.lower() == "style":
             self.in_style = True
         elif tag.lower() == "title":
@@ -114,7 +142,10 @@ class _TextLinkParser(HTMLParser):
             self._current_a_text = []
 
     def handle_data(self, data: str):
-        if self.in_script or self.in_style:
+        if self.in_script:
+            self.script_chars += len(data)
+            return
+        if self.in_style:
             return
         if self._in_title:
             t = (data or "").strip()
@@ -134,9 +165,8 @@ class _TextLinkParser(HTMLParser):
 
 
 def normalize_text(s: str) -> str:
-    s = (s or "").lower()
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # Same whitespace set as re's \s, collapsed without the regex engine.
+    return " ".join((s or "").lower().split())
 
 
 def text_hash(s: str) -> str:
@@ -144,6 +174,11 @@ def text_hash(s: str) -> str:
 
 
 def extract_from_html(html: str) -> dict[str, Any]:
+    with observe_seconds(PARSE_DURATION, analyser=current_analyser.get()):
+        return _extract_from_html(html)
+
+
+def _extract_from_html(html: str) -> dict[str, Any]:
     parser = _TextLinkParser()
     try:
         parser.feed(html or "")
@@ -178,6 +213,12 @@ def extract_from_html(html: str) -> dict[str, Any]:
         "dates": [d for d in dates_flat if d],
         "text": parser.text,
         "links": parser.links,
+        "scripts": {
+            "inline_chars": parser.script_chars,
+            "external": parser.external_scripts,
+            "spa_root": parser.spa_root,
+            "noscript": parser.noscript,
+        },
     }
 
 
@@ -239,17 +280,43 @@ def keyword_stuffing_score(text: str) -> dict[str, Any]:
     return {"suspect": ratio > 0.08 and top_count > 40, "top_word": top_word, "ratio": ratio, "top_count": top_count}
 
 
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+    from datetime import datetime, timezone
+
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
 async def fetch_url(client: httpx.AsyncClient, url: str, user_agent: str, timeout_sec: float = 20) -> FetchResult:
     headers = {"user-agent": user_agent, "accept": "text/html,application/xhtml+xml"}
     r = await client.get(url, headers=headers, follow_redirects=True, timeout=timeout_sec)
-    return FetchResult(url=url, final_url=str(r.url), status_code=r.status_code, text=r.text or "")
+    return FetchResult(
+        url=url,
+        final_url=str(r.url),
+        status_code=r.status_code,
+        text=r.text or "",
+        num_bytes=len(r.content),
+        retry_after=parse_retry_after(r.headers.get("retry-after")),
+    )
 
 
 async def safe_browsing_check(urls: list[str], api_key: Optional[str]) -> dict[str, Any]:
     if not api_key:
         return {"configured": False, "matches": [], "error": "SAFE_BROWSING_API_KEY not set"}
 
-    endpoint = f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}"
+    endpoint = f"{os.getenv('SAFE_BROWSING_ENDPOINT', SAFE_BROWSING_ENDPOINT)}?key={api_key}"
     payload = {
         "client": {"clientId": "site360", "clientVersion": "1.0"},
         "threatInfo": {
@@ -273,7 +340,7 @@ async def safe_browsing_check(urls: list[str], api_key: Optional[str]) -> dict[s
 async def gsc_get_access_token(client_id: str, client_secret: str, refresh_token: str) -> str:
     async with httpx.AsyncClient() as client:
         resp = await client.post(
-            "https://oauth2.googleapis.com/token",
+            os.getenv("GSC_TOKEN_URL", GSC_TOKEN_URL),
             data={
                 "client_id": client_id,
                 "client_secret": client_secret,
@@ -291,7 +358,7 @@ async def gsc_fetch(endpoint_path: str, site_url: str, access_token: str) -> dic
     from urllib.parse import quote
 
     site_enc = quote(site_url, safe="")
-    url = f"https://searchconsole.googleapis.com/webmasters/v3/sites/{site_enc}/{endpoint_path}"
+    url = f"{os.getenv('GSC_API_BASE', GSC_API_BASE)}/sites/{site_enc}/{endpoint_path}"
     async with httpx.AsyncClient() as client:
         resp = await client.get(url, headers={"authorization": f"Bearer {access_token}"}, timeout=20)
         resp.raise_for_status()
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from analysis.engines_optimization.common import FetchResult, fetch_url
+from analysis.engines_optimization.limiter import THROTTLE_STATUSES, get_host_limiter, save_host_limits
+from analysis.engines_optimization.resilience import (
+    RETRY_STATUSES,
+    CircuitOpenError,
+    FetchFailed,
+    backoff_delay,
+    get_circuit_breaker,
+    get_latency_tracker,
+    is_retryable_error,
+)
+from infra.files import CONFIG
+from infra.metrics import FETCH_BYTES, FETCH_DECISIONS, FETCH_LATENCY, FETCH_RESPONSES, current_analyser
+
+if TYPE_CHECKING:
+    from analysis.engines_optimization.archive import FetchArchive
+
+
+class BudgetExhausted(Exception):
+    """Raised when a fetch is attempted after the scan's byte or time budget is spent."""
+
+
+class DeadlineExceeded(BudgetExhausted):
+    """Raised when a fetch is attempted after the scan deadline."""
+
+
+class PageFetcher:
+    """
+    Shared page-fetch layer for one scan.
+
+    Owns the httpx client and enforces the scan budget: every response body is
+    charged against max_bytes and no new fetch starts once max_bytes or
+    max_seconds is used up. Requests are gated by the adaptive per-host limiter;
+    429/503 responses are retried after the host's back-off instead of being
+    handed to checks as page failures; a page still throttled after
+    `fetch.throttle_retries` raises FetchFailed, so it is reported as a fetch
+    failure rather than scored on the error body. Transport errors and 502/504 are retried
+    with jittered back-off, slow requests are hedged, and a per-host circuit
+    breaker stops sending to an origin that keeps failing. Every such decision
+    is returned in FetchResult.trace (or FetchFailed.trace) for check evidence.
+
+    `deadline` is an absolute time.monotonic() value: no fetch starts after it
+    and in-flight timeouts are capped to the time left.
+
+    With an `archive` (see engines_optimization.archive), every result is
+    recorded into it, or, when the archive is being replayed, answered from it
+    without any network traffic.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        deadline: Optional[float] = None,
+        archive: Optional["FetchArchive"] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.deadline = deadline
+        self.archive = archive
+        self.bytes_used = 0
+        self.requests = 0
+        self.started_at = time.monotonic()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.hosts: set[str] = set()
+        self.decisions: Counter[str] = Counter()
+
+    async def __aenter__(self) -> "PageFetcher":
+        conc = CONFIG.fetch.concurrency
+        # Pool sized for the largest per-host limit; the limiter does the real gating.
+        limits = httpx.Limits(max_connections=conc.max * 4, max_keepalive_connections=conc.max)
+        self.client = httpx.AsyncClient(limits=limits)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        if self.hosts:
+            try:
+                save_host_limits(self.hosts)
+            except Exception:
+                pass
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def remaining(self) -> Optional[float]:
+        """Seconds until the scan deadline (None without a deadline)."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    @property
+    def deadline_reached(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_bytes is not None and self.bytes_used >= self.max_bytes:
+            return True
+        if self.max_seconds is not None and self.elapsed >= self.max_seconds:
+            return True
+        return False
+
+    def usage(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "elapsed_sec": round(self.elapsed, 3),
+            "max_seconds": self.max_seconds,
+            "exhausted": self.exhausted,
+            "deadline_reached": self.deadline_reached,
+            "host_limits": {h: round(get_host_limiter(h).limit, 2) for h in sorted(self.hosts)},
+            "decisions": dict(self.decisions),
+            "circuits": {h: get_circuit_breaker(h).state for h in sorted(self.hosts)},
+        }
+
+    def _count_decision(self, event: str) -> None:
+        self.decisions[event] += 1
+        FETCH_DECISIONS.labels(analyser=current_analyser.get(), event=event).inc()
+
+    async def _send(self, url: str, user_agent: str, timeout_sec: float, limiter, host: str) -> FetchResult:
+        """One request on an already-acquired limiter slot; the slot is released on exit."""
+        started = time.monotonic()
+        try:
+            self.requests += 1
+            result = await fetch_url(self.client, url, user_agent, timeout_sec=timeout_sec)
+        except Exception:
+            await limiter.record(None, time.monotonic() - started)
+            FETCH_RESPONSES.labels(analyser=current_analyser.get(), status="error").inc()
+            raise
+        finally:
+            await limiter.release()
+        latency = time.monotonic() - started
+        self.bytes_used += result.num_bytes
+        analyser = current_analyser.get()
+        FETCH_LATENCY.labels(analyser=analyser).observe(latency)
+        FETCH_BYTES.labels(analyser=analyser).inc(result.num_bytes)
+        FETCH_RESPONSES.labels(analyser=analyser, status=str(result.status_code)).inc()
+        await limiter.record(result.status_code, latency, result.retry_after)
+        if result.status_code not in THROTTLE_STATUSES:
+            get_latency_tracker(host).add(latency)
+        return result
+
+    async def _attempt(self, url: str, user_agent: str, timeout_sec: float, limiter, host: str, trace: list) -> FetchResult:
+        """Send one request, hedging it with a duplicate once it outlives the host's latency percentile."""
+        remaining = self.remaining
+        if remaining is None:
+            await limiter.acquire()
+        else:
+            # Waiting for a slot counts against the deadline too.
+            try:
+                await asyncio.wait_for(limiter.acquire(), timeout=max(0.0, remaining))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Scan deadline reached") from None
+            timeout_sec = max(0.1, min(timeout_sec, self.remaining))
+        primary = asyncio.create_task(self._send(url, user_agent, timeout_sec, limiter, host))
+        hedge_after = get_latency_tracker(host).hedge_delay()
+        if hedge_after is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        # Hedges only use spare capacity so they never push a host past its learned limit.
+        if done or self.exhausted or not limiter.try_acquire():
+            return await primary
+
+        hedge = asyncio.create_task(self._send(url, user_agent, timeout_sec, limiter, host))
+        event = {"event": "hedge", "after_sec": round(hedge_after, 3)}
+        trace.append(event)
+        self._count_decision("hedges")
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        event["winner"] = "hedge" if task is hedge else "primary"
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+
+    async def get(self, url: str, user_agent: str, timeout_sec: float = 20) -> FetchResult:
+        archive = self.archive
+        if archive is None:
+            return await self._get(url, user_agent, timeout_sec)
+        if archive.replaying:
+            if self.deadline_reached:
+                raise DeadlineExceeded("Scan deadline reached")
+            if self.exhausted:
+                raise BudgetExhausted("Scan budget exhausted")
+            self.requests += 1
+            result = archive.lookup(url, user_agent)
+            self.bytes_used += result.num_bytes
+            return result
+        try:
+            result = await self._get(url, user_agent, timeout_sec)
+        except FetchFailed as e:
+            archive.record_error(url, user_agent, e)
+            raise
+        archive.record(url, user_agent, result)
+        return result
+
+    async def _get(self, url: str, user_agent: str, timeout_sec: float) -> FetchResult:
+        if self.client is None:
+            raise RuntimeError("PageFetcher must be used as an async context manager")
+        host = urlparse(url).netloc
+        self.hosts.add(host)
+        limiter = get_host_limiter(host)
+        breaker = get_circuit_breaker(host)
+        trace: list[dict[str, Any]] = []
+        retries = throttled = 0
+        while True:
+            if self.deadline_reached:
+                raise DeadlineExceeded("Scan deadline reached")
+            if self.exhausted:
+                raise BudgetExhausted("Scan budget exhausted")
+            if not breaker.allow():
+                trace.append({"event": "circuit_open", "host": host})
+                self._count_decision("circuit_open")
+                raise CircuitOpenError(f"Circuit open for {host}; request not sent", tuple(trace))
+
+            try:
+                result = await self._attempt(url, user_agent, timeout_sec, limiter, host, trace)
+            except Exception as e:
+                if self.deadline_reached:
+                    # Cut short by the deadline cap; not the host's fault.
+                    raise DeadlineExceeded("Scan deadline reached") from e
+                breaker.record_failure()
+                if not is_retryable_error(e) or retries >= CONFIG.fetch.retry.max_retries:
+                    raise FetchFailed(str(e) or type(e).__name__, tuple(trace)) from e
+                reason = type(e).__name__
+            else:
+                if result.status_code in THROTTLE_STATUSES:
+                    trace.append({"event": "throttled", "status": result.status_code, "retry_after": result.retry_after})
+                    self._count_decision("throttled")
+                    if throttled >= CONFIG.fetch.throttle_retries:
+                        raise FetchFailed(f"HTTP {result.status_code}: {host} still throttling after {throttled} retries", tuple(trace))
+                    # The host limiter already pauses the host; no extra back-off here.
+                    throttled += 1
+                    continue
+                if result.status_code in RETRY_STATUSES:
+                    breaker.record_failure()
+                    if retries >= CONFIG.fetch.retry.max_retries:
+                        return replace(result, trace=tuple(trace))
+                    reason = f"HTTP {result.status_code}"
+                else:
+                    breaker.record_success()
+                    return replace(result, trace=tuple(trace)) if trace else result
+
+            delay = backoff_delay(retries)
+            retries += 1
+            trace.append({"event": "retry", "attempt": retries, "reason": reason, "delay_sec": round(delay, 3)})
+            self._count_decision("retries")
+            remaining = self.remaining
+            await asyncio.sleep(delay if remaining is None else max(0.0, min(delay, remaining)))
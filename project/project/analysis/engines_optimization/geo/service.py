@@ -2,270 +2,230 @@ from __future__ import annotations
 
 import asyncio
 from difflib import SequenceMatcher
-from typing import Any, Dict, List
-from urllib.parse import urlparse
-
-import httpx
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+from analysis.checks import CHECKS
 from analysis.constants import ANALYSERS
 from analysis.views import BaseAnalyser
+from analysis.engines_optimization import page_rules
 from analysis.engines_optimization.views import EOCheckResult, EOPageResult
 from analysis.engines_optimization.common import (
     DEFAULT_UA,
     GOOGLEBOT_UA,
     extract_from_html,
-    split_internal_external_links,
-    detect_hidden_link_patterns,
-    count_keyword_matches,
-    keyword_stuffing_score,
     text_hash,
     normalize_text,
-    SPAM_KEYWORDS,
-    BAIT_PHRASES,
-    DISCLOSURE_KEYWORDS,
 )
+from analysis.engines_optimization.fetcher import BudgetExhausted, PageFetcher
+from analysis.engines_optimization.rendering import render_evidence
+from analysis.engines_optimization.resilience import fetch_evidence
+from pipeline.body_spill import read_body
 
-
-def _site_identity_signals(urls: list[str]) -> dict[str, bool]:
-    u = [urlparse(x).path.lower() for x in urls]
-    def has_any(keys: list[str]) -> bool:
-        return any(any(k in p for k in keys) for p in u)
-    return {
-        "has_about": has_any(["/about"]),
-        "has_contact": has_any(["/contact"]),
-        "has_privacy": has_any(["/privacy"]),
-        "has_terms": has_any(["/terms"]),
-    }
+if TYPE_CHECKING:
+    from pipeline.views import PageFeatures
 
 
-async def _fetch_pair(client: httpx.AsyncClient, url: str) -> tuple[dict[str, Any], dict[str, Any]]:
-    r_user = await client.get(url, follow_redirects=True, timeout=20, headers={"user-agent": DEFAULT_UA})
-    r_bot = await client.get(url, follow_redirects=True, timeout=20, headers={"user-agent": GOOGLEBOT_UA})
-    return (
-        {"final_url": str(r_user.url), "status": r_user.status_code, "html": r_user.text or ""},
-        {"final_url": str(r_bot.url), "status": r_bot.status_code, "html": r_bot.text or ""},
-    )
+async def _fetch_pair(fetcher: PageFetcher, url: str, f: Optional["PageFeatures"] = None) -> tuple[dict[str, Any], dict[str, Any]]:
+    # The browser-UA body the site index spilled to disk stands in for the user fetch.
+    if f is not None and f.body_path is not None:
+        html = await asyncio.to_thread(read_body, f.body_path)
+        user_v = {"final_url": f.final_url, "status": f.status_code, "html": html, "trace": f.trace}
+    else:
+        r_user = await fetcher.get(url, user_agent=DEFAULT_UA)
+        user_v = {"final_url": r_user.final_url, "status": r_user.status_code, "html": r_user.text, "trace": r_user.trace}
+    r_bot = await fetcher.get(url, user_agent=GOOGLEBOT_UA)
+    return user_v, {"final_url": r_bot.final_url, "status": r_bot.status_code, "html": r_bot.text, "trace": r_bot.trace}
 
 
 def _similarity(a: str, b: str) -> float:
     a = normalize_text(a)[:10000]
     b = normalize_text(b)[:10000]
-    if not a and not b:
+    if a == b:
+        # Most pages don't cloak; identical text is a ratio of exactly 1.0 without the O(n^2) match.
         return 1.0
     return SequenceMatcher(None, a, b).ratio()
 
 
-class GeoAnalyzer(BaseAnalyser):
-    name = ANALYSERS.GEN_EO
-
-    async def scan(self) -> List[Dict[str, Any]]:
-        discovered = self.pre_context.discovered_pages or []
-        root_url = self.url
-        domain = urlparse(root_url).netloc
-        discovered_urls = [p.url for p in discovered]
-        identity = _site_identity_signals(discovered_urls)
-
-        # Fetch all pages once (normal UA) for global heuristics (duplicates, thin content).
-        # Limit to avoid runaway scans.
-        targets = discovered[:50]
-        sem = asyncio.Semaphore(6)
-        page_html: dict[str, str] = {}
-        page_text_hash: dict[str, str] = {}
-        page_text_len: dict[str, int] = {}
-
-        async with httpx.AsyncClient() as client:
-            async def fetch_one(p):
-                async with sem:
-                    r = await client.get(p.url, follow_redirects=True, timeout=20, headers={"user-agent": DEFAULT_UA})
-                    html = r.text or ""
-                    extracted = extract_from_html(html)
-                    text = extracted.get("text", "") or ""
-                    page_html[p.url] = html
-                    page_text_hash[p.url] = text_hash(text)
-                    page_text_len[p.url] = len(normalize_text(text))
-
-            await asyncio.gather(*(fetch_one(p) for p in targets), return_exceptions=True)
-
-            # Duplicate clusters by hash
-            from collections import defaultdict
-            clusters: dict[str, list[str]] = defaultdict(list)
-            for u, h in page_text_hash.items():
-                clusters[h].append(u)
-            dup_urls = {u for h, urls in clusters.items() if len(urls) >= 3 for u in urls}
-
-            results: List[Dict[str, Any]] = []
-            for p in targets:
-                html = page_html.get(p.url, "")
-                extracted = extract_from_html(html)
-                text = extracted.get("text", "") or ""
-                links = extracted.get("links") or []
-                _internal, external = split_internal_external_links(links, domain)
-                citations = len(external)
-                dates = extracted.get("dates") or []
-                author = extracted.get("author")
-                t_norm = normalize_text(text)
-
-                # 7) GEO Trust - Factual accuracy (proxy)
-                has_date = len(dates) > 0
-                has_author = bool(author)
-                has_citations = citations > 0
-                text_len = page_text_len.get(p.url, 0)
-                if has_date and has_author and has_citations and text_len > 400:
-                    s7, d7 = "pass", "Has author + date + outbound references (verifiability proxies)."
-                elif text_len < 200:
-                    s7, d7 = "fail", "Very thin content; cannot be considered verifiable/current (heuristic)."
-                else:
-                    s7, d7 = "warn", "Cannot confirm factual accuracy deterministically; proxies are incomplete."
-
-                check7 = EOCheckResult(
-                    id=7,
-                    type="GEO",
-                    category="Trust",
-                    check_item="Factual accuracy",
-                    what_to_verify="Content is verifiable and current",
-                    impact="Critical",
-                    status=s7,
-                    details=d7,
-                    evidence={"author": author, "dates": dates[:5], "outbound_citations": citations, "text_length": text_len},
-                )
-
-                # 8) GEO Trust - Transparent intent (proxy)
-                disclosures = [k for k in DISCLOSURE_KEYWORDS if k in t_norm]
-                if identity["has_about"] and identity["has_contact"] and identity["has_privacy"]:
-                    s8, d8 = "pass", "Site identity pages present (about/contact/privacy)."
-                else:
-                    s8, d8 = "warn", "Transparent intent cannot be validated automatically; identity signals incomplete."
-                check8 = EOCheckResult(
-                    id=8,
-                    type="GEO",
-                    category="Trust",
-                    check_item="Transparent intent",
-                    what_to_verify="No misleading or deceptive framing",
-                    impact="Critical",
-                    status=s8,
-                    details=d8,
-                    evidence={"site_identity": identity, "disclosure_keywords_found": disclosures[:10]},
-                )
-
-                # 9) GEO Risk - No AI spam (heuristics for low-quality/auto-gen)
-                hidden_hits = detect_hidden_link_patterns(html)
-                spam_kw = count_keyword_matches(text, SPAM_KEYWORDS)
-                stuff = keyword_stuffing_score(text)
-                in_dup_cluster = p.url in dup_urls
-                thin = text_len < 200
-
-                if in_dup_cluster or thin or hidden_hits > 5 or (stuff.get("suspect") is True) or len(spam_kw) > 0:
-                    # Fail if strong combination, else warn
-                    strong = thin and (in_dup_cluster or hidden_hits > 5 or len(spam_kw) > 0)
-                    s9 = "fail" if strong else "warn"
-                    d9 = "Heuristic signals suggest auto-generated/low-quality or spam-like content."
-                else:
-                    s9, d9 = "pass", "No strong low-quality/auto-generated heuristics detected."
+# Status and details of check 7 per page_rules.factual_accuracy branch.
+_FACTUAL_OUTCOMES = (
+    ("pass", "Has author + date + outbound references (verifiability proxies)."),
+    ("warn", "Page is client-rendered and could not be rendered; content not assessed."),
+    ("fail", "Very thin content; cannot be considered verifiable/current (heuristic)."),
+    ("warn", "Cannot confirm factual accuracy deterministically; proxies are incomplete."),
+)
+# Status of check 9 per page_rules.ai_spam verdict.
+_AI_SPAM_STATUS = ("pass", "warn", "fail")
+
+
+def _factual_accuracy(f: "PageFeatures", branch: int) -> EOCheckResult:
+    """7) GEO Trust - Factual accuracy (proxy); branch from page_rules.factual_accuracy"""
+    s7, d7 = _FACTUAL_OUTCOMES[branch]
+    return CHECKS[7].result(
+        s7,
+        d7,
+        {
+            "author": f.author,
+            "dates": list(f.dates),
+            "outbound_citations": f.outbound_links,
+            "text_length": f.text_length,
+            **fetch_evidence(f.trace),
+            **render_evidence(f),
+        },
+    )
 
-                check9 = EOCheckResult(
-                    id=9,
-                    type="GEO",
-                    category="Risk",
-                    check_item="No AI spam",
-                    what_to_verify="No auto-generated low-quality content",
-                    impact="Critical",
-                    status=s9,
-                    details=d9,
-                    evidence={
-                        "thin_content": thin,
-                        "text_length": text_len,
-                        "duplicate_cluster": in_dup_cluster,
-                        "hidden_pattern_hits": hidden_hits,
-                        "spam_keywords": spam_kw,
-                        "keyword_stuffing": stuff,
-                    },
-                )
 
-                # 10) GEO Risk - No hallucination bait (phrase heuristics)
-                bait = [b for b in BAIT_PHRASES if b in t_norm]
-                if bait:
-                    s10 = "warn"
-                    d10 = f"Found {len(bait)} potential bait phrase(s); manual review recommended."
-                else:
-                    s10 = "pass"
-                    d10 = "No common bait phrases detected (heuristic)."
-                check10 = EOCheckResult(
-                    id=10,
-                    type="GEO",
-                    category="Risk",
-                    check_item="No hallucination bait",
-                    what_to_verify="Avoid speculative or false claims",
-                    impact="Critical",
-                    status=s10,
-                    details=d10,
-                    evidence={"matched_phrases": bait},
-                )
+def _transparent_intent(f: "PageFeatures", identity: Dict[str, bool]) -> EOCheckResult:
+    """8) GEO Trust - Transparent intent (proxy)"""
+    if identity["has_about"] and identity["has_contact"] and identity["has_privacy"]:
+        s8, d8 = "pass", "Site identity pages present (about/contact/privacy)."
+    else:
+        s8, d8 = "warn", "Transparent intent cannot be validated automatically; identity signals incomplete."
+    return CHECKS[8].result(s8, d8, {"site_identity": identity, "disclosure_keywords_found": list(f.disclosure_keywords[:10])})
+
+
+def _no_ai_spam(f: "PageFeatures", verdict: int, thin: bool, in_dup_cluster: bool) -> EOCheckResult:
+    """9) GEO Risk - No AI spam (heuristics for low-quality/auto-gen); verdict and thin from page_rules.ai_spam"""
+    s9 = _AI_SPAM_STATUS[verdict]
+    if verdict == page_rules.AI_SPAM_PASS:
+        d9 = "No strong low-quality/auto-generated heuristics detected."
+    else:
+        d9 = "Heuristic signals suggest auto-generated/low-quality or spam-like content."
+
+    return CHECKS[9].result(
+        s9,
+        d9,
+        {
+            "thin_content": thin,
+            "text_length": f.text_length,
+            "duplicate_cluster": in_dup_cluster,
+            "hidden_pattern_hits": f.hidden_pattern_hits,
+            "spam_keywords": list(f.spam_keywords),
+            "keyword_stuffing": f.keyword_stuffing,
+            **fetch_evidence(f.trace),
+            **render_evidence(f),
+        },
+    )
 
-                # 11) GEO Risk - No cloaking (compare normal vs bot fetch)
-                try:
-                    user_v, bot_v = await _fetch_pair(client, p.url)
-                    user_ex = extract_from_html(user_v["html"])
-                    bot_ex = extract_from_html(bot_v["html"])
-                    sim = _similarity(user_ex.get("text", ""), bot_ex.get("text", ""))
 
-                    major_mismatch = (
-                        user_v["status"] != bot_v["status"]
-                        or user_v["final_url"] != bot_v["final_url"]
-                        or sim < 0.85
-                    )
-                    minor_mismatch = sim < 0.95
+def _no_hallucination_bait(f: "PageFeatures") -> EOCheckResult:
+    """10) GEO Risk - No hallucination bait (phrase heuristics)"""
+    bait = list(f.bait_phrases)
+    if bait:
+        s10 = "warn"
+        d10 = f"Found {len(bait)} potential bait phrase(s); manual review recommended."
+    else:
+        s10 = "pass"
+        d10 = "No common bait phrases detected (heuristic)."
+    return CHECKS[10].result(s10, d10, {"matched_phrases": bait})
+
+
+async def _no_cloaking(fetcher: PageFetcher, url: str, f: Optional["PageFeatures"] = None) -> EOCheckResult:
+    """11) GEO Risk - No cloaking (compare normal vs bot fetch)"""
+    try:
+        user_v, bot_v = await _fetch_pair(fetcher, url, f)
+    except BudgetExhausted as e:
+        return CHECKS[11].result("not_evaluated", f"Cloaking check not evaluated: {str(e)}")
+    except Exception as e:
+        return CHECKS[11].result("warn", f"Cloaking check failed: {str(e)}", fetch_evidence(getattr(e, "trace", ())))
+
+    user_ex = extract_from_html(user_v["html"])
+    bot_ex = user_ex if bot_v["html"] == user_v["html"] else extract_from_html(bot_v["html"])
+    sim = _similarity(user_ex.get("text", ""), bot_ex.get("text", ""))
+
+    major_mismatch = (
+        user_v["status"] != bot_v["status"]
+        or user_v["final_url"] != bot_v["final_url"]
+        or sim < 0.85
+    )
+    minor_mismatch = sim < 0.95
+
+    if major_mismatch:
+        s11 = "fail"
+        d11 = "Detected major difference between user vs bot content (possible cloaking)."
+    elif minor_mismatch:
+        s11 = "warn"
+        d11 = "Detected minor differences between user vs bot content (review recommended)."
+    else:
+        s11 = "pass"
+        d11 = "User vs bot content appears consistent (heuristic)."
+
+    return CHECKS[11].result(
+        s11,
+        d11,
+        {
+            "user": {"status": user_v["status"], "final_url": user_v["final_url"], "title": user_ex.get("title"), "canonical": user_ex.get("canonical")},
+            "bot": {"status": bot_v["status"], "final_url": bot_v["final_url"], "title": bot_ex.get("title"), "canonical": bot_ex.get("canonical")},
+            **({"fetch": {"user": list(user_v["trace"]), "bot": list(bot_v["trace"])}} if user_v["trace"] or bot_v["trace"] else {}),
+            "text_similarity": sim,
+            "user_text_hash": text_hash(user_ex.get("text", "")),
+            "bot_text_hash": text_hash(bot_ex.get("text", "")),
+        },
+    )
 
-                    if major_mismatch:
-                        s11 = "fail"
-                        d11 = "Detected major difference between user vs bot content (possible cloaking)."
-                    elif minor_mismatch:
-                        s11 = "warn"
-                        d11 = "Detected minor differences between user vs bot content (review recommended)."
-                    else:
-                        s11 = "pass"
-                        d11 = "User vs bot content appears consistent (heuristic)."
 
-                    check11 = EOCheckResult(
-                        id=11,
-                        type="GEO",
-                        category="Risk",
-                        check_item="No cloaking",
-                        what_to_verify="Same content for users & bots",
-                        impact="Critical",
-                        status=s11,
-                        details=d11,
-                        evidence={
-                            "user": {"status": user_v["status"], "final_url": user_v["final_url"], "title": user_ex.get("title"), "canonical": user_ex.get("canonical")},
-                            "bot": {"status": bot_v["status"], "final_url": bot_v["final_url"], "title": bot_ex.get("title"), "canonical": bot_ex.get("canonical")},
-                            "text_similarity": sim,
-                            "user_text_hash": text_hash(user_ex.get("text", "")),
-                            "bot_text_hash": text_hash(bot_ex.get("text", "")),
-                        },
-                    )
-                except Exception as e:
-                    check11 = EOCheckResult(
-                        id=11,
-                        type="GEO",
-                        category="Risk",
-                        check_item="No cloaking",
-                        what_to_verify="Same content for users & bots",
-                        impact="Critical",
-                        status="warn",
-                        details=f"Cloaking check failed: {str(e)}",
-                        evidence={},
-                    )
+class GeoAnalyzer(BaseAnalyser):
+    name = ANALYSERS.GEN_EO
 
-                results.append(
-                    EOPageResult(
+    async def scan(self) -> List[Dict[str, Any]]:
+        # Pages are fetched and parsed once for all analysers (see pipeline.site_index).
+        index = await self.site_index()
+        identity = index.identity
+        targets = self.pre_context.scan_targets
+        dup_urls = index.duplicate_urls(min_size=3)
+        page_checks = [c for c in (7, 8, 9, 10) if self.enabled(c)]
+        # Thresholds of checks 7 and 9 are evaluated for every page at once (see page_rules).
+        m = index.feature_matrix()
+        factual = page_rules.factual_accuracy(m) if 7 in page_checks else None
+        if 9 in page_checks:
+            ai_spam, thin = page_rules.ai_spam(m, m.mask(dup_urls))
+
+        async with self.fetch_session() as fetcher:
+            async def evaluate(p) -> Optional[Dict[str, Any]]:
+                checks: List[EOCheckResult] = []
+                f = index.pages.get(p.url)
+                if page_checks:
+                    # Pages skipped by the scan budget are not scored.
+                    if f is None or f.skipped:
+                        return None
+                if f is not None and f.error is not None:
+                    # Failed fetches (retries exhausted, throttled, circuit open) have no content to score,
+                    # and the cloaking check is not re-sent to an origin that just failed.
+                    failure_evidence = fetch_evidence(f.trace)
+                    checks = [
+                        CHECKS[c].result("warn", f"Failed to fetch/analyze page: {f.error}", failure_evidence)
+                        for c in page_checks + ([11] if self.enabled(11) else [])
+                    ]
+                    return EOPageResult(
                         page_id=p.page_id,
                         page_name=p.page_name,
                         url=p.url,
                         timestamp=p.timestamp,
-                        checks=[check7, check8, check9, check10, check11],
-                    ).model_dump()
-                )
-
-        return results
-
-
-
+                        checks=checks,
+                    ).model_dump(mode="json")
+                if page_checks:
+                    row = m.rows[p.url]
+                    if factual is not None:
+                        checks.append(_factual_accuracy(f, factual[row]))
+                    if 8 in page_checks:
+                        checks.append(_transparent_intent(f, identity))
+                    if 9 in page_checks:
+                        checks.append(_no_ai_spam(f, ai_spam[row], bool(thin[row]), p.url in dup_urls))
+                    if 10 in page_checks:
+                        checks.append(_no_hallucination_bait(f))
+                if self.enabled(11):
+                    cloaking = await _no_cloaking(fetcher, p.url, f)
+                    # Out of budget with nothing else to report: left to the pipeline's not-evaluated record.
+                    if not checks and cloaking.status == "not_evaluated":
+                        return None
+                    checks.append(cloaking)
+
+                return EOPageResult(
+                    page_id=p.page_id,
+                    page_name=p.page_name,
+                    url=p.url,
+                    timestamp=p.timestamp,
+                    checks=checks,
+                ).model_dump(mode="json")
+
+            # Cloaking fetches dominate; evaluate pages concurrently under the per-host limiter.
+            return await self.gather_pages(targets, evaluate)
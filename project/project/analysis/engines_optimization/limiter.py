@@ -0,0 +1,171 @@
+"""
+Adaptive per-host concurrency (AIMD).
+
+Each host gets a concurrency limit that grows additively while responses stay
+fast and healthy, and shrinks multiplicatively on 429/503, transport errors or
+rising latency. Retry-After pauses the host entirely. Learned limits are
+persisted so the next scan of a domain starts where the last one ended.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from typing import Any, Optional
+
+from infra.files import CONFIG, ensure_dirs
+
+
+THROTTLE_STATUSES = {429, 503}
+
+# Latency is "rising" once the smoothed latency exceeds the best observed
+# latency by this factor (and by at least _LATENCY_SLACK_SEC).
+_LATENCY_FACTOR = 2.0
+_LATENCY_SLACK_SEC = 0.25
+_EWMA_ALPHA = 0.2
+_DECREASE_FACTOR = 0.5
+# Pause after a 429/503 that carries no Retry-After.
+_DEFAULT_THROTTLE_PAUSE_SEC = 1.0
+_LATENCY_DECREASE_FACTOR = 0.75
+# Persisted limits older than this are ignored (sites change).
+_STATE_TTL_SEC = 7 * 24 * 3600
+
+
+class HostLimiter:
+    def __init__(self, host: str, limit: float, min_limit: int, max_limit: int, baseline_latency: Optional[float] = None):
+        self.host = host
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.baseline_latency = baseline_latency
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self.blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            async with self._cond:
+                if self.in_flight < max(1, int(self.limit)) and self.blocked_until <= time.monotonic():
+                    self.in_flight += 1
+                    return
+                await self._cond.wait()
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now (used for hedged requests)."""
+        if self.in_flight < max(1, int(self.limit)) and self.blocked_until <= time.monotonic():
+            self.in_flight += 1
+            return True
+        return False
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        # At most one decrease per smoothed round-trip, so one burst of 429s halves once.
+        if now - self._last_decrease < max(self.latency_ewma or 0.0, 0.5):
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+
+    async def record(self, status_code: Optional[int], latency: float, retry_after: Optional[float] = None) -> None:
+        """Feed one response (status_code=None for a transport error) into the controller."""
+        if status_code is None:
+            self._decrease(_DECREASE_FACTOR)
+            return
+        if status_code in THROTTLE_STATUSES:
+            self.throttled += 1
+            self._decrease(_DECREASE_FACTOR)
+            pause = min(retry_after or _DEFAULT_THROTTLE_PAUSE_SEC, CONFIG.fetch.max_retry_after_sec)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            return
+
+        self.latency_ewma = latency if self.latency_ewma is None else (
+            _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * self.latency_ewma
+        )
+        if self.baseline_latency is None or self.latency_ewma < self.baseline_latency:
+            self.baseline_latency = self.latency_ewma
+
+        rising = (
+            self.latency_ewma > self.baseline_latency * _LATENCY_FACTOR
+            and self.latency_ewma - self.baseline_latency > _LATENCY_SLACK_SEC
+        )
+        if rising:
+            self._decrease(_LATENCY_DECREASE_FACTOR)
+            return
+
+        # Additive increase: roughly +1 per window of `limit` healthy responses.
+        before = int(self.limit)
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+        if int(self.limit) > before:
+            async with self._cond:
+                self._cond.notify_all()
+
+    def state(self) -> dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "baseline_latency": self.baseline_latency,
+            "updated_at": time.time(),
+        }
+
+
+# Limiters per event loop (asyncio primitives are loop-bound), then per host.
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, HostLimiter]]" = weakref.WeakKeyDictionary()
+_persisted: Optional[dict[str, dict[str, Any]]] = None
+
+
+def _load_persisted() -> dict[str, dict[str, Any]]:
+    global _persisted
+    if _persisted is None:
+        try:
+            _persisted = json.loads(CONFIG.paths.host_limits.read_text(encoding="utf-8"))
+        except Exception:
+            _persisted = {}
+    return _persisted
+
+
+def get_host_limiter(host: str) -> HostLimiter:
+    per_host = _limiters.setdefault(asyncio.get_running_loop(), {})
+    limiter = per_host.get(host)
+    if limiter is None:
+        conc = CONFIG.fetch.concurrency
+        saved = _load_persisted().get(host) or {}
+        fresh = time.time() - saved.get("updated_at", 0) < _STATE_TTL_SEC
+        limiter = HostLimiter(
+            host,
+            limit=saved.get("limit", conc.initial) if fresh else conc.initial,
+            min_limit=conc.min,
+            max_limit=conc.max,
+            baseline_latency=saved.get("baseline_latency") if fresh else None,
+        )
+        per_host[host] = limiter
+    return limiter
+
+
+def save_host_limits(hosts: set[str]) -> None:
+    """Persist the learned limits of the given hosts (read-modify-write, atomic replace)."""
+    ensure_dirs()
+    per_host = _limiters.get(asyncio.get_running_loop(), {})
+    try:
+        state = json.loads(CONFIG.paths.host_limits.read_text(encoding="utf-8"))
+    except Exception:
+        state = {}
+    for host in hosts:
+        if host in per_host:
+            state[host] = per_host[host].state()
+    _load_persisted().update(state)
+
+    tmp_file = CONFIG.paths.host_limits.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+    tmp_file.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp_file, CONFIG.paths.host_limits)
@@ -0,0 +1,66 @@
+"""
+Pass/warn/fail rules of the per-page heuristics (checks 4, 5, 7 and 9),
+evaluated for all pages of a site in one pass over its FeatureMatrix
+(see pipeline.feature_matrix).
+
+Each rule returns one small integer per matrix row naming the branch of the
+rule the page falls in; the analysers turn the branch into a status and
+wording while building the page's result.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pipeline.feature_matrix import FeatureMatrix
+
+
+# Text length (normalized characters) below which a page is thin, and above which it can be verifiable.
+THIN_TEXT = 200
+VERIFIABLE_TEXT = 400
+# Hidden-link pattern hits and outbound links that flag a page, and the levels that make it strong.
+STRONG_HIDDEN_HITS = 5
+LINK_FARM_OUTBOUND = 200
+STRONG_LINK_FARM_OUTBOUND = 500
+
+# Branches of checks 5 and 7, in the order they are tried.
+FACTUAL_PASS, FACTUAL_UNRENDERED, FACTUAL_THIN, FACTUAL_INCOMPLETE = range(4)
+# Verdicts of check 9.
+AI_SPAM_PASS, AI_SPAM_WARN, AI_SPAM_FAIL = range(3)
+
+
+def factual_accuracy(m: "FeatureMatrix") -> np.ndarray:
+    """Checks 5 and 7: author, date, outbound citations and enough text; else shell, thin or incomplete."""
+    text = m["text_length"]
+    verifiable = (m["dates"] > 0) & (m["author"] > 0) & (m["outbound_links"] > 0) & (text > VERIFIABLE_TEXT)
+    return np.select(
+        [verifiable, m["unrendered_shell"] > 0, text < THIN_TEXT],
+        [FACTUAL_PASS, FACTUAL_UNRENDERED, FACTUAL_THIN],
+        FACTUAL_INCOMPLETE,
+    ).astype(np.int8)
+
+
+def ai_spam(m: "FeatureMatrix", duplicate: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Check 9: (verdict, thin) per row. Any low-quality signal warns; thin content
+    together with a duplicate cluster, hidden links or spam keywords fails.
+    An unrendered JS shell is short on text because its content never loaded,
+    so it doesn't count as thin.
+    """
+    thin = (m["text_length"] < THIN_TEXT) & (m["unrendered_shell"] == 0)
+    signals = duplicate | (m["hidden_pattern_hits"] > STRONG_HIDDEN_HITS) | (m["spam_keywords"] > 0)
+    flagged = signals | thin | (m["stuffing_suspect"] > 0)
+    verdict = np.where(flagged, np.where(thin & signals, AI_SPAM_FAIL, AI_SPAM_WARN), AI_SPAM_PASS)
+    return verdict.astype(np.int8), thin
+
+
+def spam_flags(m: "FeatureMatrix") -> Tuple[np.ndarray, np.ndarray]:
+    """Check 4: (flagged, strong) masks of fetched pages with hidden links, link-farm outbound counts or spam keywords."""
+    hidden = m["hidden_pattern_hits"]
+    outbound = m["outbound_links"]
+    spam = m["spam_keywords"] > 0
+    flagged = (m["fetched"] > 0) & ((hidden > 0) | (outbound > LINK_FARM_OUTBOUND) | spam)
+    strong = flagged & ((hidden > STRONG_HIDDEN_HITS) | (outbound > STRONG_LINK_FARM_OUTBOUND) | spam)
+    return flagged, strong
@@ -0,0 +1,148 @@
+"""
+Selective JavaScript rendering for client-rendered pages.
+
+Pages are fetched with plain HTTP. A client-rendered page then parses to almost
+no text and would be scored as thin content. `js_shell_reason` flags such pages
+from what the parser already collects. Only the flagged pages go through
+PageRenderer, a small pool of reused Playwright contexts that block images,
+fonts and media. Rendering cost therefore grows with the number of JS-shell
+pages, not with the size of the scan.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from infra.metrics import BROWSER_CONTEXTS, RENDER_DURATION, RENDERS
+from .common import DEFAULT_UA
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Route
+    from pipeline.views import PageFeatures
+    from .archive import FetchArchive
+
+
+def js_shell_reason(
+    scripts: Dict[str, Any], html_length: int, text_length: int, min_text_chars: int, script_share: float
+) -> Optional[str]:
+    """
+    Why a page looks like a JS shell, or None. Needs little visible text plus
+    one of: a framework mount point, inline script making up script_share of
+    the HTML, or external scripts next to a <noscript> fallback.
+    """
+    if text_length >= min_text_chars:
+        return None
+    if scripts.get("spa_root"):
+        return "spa_root"
+    if html_length and scripts.get("inline_chars", 0) >= script_share * html_length:
+        return "script_payload"
+    if scripts.get("external") and scripts.get("noscript"):
+        return "noscript"
+    return None
+
+
+def render_evidence(f: "PageFeatures") -> Dict[str, Any]:
+    """Evidence entry for a JS-shell page (empty for ordinary pages)."""
+    return {"rendering": {"js_shell": f.js_shell, "rendered": f.rendered}} if f.js_shell is not None else {}
+
+
+class RenderFailed(Exception):
+    pass
+
+
+class PageRenderer:
+    """
+    Renders pages in up to `contexts` reused browser contexts. Contexts are
+    created on first use, so a scan with no JS-shell pages opens none. At most
+    `max_pages` pages are rendered per scan; later calls return None.
+    """
+
+    def __init__(
+        self,
+        browser: "Browser",
+        contexts: int = 2,
+        max_pages: int = 50,
+        timeout_sec: float = 15.0,
+        blocked_resources: Iterable[str] = ("image", "font", "media"),
+        user_agent: str = DEFAULT_UA,
+        archive: Optional["FetchArchive"] = None,
+    ):
+        self.browser = browser
+        # Rendered pages are recorded too when the scan is being recorded.
+        self.archive = archive
+        self.max_contexts = max(1, contexts)
+        self.max_pages = max_pages
+        self.timeout_sec = timeout_sec
+        self.blocked_resources = frozenset(blocked_resources)
+        self.user_agent = user_agent
+        self.rendered = 0
+        self.failed = 0
+        self._started = 0
+        self._opened = 0
+        self._contexts: List["BrowserContext"] = []
+        self._idle: asyncio.Queue["BrowserContext"] = asyncio.Queue()
+
+    async def _block(self, route: "Route") -> None:
+        if route.request.resource_type in self.blocked_resources:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _acquire(self) -> "BrowserContext":
+        if self._idle.empty() and self._opened < self.max_contexts:
+            # Counted before awaiting so concurrent callers don't overshoot the pool size.
+            self._opened += 1
+            try:
+                context = await self.browser.new_context(user_agent=self.user_agent, viewport={"width": 1280, "height": 720})
+            except BaseException:
+                self._opened -= 1
+                raise
+            BROWSER_CONTEXTS.inc()
+            self._contexts.append(context)
+            await context.route("**/*", self._block)
+            return context
+        return await self._idle.get()
+
+    async def render(self, url: str, timeout_sec: Optional[float] = None) -> Optional[str]:
+        """Rendered HTML of url; None once max_pages is used up. Raises RenderFailed."""
+        if self._started >= self.max_pages:
+            return None
+        self._started += 1
+        timeout_ms = max(1000, min(self.timeout_sec, timeout_sec if timeout_sec is not None else self.timeout_sec) * 1000)
+        context = await self._acquire()
+        started = time.perf_counter()
+        page = None
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until="load", timeout=timeout_ms)
+            # Client-side data fetches usually settle shortly after load; don't fail on chatty pages.
+            with suppress(Exception):
+                await page.wait_for_load_state("networkidle", timeout=min(timeout_ms, 5000))
+            html = await page.content()
+        except Exception as e:
+            self.failed += 1
+            RENDERS.labels(outcome="failed").inc()
+            raise RenderFailed(str(e) or type(e).__name__) from e
+        finally:
+            if page is not None:
+                with suppress(Exception):
+                    await page.close()
+            self._idle.put_nowait(context)
+        self.rendered += 1
+        if self.archive is not None:
+            self.archive.record_render(url, html)
+        RENDERS.labels(outcome="rendered").inc()
+        RENDER_DURATION.observe(time.perf_counter() - started)
+        return html
+
+    def usage(self) -> Dict[str, int]:
+        return {"rendered": self.rendered, "failed": self.failed, "contexts": len(self._contexts)}
+
+    async def close(self) -> None:
+        for context in self._contexts:
+            with suppress(Exception):
+                await context.close()
+            BROWSER_CONTEXTS.dec()
+        self._contexts.clear()
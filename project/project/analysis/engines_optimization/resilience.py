@@ -0,0 +1,140 @@
+"""
+Fetch resilience primitives: jittered retry back-off, per-host latency
+percentiles for hedged requests, and per-host circuit breakers.
+
+State is per process and per host, so concurrent scans of the same origin
+share what they learn (a dead origin trips the breaker once for everyone);
+only the fetch.tracked_hosts most recently fetched hosts are kept.
+"""
+from __future__ import annotations
+
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+import httpx
+
+from infra.files import CONFIG
+
+
+# Gateway errors are usually transient; other 5xx are treated as page-specific answers.
+RETRY_STATUSES = {502, 504}
+
+
+class FetchFailed(Exception):
+    """A fetch that failed after the resilience layer gave up; carries the decision trace."""
+
+    def __init__(self, message: str, trace: tuple[dict[str, Any], ...] = ()):
+        super().__init__(message)
+        self.trace = trace
+
+
+class CircuitOpenError(FetchFailed):
+    """The host's circuit breaker is open; the request was not sent."""
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(retry: int) -> float:
+    """Full-jitter exponential back-off for the n-th retry (0-based)."""
+    policy = CONFIG.fetch.retry
+    return random.uniform(0, min(policy.backoff_max_sec, policy.backoff_base_sec * (2 ** retry)))
+
+
+class LatencyTracker:
+    """Rolling window of response latencies for one host."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which a duplicate request is sent, or None (too few samples / disabled)."""
+        hedging = CONFIG.fetch.hedging
+        if not hedging.enabled or len(self.samples) < hedging.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(len(ordered) * hedging.percentile / 100))
+        return max(hedging.min_delay_sec, ordered[idx])
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open rejects
+    requests for `cooldown_sec`, then half-open lets a single probe through.
+    A successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown_sec: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_sec = cooldown_sec
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown_sec:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+_latency: "OrderedDict[str, LatencyTracker]" = OrderedDict()
+_breakers: "OrderedDict[str, CircuitBreaker]" = OrderedDict()
+
+
+def _remember(per_host: OrderedDict, host: str, state: Any) -> None:
+    per_host[host] = state
+    while len(per_host) > CONFIG.fetch.tracked_hosts:
+        per_host.popitem(last=False)
+
+
+def get_latency_tracker(host: str) -> LatencyTracker:
+    tracker = _latency.get(host)
+    if tracker is None:
+        tracker = LatencyTracker()
+        _remember(_latency, host, tracker)
+    else:
+        _latency.move_to_end(host)
+    return tracker
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        cb = CONFIG.fetch.circuit_breaker
+        breaker = CircuitBreaker(cb.failure_threshold, cb.cooldown_sec)
+        _remember(_breakers, host, breaker)
+    else:
+        _breakers.move_to_end(host)
+    return breaker
+
+
+def fetch_evidence(trace: tuple[dict[str, Any], ...]) -> dict[str, Any]:
+    """Evidence entry for a fetch's resilience decisions (empty when nothing notable happened)."""
+    return {"fetch": list(trace)} if trace else {}
@@ -11,7 +11,7 @@ class EOCheckResult(BaseModel):
     check_item: str
     what_to_verify: str
     impact: str  # "Critical" | "High" | "Medium" | "Low"
-    status: str  # "pass" | "fail" | "warn"
+    status: str  # "pass" | "fail" | "warn" | "not_evaluated"
     details: str
     evidence: Dict[str, Any] = Field(default_factory=dict)
 
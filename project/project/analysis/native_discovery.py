@@ -0,0 +1,250 @@
+"""
+Pure-Python page discovery (robots.txt + sitemaps + same-origin link BFS).
+
+A lightweight alternative to Unlighthouse for scans that only need the list of
+pages: no Node process, no Chromium and no Lighthouse audits.
+"""
+import asyncio
+import zlib
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import XMLPullParser
+
+import httpx
+
+from analysis.engines_optimization.common import DEFAULT_UA, extract_from_html
+from analysis.unlighthouse_routes import _stable_page_id_from_url
+
+
+ROBOTS_UA = "site360"
+
+# File extensions that are never HTML pages; skipped without a request.
+_SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".bmp",
+    ".css", ".js", ".mjs", ".json", ".xml", ".txt", ".pdf", ".zip", ".gz",
+    ".mp3", ".mp4", ".webm", ".avi", ".mov", ".woff", ".woff2", ".ttf", ".eot",
+)
+
+# Upper bound on HTML read per page during the BFS (links are near the top anyway).
+_MAX_HTML_BYTES = 2 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class NativePage:
+    url: str
+    timestamp: Optional[str]
+    page_id: str
+    page_name: str
+
+
+def _origin(url: str) -> str:
+    u = urlparse(url)
+    return f"{u.scheme}://{u.netloc}"
+
+
+def _normalize_page_url(url: str) -> str:
+    url, _fragment = urldefrag(url.strip())
+    u = urlparse(url)
+    path = u.path or "/"
+    return u._replace(path=path, params="").geturl()
+
+
+def _is_candidate(url: str, origin: str) -> bool:
+    if _origin(url) != origin:
+        return False
+    return not urlparse(url).path.lower().endswith(_SKIP_EXTENSIONS)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+async def fetch_robots(client: httpx.AsyncClient, origin: str, timeout_sec: float) -> tuple[RobotFileParser, list[str]]:
+    """Stream robots.txt line by line; returns the rules and the declared sitemaps."""
+    rules = RobotFileParser()
+    lines: list[str] = []
+    sitemaps: list[str] = []
+    try:
+        async with client.stream("GET", f"{origin}/robots.txt", timeout=timeout_sec, follow_redirects=True) as r:
+            if r.status_code == 200:
+                async for line in r.aiter_lines():
+                    lines.append(line)
+                    key, _, value = line.partition(":")
+                    if key.strip().lower() == "sitemap" and value.strip():
+                        sitemaps.append(value.strip())
+            elif r.status_code in (401, 403):
+                # Same convention as urllib.robotparser: auth-protected robots.txt disallows everything.
+                rules.disallow_all = True
+    except Exception:
+        pass
+    rules.parse(lines)
+    return rules, sitemaps
+
+
+async def iter_sitemap(client: httpx.AsyncClient, sitemap_url: str, timeout_sec: float) -> AsyncIterator[tuple[str, str, Optional[str]]]:
+    """
+    Stream-parse a sitemap or sitemap index.
+
+    Yields ("url", loc, lastmod) for pages and ("sitemap", loc, None) for nested sitemaps.
+    Elements are cleared as soon as they are consumed, so memory stays flat on large sitemaps.
+    """
+    parser = XMLPullParser(events=("end",))
+    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS) if sitemap_url.lower().endswith(".gz") else None
+    loc: Optional[str] = None
+    lastmod: Optional[str] = None
+
+    async with client.stream("GET", sitemap_url, timeout=timeout_sec, follow_redirects=True) as r:
+        if r.status_code != 200:
+            return
+        async for chunk in r.aiter_bytes():
+            parser.feed(gunzip.decompress(chunk) if gunzip else chunk)
+            for _event, elem in parser.read_events():
+                name = _local_name(elem.tag)
+                if name == "loc":
+                    loc = (elem.text or "").strip() or None
+                elif name == "lastmod":
+                    lastmod = (elem.text or "").strip() or None
+                elif name in ("url", "sitemap"):
+                    if loc:
+                        yield ("url" if name == "url" else "sitemap", loc, lastmod if name == "url" else None)
+                    loc, lastmod = None, None
+                    elem.clear()
+
+
+async def _read_html(client: httpx.AsyncClient, url: str, timeout_sec: float) -> tuple[str, str]:
+    """Fetch a page for link extraction; returns (final_url, html) or (url, "") for non-HTML."""
+    async with client.stream(
+        "GET",
+        url,
+        timeout=timeout_sec,
+        follow_redirects=True,
+        headers={"user-agent": DEFAULT_UA, "accept": "text/html,application/xhtml+xml"},
+    ) as r:
+        ctype = r.headers.get("content-type", "")
+        if r.status_code >= 400 or "html" not in ctype.lower():
+            return str(r.url), ""
+        body = bytearray()
+        async for chunk in r.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= _MAX_HTML_BYTES:
+                break
+        return str(r.url), body.decode(r.encoding or "utf-8", errors="replace")
+
+
+async def discover_pages(
+    url: str,
+    max_pages: int = 500,
+    max_depth: int = 3,
+    concurrency: int = 8,
+    timeout_sec: float = 10,
+) -> list[NativePage]:
+    """
+    Discover same-origin pages for a site without Unlighthouse.
+
+    Seeds are the start URL plus every page listed in the sitemaps declared in
+    robots.txt (or /sitemap.xml when none are declared). A bounded-concurrency
+    BFS over internal links then fills the remainder up to max_pages; a linked
+    page is only kept once it loads as HTML, under the URL it resolved to.
+    robots.txt disallow rules are honored throughout.
+    """
+    start = _normalize_page_url(url)
+    found: dict[str, Optional[str]] = {}  # url -> lastmod
+    seen: set[str] = set()
+    queue: asyncio.Queue[tuple[str, int]] = asyncio.Queue()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits) as client:
+        # Follow a host-level redirect (e.g. example.com -> www.example.com) so
+        # "same origin" refers to where the site is actually served.
+        try:
+            r = await client.head(start, timeout=timeout_sec, follow_redirects=True, headers={"user-agent": DEFAULT_UA})
+            start = _normalize_page_url(str(r.url))
+        except Exception:
+            pass
+        origin = _origin(start)
+
+        rules, sitemaps = await fetch_robots(client, origin, timeout_sec)
+
+        def allowed(u: str) -> bool:
+            return rules.can_fetch(ROBOTS_UA, u)
+
+        def enqueue(u: str, depth: int, lastmod: Optional[str] = None, listed: bool = False) -> None:
+            if u in seen or len(seen) >= max_pages:
+                return
+            if not _is_candidate(u, origin) or not allowed(u):
+                return
+            seen.add(u)
+            # Sitemap entries are trusted as listed; links only count once they load.
+            if listed:
+                found[u] = lastmod
+            queue.put_nowait((u, depth))
+
+        enqueue(start, 0)
+
+        # ---- Sitemaps (breadth-first over sitemap indexes) ----
+        pending = list(dict.fromkeys(sitemaps or [f"{origin}/sitemap.xml"]))
+        visited_sitemaps: set[str] = set()
+        while pending and len(seen) < max_pages:
+            sm = pending.pop(0)
+            if sm in visited_sitemaps:
+                continue
+            visited_sitemaps.add(sm)
+            try:
+                async with aclosing(iter_sitemap(client, sm, timeout_sec)) as entries:
+                    async for kind, loc, lastmod in entries:
+                        if kind == "sitemap":
+                            pending.append(loc)
+                        else:
+                            enqueue(_normalize_page_url(loc), 1, lastmod, listed=True)
+                        if len(seen) >= max_pages:
+                            break
+            except Exception:
+                continue
+
+        # ---- Same-origin link BFS ----
+        async def worker():
+            while True:
+                page_url, depth = await queue.get()
+                try:
+                    follow = depth < max_depth and len(seen) < max_pages
+                    if page_url in found and not follow:
+                        continue
+                    final_url, html = await _read_html(client, page_url, timeout_sec)
+                    if not html:
+                        continue
+                    page = _normalize_page_url(final_url)
+                    if page not in found and _is_candidate(page, origin) and allowed(page):
+                        found[page] = None
+                    if not follow:
+                        continue
+                    for href, _text in extract_from_html(html).get("links") or []:
+                        if href and not href.startswith(("mailto:", "tel:", "javascript:")):
+                            enqueue(_normalize_page_url(urljoin(final_url, href)), depth + 1)
+                except Exception:
+                    pass
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        try:
+            await queue.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    pages = [
+        NativePage(
+            url=u,
+            timestamp=lastmod,
+            page_id=_stable_page_id_from_url(u),
+            page_name=urlparse(u).path.strip("/").split("/")[-1] or "home",
+        )
+        for u, lastmod in found.items()
+    ]
+    # Stable ordering for deterministic output (same as collect_page_artifacts)
+    pages.sort(key=lambda p: p.url)
+    return pages
@@ -1,21 +1,28 @@
 import asyncio
 import json
+import math
 import shutil
 import subprocess
 import sys
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 from urllib.parse import urlparse
 
 from infra.files import CONFIG
+from infra.memory import cpu_capacity
+from infra.metrics import EXECUTOR_QUEUE_DEPTH, UNLIGHTHOUSE_DURATION, observe_seconds
+from pipeline.constants import LighthouseAudits
 
 
 unlighthouse_script = CONFIG.paths.project_folder / "scripts/api/unlighthouse_api.js"
 
-# Thread pool for running subprocess
-_executor = ThreadPoolExecutor(max_workers=2)
+# Thread pool for running subprocess (unlighthouse.workers: 0, one node process per scan)
+_EXECUTOR_WORKERS = 2
+_executor = ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS)
+# Runs waiting for an executor thread or a pool worker.
+QUEUE_DEPTH = EXECUTOR_QUEUE_DEPTH.labels(executor="unlighthouse")
 
 
 @dataclass(frozen=True)
@@ -28,40 +35,97 @@ class LighthousePageArtifact:
     accessibility_score: int
 
 
-def _run_unlighthouse_sync(url: str, run_id: str) -> tuple[int, str, str]:
+def concurrent_crawls(cpus: float) -> int:
+    """
+    Crawls that can run on the host at once: no more than the scans admission
+    control lets run, nor than the processes running scans can crawl (each
+    scan worker up to jobs.per_worker on its own pool; the API process its pool
+    or executor threads when jobs.workers is 0).
+    """
+    from infra.admission import get_admission
+    from jobs import worker_count
+
+    from .unlighthouse_worker import pool_size
+
+    crawlers = pool_size() if CONFIG.unlighthouse.workers > 0 else _EXECUTOR_WORKERS
+    processes = worker_count()
+    if processes:
+        crawlers = processes * min(crawlers, CONFIG.jobs.per_worker)
+    return max(1, min(get_admission().slots(cpus), crawlers))
+
+
+def crawl_concurrency() -> int:
+    """
+    Pages one crawl opens at once: `unlighthouse.pages_per_cpu` per CPU the
+    container may use (infra.memory.cpu_capacity), split between the crawls
+    that can run at once (concurrent_crawls), at most `unlighthouse.max_concurrency`.
+    """
+    settings = CONFIG.unlighthouse
+    cpus, _ = cpu_capacity()
+    per_crawl = math.floor(cpus * settings.pages_per_cpu / concurrent_crawls(cpus))
+    return max(1, min(settings.max_concurrency, per_crawl))
+
+
+def _run_unlighthouse_sync(url: str, run_id: str, audits: str, concurrency: int) -> tuple[int, str, str]:
     """
     Synchronous wrapper to run Unlighthouse via subprocess.
     Returns (returncode, stdout, stderr)
     """
+    # Taken off the executor queue.
+    QUEUE_DEPTH.dec()
     proc = subprocess.run(
-        ["node", str(unlighthouse_script), url, run_id],
+        ["node", str(unlighthouse_script), url, run_id, audits, str(concurrency)],
         capture_output=True,
         text=True,
     )
     return proc.returncode, proc.stdout, proc.stderr
 
 
-async def run_unlighthouse(url: str, run_id: str) -> tuple[str, Path]:
+async def run_unlighthouse(
+    url: str,
+    run_id: str,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    audits: LighthouseAudits = LighthouseAudits.ACCESSIBILITY,
+) -> tuple[str, Path]:
     """
     Run Unlighthouse for a site and write artifacts into an isolated per-run folder.
 
+    audits limits Lighthouse to the categories collect_page_artifacts reads
+    (ACCESSIBILITY), runs all of them (FULL), or skips Lighthouse and only crawls
+    (NONE: each route still gets a lighthouse.json, with its URL and fetch time
+    but no categories). The crawl opens crawl_concurrency() pages at once.
+
+    The crawl runs on a long-lived worker (see analysis.unlighthouse_worker);
+    on_progress receives its progress messages ({"done", "total", "path"}) and
+    finally its "done" message ({"routes", "seconds", "warm"}). With
+    `unlighthouse.workers: 0` a node process is spawned for the scan instead,
+    with no progress.
+
     Returns:
       (domain, domain_path)
         - domain: netloc from the URL
         - domain_path: folder containing Unlighthouse output for this domain
     """
-    loop = asyncio.get_event_loop()
-    
-    # Run subprocess in thread pool to avoid Windows async subprocess issues
-    returncode, stdout, stderr = await loop.run_in_executor(
-        _executor,
-        _run_unlighthouse_sync,
-        url,
-        run_id
-    )
-
-    if returncode != 0:
-        raise RuntimeError(f"Unlighthouse failed: {stderr}")
+    with observe_seconds(UNLIGHTHOUSE_DURATION):
+        if CONFIG.unlighthouse.workers > 0:
+            from .unlighthouse_worker import get_pool
+
+            done = await get_pool().run(url, run_id, audits.value, crawl_concurrency(), on_progress)
+            if on_progress is not None:
+                on_progress(done)
+        else:
+            # Run subprocess in thread pool to avoid Windows async subprocess issues
+            QUEUE_DEPTH.inc()
+            future = _executor.submit(_run_unlighthouse_sync, url, run_id, audits.value, crawl_concurrency())
+            try:
+                returncode, stdout, stderr = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # Never started: it leaves the queue here instead.
+                if future.cancel():
+                    QUEUE_DEPTH.dec()
+                raise
+            if returncode != 0:
+                raise RuntimeError(f"Unlighthouse failed: {stderr}")
 
     domain = urlparse(url).netloc
     domain_path = CONFIG.paths.unlighthouse_reports / run_id / domain
@@ -0,0 +1,353 @@
+"""
+Pool of long-lived Unlighthouse workers (scripts/api/unlighthouse_worker.js).
+
+Each worker is one `node` process that keeps the Unlighthouse modules loaded
+and Chrome running between crawls, so a scan's discovery starts crawling at
+once instead of paying for node start-up and a Chrome launch. Workers take one
+crawl at a time over stdin/stdout (JSON lines; see the script for the
+protocol) and stream progress while it runs.
+
+A crawl fails when its worker goes `unlighthouse.idle_timeout_sec` without
+reporting progress (the worker is killed) or exits mid-crawl. Workers that
+exit are restarted in the background, after a back-off when they keep
+crashing, and each is recycled after `unlighthouse.recycle_after` crawls.
+Workers left unused for `unlighthouse.keep_warm_sec` are stopped (closing
+their Chrome) and started again by the next crawl that needs them. A scan
+worker process sizes its pool to the scans it runs at once (see set_pool_size).
+Processes are driven from threads (as the per-scan runner was) rather than
+asyncio subprocesses, which not every Windows event loop supports.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from infra.files import CONFIG
+from infra.metrics import UNLIGHTHOUSE_WORKER_RESTARTS
+
+worker_script = CONFIG.paths.project_folder / "scripts/api/unlighthouse_worker.js"
+
+_MARK = "@@unlh "
+# Output lines kept for the error message when a worker fails.
+_LOG_TAIL = 40
+_STOP_TIMEOUT_SEC = 10.0
+# A worker that exits sooner than this after starting is restarted with back-off.
+_MIN_UPTIME_SEC = 30.0
+_MAX_RESTART_DELAY_SEC = 60.0
+
+Progress = Callable[[Dict[str, Any]], None]
+
+
+class UnlighthouseWorker:
+    def __init__(self, name: str, script: Path = worker_script):
+        self.name = name
+        self.script = script
+        self.proc: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.crawls = 0
+        self.last_used = 0.0
+        # Stopped for being idle (not crashed): not restarted until a crawl needs it.
+        self.parked = False
+        self.restart_delay = 1.0
+        self.lock = asyncio.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Future] = None
+        # (job id, result future, progress callback) of the crawl in progress.
+        self._job: Optional[tuple[str, asyncio.Future, Optional[Progress]]] = None
+        self._last_message = 0.0
+        self._log: Deque[str] = deque(maxlen=_LOG_TAIL)
+        self.on_exit: Optional[Callable[["UnlighthouseWorker"], None]] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    # ----- process -----
+
+    async def start(self, timeout_sec: float) -> None:
+        """Start node and wait for its "ready" (Chrome launched)."""
+        self._loop = asyncio.get_running_loop()
+        self._ready = self._loop.create_future()
+        self._log.clear()
+        proc = await asyncio.to_thread(
+            subprocess.Popen,
+            ["node", str(self.script)],
+            cwd=str(self.script.parent.parent),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self.proc = proc
+        self.started_at = time.monotonic()
+        self.crawls = 0
+        threading.Thread(target=self._read_stdout, args=(proc,), name=f"{self.name}-stdout", daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(proc,), name=f"{self.name}-stderr", daemon=True).start()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout_sec)
+        except asyncio.TimeoutError:
+            self.kill()
+            raise RuntimeError(f"Unlighthouse worker {self.name} not ready after {timeout_sec:g}s: {self._tail()}")
+
+    def kill(self) -> None:
+        if self.alive:
+            self.proc.kill()
+
+    def stop(self) -> None:
+        """Close stdin (the worker finishes, closes Chrome and exits); kill it if it doesn't. Blocking."""
+        proc = self.proc
+        if proc is None or proc.poll() is not None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(_STOP_TIMEOUT_SEC)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def _tail(self) -> str:
+        return "\n".join(self._log)
+
+    def _call(self, fn: Callable, *args: Any) -> None:
+        try:
+            self._loop.call_soon_threadsafe(fn, *args)
+        except RuntimeError:
+            # Event loop closed (process shutting down).
+            pass
+
+    def _read_stdout(self, proc: subprocess.Popen) -> None:
+        for line in proc.stdout:
+            if not line.startswith(_MARK):
+                self._log.append(line.rstrip())
+                continue
+            try:
+                message = json.loads(line[len(_MARK):])
+            except ValueError:
+                continue
+            self._call(self._dispatch, message)
+        proc.wait()
+        self._call(self._exited, proc)
+
+    def _read_stderr(self, proc: subprocess.Popen) -> None:
+        # Drained so a chatty worker can't block on a full pipe.
+        for line in proc.stderr:
+            self._log.append(line.rstrip())
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        self._last_message = time.monotonic()
+        kind = message.get("type")
+        if kind == "ready":
+            if not self._ready.done():
+                self._ready.set_result(message)
+            return
+        if self._job is None or message.get("id") != self._job[0]:
+            return
+        _, future, on_progress = self._job
+        if kind == "progress" and on_progress is not None:
+            try:
+                on_progress(message)
+            except Exception:
+                pass
+        elif kind == "done" and not future.done():
+            future.set_result(message)
+        elif kind == "error" and not future.done():
+            future.set_exception(RuntimeError(f"Unlighthouse failed: {message.get('message')}"))
+
+    def _exited(self, proc: subprocess.Popen) -> None:
+        if proc is not self.proc:
+            return
+        error = RuntimeError(f"Unlighthouse worker {self.name} exited with {proc.returncode}: {self._tail()}")
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_exception(error)
+            # Nobody may be waiting on it any more.
+            self._ready.exception()
+        if self._job is not None and not self._job[1].done():
+            self._job[1].set_exception(error)
+        if self.on_exit is not None:
+            self.on_exit(self)
+
+    # ----- crawls -----
+
+    def _send(self, line: str) -> None:
+        try:
+            self.proc.stdin.write(line)
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise RuntimeError(f"Unlighthouse worker {self.name} is not accepting jobs: {e}")
+
+    async def crawl(self, job: Dict[str, Any], idle_timeout_sec: float, on_progress: Optional[Progress] = None) -> Dict[str, Any]:
+        """Run one crawl ({"url", "run_id", "audits", "concurrency"}); returns the worker's "done" message (routes, seconds, warm)."""
+        job_id = uuid.uuid4().hex
+        future = self._loop.create_future()
+        self._job = (job_id, future, on_progress)
+        self._last_message = time.monotonic()
+        url = job["url"]
+        try:
+            await asyncio.to_thread(self._send, json.dumps({"id": job_id, **job}) + "\n")
+            while True:
+                idle = time.monotonic() - self._last_message
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), max(0.0, idle_timeout_sec - idle))
+                except asyncio.TimeoutError:
+                    if time.monotonic() - self._last_message >= idle_timeout_sec:
+                        self.kill()
+                        raise RuntimeError(f"Unlighthouse crawl of {url} made no progress for {idle_timeout_sec:g}s")
+        finally:
+            self._job = None
+            self.crawls += 1
+            if not future.done():
+                future.cancel()
+
+
+class UnlighthousePool:
+    def __init__(
+        self, size: int, startup_timeout_sec: float, idle_timeout_sec: float, recycle_after: int, keep_warm_sec: float
+    ):
+        self.startup_timeout_sec = startup_timeout_sec
+        self.idle_timeout_sec = idle_timeout_sec
+        self.recycle_after = recycle_after
+        self.keep_warm_sec = keep_warm_sec
+        self.workers: List[UnlighthouseWorker] = [UnlighthouseWorker(f"unlighthouse-{i}") for i in range(max(1, size))]
+        self._idle: asyncio.Queue[UnlighthouseWorker] = asyncio.Queue()
+        for worker in self.workers:
+            worker.on_exit = self._on_exit
+            self._idle.put_nowait(worker)
+        self._stopping = False
+        self._restarts: set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def _ensure_started(self, worker: UnlighthouseWorker) -> None:
+        async with worker.lock:
+            if worker.alive and worker.crawls < self.recycle_after:
+                return
+            if worker.proc is not None:
+                reason = "recycled" if worker.alive else "exited"
+                await asyncio.to_thread(worker.stop)
+                UNLIGHTHOUSE_WORKER_RESTARTS.labels(reason=reason).inc()
+            worker.parked = False
+            await worker.start(self.startup_timeout_sec)
+
+    def _on_exit(self, worker: UnlighthouseWorker) -> None:
+        """Restart a worker that exited, so Chrome is warm again before the next crawl needs it."""
+        if self._stopping or worker.parked:
+            return
+        uptime = time.monotonic() - worker.started_at
+        worker.restart_delay = min(worker.restart_delay * 2, _MAX_RESTART_DELAY_SEC) if uptime < _MIN_UPTIME_SEC else 1.0
+
+        async def restart() -> None:
+            await asyncio.sleep(worker.restart_delay)
+            if self._stopping or worker.alive:
+                return
+            try:
+                await self._ensure_started(worker)
+            except Exception as e:
+                # Tried again when the next crawl takes this worker.
+                print(f"[{worker.name}] restart failed: {e}")
+
+        task = asyncio.ensure_future(restart())
+        self._restarts.add(task)
+        task.add_done_callback(self._restarts.discard)
+
+    async def run(
+        self, url: str, run_id: str, audits: str, concurrency: int, on_progress: Optional[Progress] = None
+    ) -> Dict[str, Any]:
+        """Crawl url on the next free worker (started or recycled first when needed)."""
+        job = {"url": url, "run_id": run_id, "audits": audits, "concurrency": concurrency}
+        from .unlighthouse_routes import QUEUE_DEPTH
+
+        if self._reaper is None and self.keep_warm_sec > 0:
+            self._reaper = asyncio.ensure_future(self._reap())
+        QUEUE_DEPTH.inc()
+        try:
+            worker = await self._idle.get()
+        finally:
+            QUEUE_DEPTH.dec()
+        try:
+            await self._ensure_started(worker)
+            return await worker.crawl(job, self.idle_timeout_sec, on_progress)
+        finally:
+            worker.last_used = time.monotonic()
+            self._idle.put_nowait(worker)
+
+    async def _reap(self) -> None:
+        """Stop workers idle for keep_warm_sec, so unused pools don't hold Chrome."""
+        while not self._stopping:
+            await asyncio.sleep(self.keep_warm_sec / 4)
+            cutoff = time.monotonic() - self.keep_warm_sec
+            for worker in self.workers:
+                if worker.lock.locked() or worker._job is not None or not worker.alive or worker.last_used > cutoff:
+                    continue
+                async with worker.lock:
+                    if worker._job is not None or worker.last_used > cutoff:
+                        continue
+                    worker.parked = True
+                    await asyncio.to_thread(worker.stop)
+                    worker.proc = None
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for task in self._restarts:
+            task.cancel()
+        await asyncio.gather(*(asyncio.to_thread(w.stop) for w in self.workers))
+
+
+_pool: Optional[UnlighthousePool] = None
+_max_size: Optional[int] = None
+
+
+def set_pool_size(scans: int) -> None:
+    """
+    Cap this process's pool at the scans it runs at once (called by scan workers
+    with jobs.per_worker): every scan-worker process has its own pool, and
+    workers it can't use would only hold Chrome.
+    """
+    global _max_size
+    _max_size = max(1, scans)
+
+
+def pool_size() -> int:
+    size = CONFIG.unlighthouse.workers
+    return min(size, _max_size) if _max_size is not None else size
+
+
+def get_pool() -> UnlighthousePool:
+    """The process's worker pool, created on the first Unlighthouse discovery (workers start on first use)."""
+    global _pool
+    if _pool is None:
+        settings = CONFIG.unlighthouse
+        _pool = UnlighthousePool(
+            size=pool_size(),
+            startup_timeout_sec=settings.startup_timeout_sec,
+            idle_timeout_sec=settings.idle_timeout_sec,
+            recycle_after=settings.recycle_after,
+            keep_warm_sec=settings.keep_warm_sec,
+        )
+        atexit.register(_kill_workers)
+    return _pool
+
+
+async def shutdown_pool() -> None:
+    """Stop the workers (API or scan-worker shutdown); a no-op when none were started."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.stop()
+
+
+def _kill_workers() -> None:
+    # Backstop for exits without shutdown_pool; the workers also exit when their stdin closes.
+    if _pool is not None:
+        for worker in _pool.workers:
+            worker.kill()
@@ -1,27 +1,99 @@
 # ===== COMMON METRICS MODEL ===== #
 from __future__ import annotations
 
-from playwright.async_api import Page, BrowserContext, CDPSession
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Optional
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import time
 from pydantic import BaseModel
 from .constants import ANALYSERS
 
 if TYPE_CHECKING:
-    from pipeline.views import PreContext
+    from playwright.async_api import Page, BrowserContext, CDPSession
+    from pipeline.views import PreContext, DiscoveredPage, SiteIndex
+    from analysis.engines_optimization.fetcher import PageFetcher
 
 
 class BaseAnalyser(ABC):
     name: ANALYSERS
     
-    def __init__(self, url: str, page: Page, pre_context: "PreContext", context: Optional[BrowserContext] = None, cdp_session: Optional[CDPSession] = None):
+    def __init__(self, url: str, page: Page, pre_context: "PreContext", context: Optional[BrowserContext] = None, cdp_session: Optional[CDPSession] = None, fetcher: Optional["PageFetcher"] = None):
         self.url = url
         self.page = page
         self.context = context
         self.cdp_session = cdp_session
         self.pre_context = pre_context
+        self.fetcher = fetcher
 
         self.need_cdp: bool = False
+        # Page records finished so far; kept by the pipeline if the scan is cut short.
+        self.partial_results: List[Dict[str, Any]] = []
+        # Wall-clock seconds per page evaluated through gather_pages (benchmarks read these).
+        self.page_seconds: List[float] = []
+
+    @asynccontextmanager
+    async def fetch_session(self) -> AsyncIterator["PageFetcher"]:
+        """Yield the scan's shared fetcher, or a private unbudgeted one when run standalone."""
+        if self.fetcher is not None:
+            yield self.fetcher
+            return
+        from analysis.engines_optimization.fetcher import PageFetcher
+
+        async with PageFetcher() as fetcher:
+            yield fetcher
+
+    def enabled(self, check_id: int) -> bool:
+        """Whether check_id was selected for this scan (see analysis.checks)."""
+        return self.pre_context.checks is None or check_id in self.pre_context.checks
+
+    async def site_index(self) -> "SiteIndex":
+        """The scan's shared SiteIndex; built here (and kept on pre_context) when the analyser runs standalone."""
+        if self.pre_context.site_index is None:
+            from pipeline.site_index import build_site_index
+
+            async with self.fetch_session() as fetcher:
+                self.pre_context.site_index = await build_site_index(self.url, self.pre_context, fetcher)
+        return self.pre_context.site_index
+
+    async def gather_pages(
+        self,
+        pages: Iterable["DiscoveredPage"],
+        evaluate: Callable[["DiscoveredPage"], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> List[Dict[str, Any]]:
+        """Evaluate pages concurrently, recording each finished record in partial_results as it completes."""
+        async def run_one(p: "DiscoveredPage") -> Optional[Dict[str, Any]]:
+            started = time.perf_counter()
+            record = await evaluate(p)
+            if record is not None:
+                self.page_seconds.append(time.perf_counter() - started)
+                self.partial_results.append(record)
+            return record
+
+        scanned = await asyncio.gather(*(run_one(p) for p in pages))
+        return [r for r in scanned if r is not None]
+
+    def pending_pages(self) -> List["DiscoveredPage"]:
+        """Pages this analyser is expected to report on; unreported ones are marked not evaluated."""
+        return list(self.pre_context.scan_targets)
+
+    def not_evaluated(self, page: "DiscoveredPage", reason: str) -> Dict[str, Any]:
+        """Record for a page left unreported: one not_evaluated result per enabled check, so CheckTable counts them."""
+        from analysis.checks import selected_checks
+
+        return {
+            "page_id": page.page_id,
+            "page_name": page.page_name,
+            "url": page.url,
+            "timestamp": page.timestamp,
+            "status": "not_evaluated",
+            "details": reason,
+            "checks": [
+                c.result("not_evaluated", reason).model_dump(mode="json")
+                for c in selected_checks(self.pre_context.checks)
+                if c.analyser == self.name
+            ],
+        }
 
     @abstractmethod
     async def scan(self) -> list:
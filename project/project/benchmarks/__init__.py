@@ -0,0 +1 @@
+# Benchmarks - end-to-end scans against local stand-in servers
@@ -0,0 +1,130 @@
+"""
+AI verdict benchmark: one request per page vs token-budget batches.
+
+    python -m benchmarks.ai_batching [--pages 60] [--update-baseline] [--tolerance 0.25]
+
+Synthetic pages (about one in ten above ai.batch.max_page_tokens) are judged
+against the OpenAI stand-in twice with the response cache off: once with
+batches of one page, once with the ai.batch settings. Reported per mode:
+requests, prompt characters, wall seconds and pages/sec, plus the speedup.
+Results are compared with the "ai_batching" entry of baselines.json.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any
+
+from .run import BASELINES, compare
+from .servers import serve
+
+
+# metric -> True when higher is better
+_COMPARED = {"batched_pages_per_sec": True, "batched_requests": False, "speedup": True}
+_WORDS = "search answer engine content page schema author source evidence product service guide".split()
+
+
+def _pages(count: int, max_page_tokens: int, seed: int = 1) -> list:
+    from ai import PageText
+
+    rng = random.Random(seed)
+    pages = []
+    for n in range(count):
+        # Words are ~6 characters with the space, tokens ~4 characters.
+        tokens = max_page_tokens * 2 if n % 10 == 9 else rng.randint(150, 600)
+        words = " ".join(rng.choice(_WORDS) for _ in range(tokens * 4 // 6))
+        pages.append(PageText(page_id=str(n), text=f"Page {n}. {words}", url=f"https://example.test/p/{n}"))
+    return pages
+
+
+async def _run(endpoint: str, pages: list, max_pages: int) -> dict[str, Any]:
+    import httpx
+
+    from ai import AIAnalysisService, BatchScheduler
+    from infra.files import CONFIG
+
+    settings = CONFIG.ai
+    service = AIAnalysisService(
+        endpoint=endpoint,
+        api_key="benchmark",
+        deployment="stub",
+        concurrency=settings.concurrency,
+        max_input_tokens=settings.max_input_tokens,
+        max_output_tokens=settings.max_output_tokens,
+        temperature=settings.temperature,
+        timeout_sec=settings.timeout_sec,
+        max_retries=settings.max_retries,
+        cache=None,
+    )
+    scheduler = BatchScheduler(
+        service,
+        max_input_tokens=settings.batch.max_input_tokens,
+        max_pages=max_pages,
+        max_page_tokens=settings.batch.max_page_tokens,
+        output_tokens_per_page=settings.batch.output_tokens_per_page,
+    )
+    async with httpx.AsyncClient() as client:
+        before = (await client.get(f"{endpoint}/stats")).json()
+        started = time.perf_counter()
+        verdicts = await scheduler.analyze(pages, "SEO")
+        elapsed = time.perf_counter() - started
+        after = (await client.get(f"{endpoint}/stats")).json()
+    await service.aclose()
+    return {
+        "requests": after["requests"] - before["requests"],
+        "prompt_chars": after["prompt_chars"] - before["prompt_chars"],
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(len(pages) / elapsed, 2),
+        "not_evaluated": sum(v.status == "not_evaluated" for v in verdicts),
+        "batched_pages": sum(v.batched for v in verdicts),
+    }
+
+
+def measure(count: int) -> dict[str, Any]:
+    from infra.files import CONFIG
+
+    pages = _pages(count, CONFIG.ai.batch.max_page_tokens)
+    with serve("openai") as endpoint:
+        per_page = asyncio.run(_run(endpoint, pages, max_pages=1))
+        batched = asyncio.run(_run(endpoint, pages, max_pages=CONFIG.ai.batch.max_pages))
+    return {
+        "scenario": "ai_batching",
+        "pages": count,
+        "per_page": per_page,
+        "batched": batched,
+        "batched_requests": batched["requests"],
+        "batched_pages_per_sec": batched["pages_per_sec"],
+        "speedup": round(per_page["seconds"] / batched["seconds"], 2),
+        "prompt_chars_saved": round(1 - batched["prompt_chars"] / per_page["prompt_chars"], 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=60, help="synthetic pages to judge (default 60)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    args = parser.parse_args()
+
+    report = measure(args.pages)
+    print(json.dumps(report, indent=2))
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {"scenarios": {}}
+    if args.update_baseline:
+        stored["ai_batching"] = report
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    regressions = compare(report, stored["ai_batching"], args.tolerance, _COMPARED) if "ai_batching" in stored else []
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
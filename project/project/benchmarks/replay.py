@@ -0,0 +1,110 @@
+"""
+Record/replay benchmark: scan a synthetic site while recording, then re-score it from the archive.
+
+    python -m benchmarks.replay [--pages 500] [--update-baseline] [--tolerance 0.25]
+
+Only the checks replay runs by default (page fetches, no GSC or Safe Browsing)
+are selected; a few pages are client-rendered, so their rendered HTML is
+recorded and served back by ArchiveRenderer. The site runs only for the recording; the replay
+runs after they are stopped, so it proves no network is needed. Reported:
+recording and replay seconds, the speedup, whether both produced the same
+check outcomes, and the stored bodies and dictionaries (and the SQLite file
+holding them) against the raw bodies and against plain per-body zlib. Results are compared with the "replay"
+entry of baselines.json.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+from .run import BASELINES, _scan, compare
+from .servers import SiteSpec, serve
+
+
+# metric -> True when higher is better
+_COMPARED = {"replay_sec": False, "compression_ratio": True}
+
+
+def measure(pages: int) -> dict[str, Any]:
+    from analysis.engines_optimization.archive import FetchArchive
+    from infra.files import CONFIG
+    from pipeline.replay import REPLAYABLE_CHECKS, rescore
+
+    settings = CONFIG.archive
+    spec = SiteSpec(
+        pages=pages + 100, page_kb=30, latency_ms=20, jitter_ms=10, cloaking_rate=0.05, spam_rate=0.05, spa_rate=0.05
+    )
+    archive = FetchArchive(settings.compression_level, settings.dict_samples, settings.dict_bytes)
+    with serve("site", spec) as site:
+        recorded = asyncio.run(_scan(site, pages, REPLAYABLE_CHECKS, archive, render=True))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "benchmark.sqlite3"
+        t = time.perf_counter()
+        archive.save(path)
+        save_sec = time.perf_counter() - t
+        stats = archive.stats()
+        archive_bytes = path.stat().st_size
+
+        t = time.perf_counter()
+        result = asyncio.run(rescore("benchmark", path=path))
+        replay_sec = time.perf_counter() - t
+
+        replayed = FetchArchive.load(path)
+        plain = sum(len(zlib.compress(replayed._body(h).encode("utf-8"), settings.compression_level)) for h in replayed._bodies)
+
+    return {
+        "scenario": "replay",
+        "scanned_pages": recorded["scanned_pages"],
+        "rendered_pages": recorded["rendered_pages"],
+        "record_sec": recorded["analysis_sec"],
+        "save_sec": round(save_sec, 3),
+        "replay_sec": round(replay_sec, 3),
+        "speedup": round(recorded["analysis_sec"] / replay_sec, 1),
+        "same_checks": result.summary["site"] == recorded["checks"],
+        "checks": result.summary["site"],
+        "responses": stats["responses"],
+        "unique_bodies": stats["unique_bodies"],
+        "raw_mb": round(stats["raw_bytes"] / 1e6, 2),
+        "stored_mb": round(stats["stored_bytes"] / 1e6, 2),
+        "archive_mb": round(archive_bytes / 1e6, 2),
+        "zlib_no_dictionary_mb": round(plain / 1e6, 2),
+        "compression_ratio": round(stats["raw_bytes"] / stats["stored_bytes"], 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500, help="pages scanned and recorded (default 500)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    args = parser.parse_args()
+
+    report = measure(args.pages)
+    print(json.dumps(report, indent=2))
+    if not report["same_checks"]:
+        print("MISMATCH replayed check outcomes differ from the recorded scan")
+        return 1
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {"scenarios": {}}
+    if args.update_baseline:
+        stored["replay"] = report
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    regressions = compare(report, stored["replay"], args.tolerance, _COMPARED) if "replay" in stored else []
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
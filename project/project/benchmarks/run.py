@@ -0,0 +1,310 @@
+"""
+End-to-end scan benchmark against local stand-in servers.
+
+    python -m benchmarks.run [scenario ...] [--update-baseline] [--tolerance 0.25] [--checks 4,9]
+
+Each scenario runs in a fresh interpreter (so peak RSS is per scenario):
+the synthetic site and the Google stand-ins are started, pages are discovered
+natively, the stratified sample is taken and the SEO, AEO and GEO analysers run
+concurrently over one shared PageFetcher, as in Pipeline.run (a stand-in
+renderer takes the browser's place for client-rendered pages). Results are
+compared with baselines.json; a regression beyond the tolerance exits
+non-zero. --checks limits the scan to those check ids, as ScanOptions.checks
+does, and is reported without comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+import numpy as np
+
+from .scenarios import SCENARIOS
+from .servers import serve
+
+
+BASELINES = Path(__file__).with_name("baselines.json")
+# metric -> True when higher is better
+_COMPARED = {"pages_per_sec": True, "page_latency_p99_ms": False, "peak_rss_mb": False}
+
+
+class _ScriptRenderer:
+    """
+    Stands in for rendering.PageRenderer (no browser here): loads the page and
+    applies the synthetic site's one inline script, which fills #root. Renders
+    are recorded into the archive, as PageRenderer does, for replay.
+    """
+
+    _MOUNT = re.compile(r'<div id="root"></div><script>document\.getElementById\("root"\)\.innerHTML = (".*?");</script>', re.S)
+
+    def __init__(self, archive=None):
+        self.archive = archive
+        self.client = httpx.AsyncClient()
+        self.rendered = 0
+
+    async def render(self, url: str, timeout_sec: Optional[float] = None) -> Optional[str]:
+        from analysis.engines_optimization.rendering import RenderFailed
+
+        try:
+            r = await self.client.get(url, timeout=timeout_sec)
+        except httpx.HTTPError as e:
+            raise RenderFailed(str(e) or type(e).__name__) from e
+        m = self._MOUNT.search(r.text)
+        html = r.text if m is None else f'{r.text[:m.start()]}<div id="root">{json.loads(m.group(1))}</div>{r.text[m.end():]}'
+        self.rendered += 1
+        if self.archive is not None:
+            self.archive.record_render(url, html)
+        return html
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def _peak_rss_mb() -> float:
+    from infra.memory import peak_rss_bytes
+
+    return round(peak_rss_bytes() / (1024 * 1024), 1)
+
+
+def _ms_percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0}
+    p50, p99 = np.percentile(np.asarray(samples) * 1000, [50, 99])
+    return {"p50": round(float(p50), 1), "p99": round(float(p99), 1)}
+
+
+async def _scan(
+    site: str, max_pages: int, checks: Optional[list[int]] = None, archive=None, render: bool = False
+) -> dict[str, Any]:
+    from analysis import AeoAnalyzer, GeoAnalyzer, SeoAnalyzer
+    from analysis.checks import required_analysers
+    from analysis.engines_optimization.fetcher import PageFetcher
+    from analysis.native_discovery import discover_pages
+    from infra.files import CONFIG
+    from infra.metrics import current_analyser
+    from pipeline.body_spill import BodySpill
+    from pipeline.check_table import CheckTable
+    from pipeline.views import PipelineResult
+    from pipeline.sampling import stratified_sample
+    from pipeline.site_index import build_site_index
+    from pipeline.views import DiscoveredPage, PreContext
+
+    native = CONFIG.discovery.native
+    started = time.perf_counter()
+    pages = await discover_pages(
+        site + "/",
+        max_pages=native.max_pages * 10,
+        max_depth=native.max_depth,
+        concurrency=native.concurrency,
+        timeout_sec=native.timeout_sec,
+    )
+    discovery_sec = time.perf_counter() - started
+
+    pre_context = PreContext(
+        discovered_pages=[
+            DiscoveredPage(page_id=p.page_id, page_name=p.page_name, url=p.url, timestamp=p.timestamp) for p in pages
+        ],
+        checks=checks,
+    )
+    pre_context.scan_targets, pre_context.coverage = stratified_sample(pre_context.discovered_pages, max_pages)
+
+    durations: dict[str, float] = {}
+    started = time.perf_counter()
+    budget = CONFIG.scan_budget
+    spill = BodySpill(CONFIG.paths.body_spill / "benchmark", CONFIG.memory.compression_level) if CONFIG.memory.spill_bodies else None
+    renderer = _ScriptRenderer(archive) if render else None
+    async with PageFetcher(max_bytes=budget.max_bytes, max_seconds=budget.max_seconds, archive=archive) as fetcher:
+        try:
+            pre_context.site_index = await build_site_index(site + "/", pre_context, fetcher, spill, renderer)
+        finally:
+            if renderer is not None:
+                await renderer.close()
+        index_sec = time.perf_counter() - started
+        analysers = [
+            cls(url=site + "/", page=None, pre_context=pre_context, fetcher=fetcher)
+            for cls in (SeoAnalyzer, AeoAnalyzer, GeoAnalyzer)
+            if cls.name in required_analysers(checks)
+        ]
+
+        async def timed(analyser):
+            current_analyser.set(analyser.name.value)
+            t = time.perf_counter()
+            records = await analyser.scan()
+            durations[analyser.name.value] = time.perf_counter() - t
+            return analyser.name, records
+
+        results = dict(await asyncio.gather(*(timed(a) for a in analysers)))
+        usage = fetcher.usage()
+    if spill is not None:
+        spill.cleanup()
+    analysis_sec = time.perf_counter() - started
+
+    if archive is not None:
+        from pipeline.replay import archive_meta
+
+        archive.meta = archive_meta(site + "/", "benchmark", pre_context)
+    payload = _payload_sizes(PipelineResult.from_analyser_results(dict(results)))
+
+    page_seconds = [s for a in analysers for s in a.page_seconds]
+    scanned = len(pre_context.scan_targets)
+    percentiles = _ms_percentiles(page_seconds)
+    return {
+        "discovered_pages": len(pages),
+        "scanned_pages": scanned,
+        "discovery_sec": round(discovery_sec, 3),
+        "analysis_sec": round(analysis_sec, 3),
+        "site_index_sec": round(index_sec, 3),
+        "pages_per_sec": round(scanned / analysis_sec, 2) if analysis_sec else 0.0,
+        "page_latency_p50_ms": percentiles["p50"],
+        "page_latency_p99_ms": percentiles["p99"],
+        "by_analyser": {
+            # SEO is site-level, so it has no per-page timings.
+            a.name.value: {
+                "seconds": round(durations[a.name.value], 3),
+                **(_ms_percentiles(a.page_seconds) if a.page_seconds else {}),
+            }
+            for a in analysers
+        },
+        "requests": usage["requests"],
+        "bytes_fetched": usage["bytes_used"],
+        "fetch_decisions": usage["decisions"],
+        "spilled_bodies": pre_context.site_index.spilled_bodies,
+        "spilled_bytes": pre_context.site_index.spilled_bytes,
+        # Rendered by _ScriptRenderer when the site has client-rendered pages.
+        "js_shell_pages": pre_context.site_index.js_shell_pages,
+        "rendered_pages": pre_context.site_index.rendered_pages,
+        "checks": CheckTable.from_results(results).summary()["site"],
+        "payload": payload,
+    }
+
+
+def _payload_sizes(result) -> dict[str, Any]:
+    """Encoded size (raw and gzip, as GZipMiddleware sends it) and encode time of the full view per evidence level."""
+    from infra.files import CONFIG
+    from pipeline.constants import EvidenceLevels
+
+    sizes = {}
+    for level in EvidenceLevels:
+        t = time.perf_counter()
+        body = result.to_json_bytes(evidence=level)
+        encode_ms = (time.perf_counter() - t) * 1000
+        sizes[level.value] = {
+            "kb": round(len(body) / 1024, 1),
+            "gzip_kb": round(len(gzip.compress(body, CONFIG.compression.level)) / 1024, 1),
+            "encode_ms": round(encode_ms, 2),
+        }
+    return sizes
+
+
+def run_scenario(name: str, checks: Optional[list[int]] = None) -> dict[str, Any]:
+    spec, max_pages = SCENARIOS[name]
+    with serve("site", spec) as site, serve("google") as google:
+        os.environ.update({
+            "GSC_CLIENT_ID": "bench",
+            "GSC_CLIENT_SECRET": "bench",
+            "GSC_REFRESH_TOKEN": "bench",
+            "GSC_TOKEN_URL": f"{google}/token",
+            "GSC_API_BASE": f"{google}/webmasters/v3",
+            "SAFE_BROWSING_API_KEY": "bench",
+            "SAFE_BROWSING_ENDPOINT": f"{google}/v4/threatMatches:find",
+        })
+        report = asyncio.run(_scan(site, max_pages, checks, render=spec.spa_rate > 0))
+    selection = {"selected_checks": checks} if checks else {}
+    return {"scenario": name, "site": asdict(spec), "max_pages": max_pages, **selection, **report, "peak_rss_mb": _peak_rss_mb()}
+
+
+def _run_isolated(name: str, checks: Optional[list[int]] = None) -> dict[str, Any]:
+    selection = ["--checks", ",".join(map(str, checks))] if checks else []
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--worker", name, *selection],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _check_ids(value: str) -> list[int]:
+    from pipeline.views import ScanOptions
+
+    try:
+        return ScanOptions(checks=[int(v) for v in value.split(",") if v.strip()]).checks
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def compare(
+    report: dict[str, Any], baseline: dict[str, Any], tolerance: float, metrics: dict[str, bool] = _COMPARED
+) -> list[str]:
+    """Human-readable regressions of report vs baseline beyond tolerance (relative)."""
+    regressions = []
+    for metric, higher_is_better in metrics.items():
+        base, now = baseline.get(metric), report.get(metric)
+        if not base or now is None:
+            continue
+        change = (now - base) / base
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{report['scenario']}: {metric} {base} -> {now} ({change:+.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    parser.add_argument(
+        "--checks", type=_check_ids, help="comma-separated check ids to run (default: all); not compared with baselines"
+    )
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    if args.checks and args.update_baseline:
+        parser.error("--update-baseline records full scans only; drop --checks")
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.worker, args.checks)))
+        return 0
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {"scenarios": {}}
+    regressions: list[str] = []
+    for name in args.scenarios or list(SCENARIOS):
+        report = _run_isolated(name, args.checks)
+        print(json.dumps(report, indent=2))
+        baseline = stored["scenarios"].get(name)
+        if baseline and not args.update_baseline and not args.checks:
+            regressions.extend(compare(report, baseline, args.tolerance))
+        if args.update_baseline:
+            stored["scenarios"][name] = report
+
+    if args.update_baseline:
+        stored["environment"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        }
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+from .servers import SiteSpec
+
+
+# name -> (site, max_pages scanned). Baselines in baselines.json are keyed by name.
+SCENARIOS: dict[str, tuple[SiteSpec, int]] = {
+    # Small brochure site, everything scanned.
+    "small": (SiteSpec(pages=40, page_kb=15, latency_ms=10, jitter_ms=5), 50),
+    # Large site, stratified sample of 200 pages.
+    "large": (SiteSpec(pages=2000, page_kb=30, latency_ms=20, jitter_ms=10), 200),
+    # Slow, flaky origin with cloaking and injected spam.
+    "hostile": (
+        SiteSpec(pages=300, page_kb=40, latency_ms=150, jitter_ms=100, error_rate=0.05, cloaking_rate=0.1, spam_rate=0.05),
+        100,
+    ),
+    # Site where a third of the pages are client-rendered JS shells.
+    "spa": (SiteSpec(pages=300, page_kb=20, latency_ms=20, jitter_ms=10, spa_rate=0.3), 100),
+}
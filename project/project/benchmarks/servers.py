@@ -0,0 +1,279 @@
+"""
+Local stand-ins for the benchmark: a synthetic website, the Google APIs
+(GSC OAuth + Search Console, Safe Browsing) the SEO analyser calls, and an
+OpenAI-compatible chat endpoint for the AI service (offline runs and tests).
+
+Both are plain Starlette apps served by uvicorn in a child process, so the
+benchmark's own RSS and event loop only measure the scanner.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import random
+import re
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator
+from xml.sax.saxutils import escape
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+
+_WORDS = (
+    "analysis search engine content page quality signal trust review source citation author "
+    "update product pricing guide reference example customer support service platform data "
+    "report research result method process design performance network security privacy policy"
+).split()
+_SECTIONS = ("blog", "products", "docs", "news")
+
+
+@dataclass(frozen=True)
+class SiteSpec:
+    pages: int = 100
+    page_kb: int = 20
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    # Fraction of pages answering 500, serving different content to Googlebot, carrying spam,
+    # or rendered client-side (an empty mount point filled in by an inline script).
+    error_rate: float = 0.0
+    cloaking_rate: float = 0.0
+    spam_rate: float = 0.0
+    spa_rate: float = 0.0
+    seed: int = 1
+
+
+def _page_path(n: int) -> str:
+    section = _SECTIONS[n % len(_SECTIONS)]
+    if section == "products":
+        return f"/products/{n}"
+    return f"/{section}/page-number-{n}"
+
+
+def _pick(spec: SiteSpec, n: int, rate: float, salt: int) -> bool:
+    return rate > 0 and random.Random(spec.seed * 1_000_003 + n * 31 + salt).random() < rate
+
+
+def _body_text(rng: random.Random, size: int) -> str:
+    words: list[str] = []
+    length = 0
+    while length < size:
+        w = rng.choice(_WORDS)
+        words.append(w)
+        length += len(w) + 1
+    # Paragraphs of ~80 words.
+    return "".join(f"<p>{' '.join(words[i:i + 80])}</p>" for i in range(0, len(words), 80))
+
+
+def render_page(spec: SiteSpec, n: int, bot: bool) -> str:
+    rng = random.Random(spec.seed * 7919 + n)
+    body = _body_text(rng, spec.page_kb * 1024)
+    if bot and _pick(spec, n, spec.cloaking_rate, 2):
+        body = "<p>" + " ".join(rng.choice(_WORDS) for _ in range(200)) + " exclusive offer</p>"
+    spam = ""
+    if _pick(spec, n, spec.spam_rate, 3):
+        spam = '<div style="display:none"><a href="https://casino.example/">casino poker</a></div>'
+    links = "".join(
+        f'<a href="{_page_path(m)}">Page {m}</a> ' for m in range(n + 1, min(spec.pages, n + 6))
+    )
+    if _pick(spec, n, spec.spa_rate, 4):
+        content = json.dumps(f"<h1>Page {n}</h1>{body}{spam}{links}").replace("</", "<\\/")
+        return (
+            "<html><head>"
+            f"<title>Synthetic page {n}</title>"
+            "</head><body>"
+            '<div id="root"></div>'
+            f'<script>document.getElementById("root").innerHTML = {content};</script>'
+            "</body></html>"
+        )
+    return (
+        "<html><head>"
+        f"<title>Synthetic page {n}</title>"
+        '<meta name="author" content="Bench Author">'
+        '<meta property="article:published_time" content="2024-01-01">'
+        f'<link rel="canonical" href="{_page_path(n)}">'
+        "</head><body>"
+        f"<h1>Page {n}</h1>{body}{spam}"
+        f'<a href="https://example.org/source-{n}">source</a> {links}'
+        "</body></html>"
+    )
+
+
+def create_site_app(spec: SiteSpec) -> Starlette:
+    async def delay() -> None:
+        await asyncio.sleep(max(0.0, spec.latency_ms + random.uniform(-spec.jitter_ms, spec.jitter_ms)) / 1000)
+
+    async def robots(request: Request) -> Response:
+        base = str(request.base_url).rstrip("/")
+        return PlainTextResponse(f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap.xml\n")
+
+    async def sitemap(request: Request) -> Response:
+        base = str(request.base_url).rstrip("/")
+        urls = [f"{base}/", f"{base}/about", f"{base}/contact", f"{base}/privacy"]
+        urls += [f"{base}{_page_path(n)}" for n in range(spec.pages)]
+        body = "".join(f"<url><loc>{escape(u)}</loc></url>" for u in urls)
+        return Response(
+            f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</urlset>',
+            media_type="application/xml",
+        )
+
+    async def static_page(request: Request) -> Response:
+        await delay()
+        name = request.url.path.strip("/") or "home"
+        links = "".join(f'<a href="{_page_path(n)}">Page {n}</a> ' for n in range(min(spec.pages, 20)))
+        return HTMLResponse(f"<html><head><title>{name}</title></head><body><h1>{name}</h1>{links}</body></html>")
+
+    async def page(request: Request) -> Response:
+        await delay()
+        path = request.url.path
+        try:
+            n = int(path.rstrip("/").rsplit("-", 1)[-1].rsplit("/", 1)[-1])
+        except ValueError:
+            return HTMLResponse("not found", status_code=404)
+        if n >= spec.pages or _page_path(n) != path:
+            return HTMLResponse("not found", status_code=404)
+        if _pick(spec, n, spec.error_rate, 1):
+            return HTMLResponse("internal error", status_code=500)
+        bot = "googlebot" in request.headers.get("user-agent", "").lower()
+        return HTMLResponse(render_page(spec, n, bot))
+
+    return Starlette(routes=[
+        Route("/robots.txt", robots),
+        Route("/sitemap.xml", sitemap),
+        Route("/", static_page),
+        Route("/about", static_page),
+        Route("/contact", static_page),
+        Route("/privacy", static_page),
+        Route("/{section}/{slug}", page),
+    ])
+
+
+def create_google_stub_app() -> Starlette:
+    """OAuth token, Search Console (manualActions/securityIssues) and Safe Browsing stand-ins."""
+
+    async def token(request: Request) -> Response:
+        return JSONResponse({"access_token": "bench-token", "expires_in": 3600})
+
+    async def gsc(request: Request) -> Response:
+        await asyncio.sleep(0.05)
+        return JSONResponse({})
+
+    async def safe_browsing(request: Request) -> Response:
+        await asyncio.sleep(0.05)
+        payload = await request.json()
+        entries = payload.get("threatInfo", {}).get("threatEntries", [])
+        return JSONResponse({"matches": [
+            {"threatType": "MALWARE", "threat": e} for e in entries if "malware" in e.get("url", "")
+        ]})
+
+    return Starlette(routes=[
+        Route("/token", token, methods=["POST"]),
+        Route("/webmasters/v3/sites/{site:path}/{endpoint}", gsc),
+        Route("/v4/threatMatches:find", safe_browsing, methods=["POST"]),
+    ])
+
+
+_PAGE_BLOCK = re.compile(r'<page id="([^"]*)">(.*?)</page>', re.S)
+
+
+def create_openai_stub_app(
+    latency_ms: float = 200.0, ms_per_1k_prompt_tokens: float = 20.0, ms_per_output_token: float = 2.0
+) -> Starlette:
+    """
+    /chat/completions in the OpenAI response shape. Latency is a fixed
+    per-request cost plus prompt-size and answer-size terms; the answer is
+    deterministic. With response_format json_object, every <page id="...">
+    block gets a verdict (as ai.batching expects). GET /stats reports the
+    requests and prompt characters received.
+    """
+    stats = {"requests": 0, "prompt_chars": 0}
+
+    async def completions(request: Request) -> Response:
+        payload = await request.json()
+        messages = payload.get("messages", [])
+        prompt = "".join(m.get("content") or "" for m in messages)
+        stats["requests"] += 1
+        stats["prompt_chars"] += len(prompt)
+        user = messages[-1].get("content", "") if messages else ""
+        if (payload.get("response_format") or {}).get("type") == "json_object":
+            pages = [
+                {"id": page_id, "status": ("pass", "warn", "fail")[len(body.split()) % 3],
+                 "findings": f"Stub verdict for {len(body.split())} words."}
+                for page_id, body in _PAGE_BLOCK.findall(user)
+            ]
+            content = json.dumps({"pages": pages})
+        else:
+            content = f"Stub analysis of {len(user.split())} words."
+        await asyncio.sleep(
+            (latency_ms + ms_per_1k_prompt_tokens * len(prompt) / 4000 + ms_per_output_token * len(content) / 4) / 1000
+        )
+        return JSONResponse({
+            "id": f"chatcmpl-stub-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4},
+        })
+
+    async def models(request: Request) -> Response:
+        return JSONResponse({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+    async def get_stats(request: Request) -> Response:
+        return JSONResponse(stats)
+
+    return Starlette(routes=[
+        Route("/chat/completions", completions, methods=["POST"]),
+        Route("/models", models),
+        Route("/stats", get_stats),
+    ])
+
+
+def _serve(kind: str, spec: dict, port: int) -> None:
+    import uvicorn
+
+    if kind == "site":
+        app = create_site_app(SiteSpec(**spec))
+    elif kind == "openai":
+        app = create_openai_stub_app()
+    else:
+        app = create_google_stub_app()
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def serve(kind: str, spec: SiteSpec = SiteSpec()) -> Iterator[str]:
+    """Run the site ("site"), Google ("google") or OpenAI ("openai") stand-in in a child process; yields its base URL."""
+    port = _free_port()
+    proc = multiprocessing.Process(target=_serve, args=(kind, asdict(spec), port), daemon=True)
+    proc.start()
+    base = f"http://127.0.0.1:{port}"
+    method, path = {"site": ("GET", "/robots.txt"), "openai": ("GET", "/models")}.get(kind, ("POST", "/token"))
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                if httpx.request(method, base + path, timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or not proc.is_alive():
+                raise RuntimeError(f"Benchmark {kind} server did not start")
+            time.sleep(0.1)
+        yield base
+    finally:
+        proc.terminate()
+        proc.join(timeout=5)
@@ -0,0 +1,136 @@
+"""
+Cold-start benchmark: how long until the API can serve its first request.
+
+    python -m benchmarks.startup [--runs 7] [--update-baseline] [--tolerance 0.25]
+
+Every measurement is a fresh interpreter, so nothing is warm except the OS page
+cache. Reported (medians over --runs):
+
+- interpreter_ms:   `python -c pass`, the floor everything else sits on
+- main_import_ms:   `import main` from project/project (uvicorn main:app)
+- startup_import_ms: `import startup` from the repository root (Azure App Service)
+- first_health_ms:  spawning `uvicorn main:app` until GET /api/health answers 200
+
+Results are compared with the "startup" entry of baselines.json.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .run import BASELINES, compare
+from .servers import _free_port
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = APP_DIR.parent.parent
+# metric -> True when higher is better
+_COMPARED = {"main_import_ms": False, "startup_import_ms": False, "first_health_ms": False}
+
+_TIMED_IMPORT = (
+    "import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+)
+
+
+def _interpreter_ms() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def _import_ms(module: str, cwd: Path) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-c", _TIMED_IMPORT.format(module=module)],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def _first_health_ms(timeout_sec: float = 60.0) -> float:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=APP_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=1) as client:
+            while True:
+                try:
+                    if client.get(url).status_code == 200:
+                        return (time.perf_counter() - started) * 1000
+                except httpx.HTTPError:
+                    pass
+                if proc.poll() is not None:
+                    raise RuntimeError("uvicorn main:app exited before answering /api/health")
+                if time.perf_counter() - started > timeout_sec:
+                    raise RuntimeError("uvicorn main:app did not answer /api/health in time")
+                time.sleep(0.01)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def measure(runs: int) -> dict[str, Any]:
+    samples: dict[str, list[float]] = {
+        "interpreter_ms": [], "main_import_ms": [], "startup_import_ms": [], "first_health_ms": []
+    }
+    for _ in range(runs):
+        samples["interpreter_ms"].append(_interpreter_ms())
+        samples["main_import_ms"].append(_import_ms("main", APP_DIR))
+        samples["startup_import_ms"].append(_import_ms("startup", REPO_ROOT))
+        samples["first_health_ms"].append(_first_health_ms())
+    return {
+        "scenario": "startup",
+        "runs": runs,
+        **{metric: round(statistics.median(values), 1) for metric, values in samples.items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="fresh processes per measurement (default 7)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    args = parser.parse_args()
+
+    report = measure(args.runs)
+    print(json.dumps(report, indent=2))
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {"scenarios": {}}
+    if args.update_baseline:
+        stored["startup"] = report
+        stored["environment"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        }
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    regressions = compare(report, stored["startup"], args.tolerance, _COMPARED) if "startup" in stored else []
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
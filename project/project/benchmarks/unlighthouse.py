@@ -0,0 +1,119 @@
+"""
+Unlighthouse audit-mode benchmark: crawl a synthetic site once per `lighthouse_audits` mode.
+
+    python -m benchmarks.unlighthouse [--pages 40] [--update-baseline] [--tolerance 0.25]
+
+Needs Node with the scripts' dependencies installed and built (`npm install &&
+npm run build` in scripts/). Each mode (full, accessibility, none) crawls the
+same site through run_unlighthouse on the worker pool, after a warm-up crawl so
+no mode pays for starting a worker or Chrome. Reported per mode: seconds,
+routes discovered, and the artifacts the crawl left on disk (before cleanup);
+plus the crawl concurrency and each mode's speedup over "full". It doubles as
+the smoke test of the "none" mode, which depends on Unlighthouse internals: a
+"none" crawl that finds no routes or returns scores exits non-zero. Results are
+compared with the "unlighthouse" entry of baselines.json.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any
+
+from .run import BASELINES, compare
+from .servers import SiteSpec, serve
+
+
+# metric -> True when higher is better
+_COMPARED = {"accessibility_sec": False, "none_sec": False}
+
+
+def _dir_bytes(path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+async def _crawl(site: str, run_id: str, audits) -> dict[str, Any]:
+    from analysis.unlighthouse_routes import cleanup_unlighthouse_run, collect_page_artifacts, run_unlighthouse
+    from infra.files import CONFIG
+
+    t = time.perf_counter()
+    try:
+        _, domain_path = await run_unlighthouse(site, run_id, audits=audits)
+        seconds = time.perf_counter() - t
+        pages = collect_page_artifacts(domain_path)
+        return {
+            "sec": round(seconds, 2),
+            "routes": len(pages),
+            "scored": sum(1 for p in pages if p.accessibility_score),
+            "artifacts_mb": round(_dir_bytes(CONFIG.paths.unlighthouse_reports / run_id) / 1e6, 2),
+        }
+    finally:
+        cleanup_unlighthouse_run(run_id)
+
+
+async def _measure(site: str) -> dict[str, Any]:
+    from analysis.unlighthouse_routes import crawl_concurrency
+    from analysis.unlighthouse_worker import shutdown_pool
+    from pipeline.constants import LighthouseAudits
+
+    try:
+        await _crawl(site, "benchmark-warmup", LighthouseAudits.ACCESSIBILITY)
+        modes = {audits.value: await _crawl(site, f"benchmark-{audits.value}", audits) for audits in LighthouseAudits}
+    finally:
+        await shutdown_pool()
+    full = modes[LighthouseAudits.FULL.value]["sec"]
+    report: dict[str, Any] = {"scenario": "unlighthouse", "concurrency": crawl_concurrency()}
+    for mode, stats in modes.items():
+        report[f"{mode}_sec"] = stats["sec"]
+        report[mode] = stats
+        if mode != LighthouseAudits.FULL.value:
+            report[f"{mode}_speedup"] = round(full / stats["sec"], 1)
+    return report
+
+
+def measure(pages: int) -> dict[str, Any]:
+    from infra.files import CONFIG
+
+    scripts = CONFIG.paths.project_folder / "scripts"
+    if not (scripts / "node_modules").is_dir() or not (scripts / "dist" / "unlighthouse_engine.js").is_file():
+        raise RuntimeError(f"Unlighthouse is not installed: run `npm install && npm run build` in {scripts}")
+    spec = SiteSpec(pages=pages, page_kb=20, latency_ms=20, jitter_ms=10)
+    with serve("site", spec) as site:
+        return asyncio.run(_measure(site + "/"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=40, help="pages on the synthetic site (default 40)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression (default 0.25)")
+    args = parser.parse_args()
+
+    try:
+        report = measure(args.pages)
+    except RuntimeError as e:
+        print(e)
+        return 2
+    print(json.dumps(report, indent=2))
+    crawl_only = report["none"]
+    if not crawl_only["routes"] or crawl_only["scored"]:
+        print(f"MISMATCH audits \"none\" found {crawl_only['routes']} routes, {crawl_only['scored']} with scores")
+        return 1
+
+    stored = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {"scenarios": {}}
+    if args.update_baseline:
+        stored["unlighthouse"] = report
+        BASELINES.write_text(json.dumps(stored, indent=2) + "\n", encoding="utf-8")
+        print(f"Baselines written to {BASELINES}")
+        return 0
+
+    regressions = compare(report, stored["unlighthouse"], args.tolerance, _COMPARED) if "unlighthouse" in stored else []
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
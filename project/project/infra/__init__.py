@@ -1,4 +1,4 @@
 # Infra module
-from .files import CONFIG
+from .files import CONFIG, ensure_dirs
 
-__all__ = ["CONFIG"]
+__all__ = ["CONFIG", "ensure_dirs"]
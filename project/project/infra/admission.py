@@ -0,0 +1,232 @@
+"""
+Admission control for scans (POST /api/analyze, POST /api/jobs).
+
+Each scan launches Chromium, usually a Node crawl, and hundreds of fetches, so
+a scan starts only while the container has room for it:
+
+- a browser slot is free: at most `browser_slots` scans, and `scans_per_cpu`
+  per CPU the container may use
+- the container's available memory (infra.memory) covers `scan_memory_mb`
+  above `reserve_memory_mb` for the new scan and for every scan started in the
+  last `warmup_sec`, which have not allocated theirs yet
+- the 1-minute load average per CPU is below `max_load_per_cpu`
+
+Warm Unlighthouse workers (analysis.unlighthouse_worker) and their Chromes are
+part of the measured memory; pools stop the ones left idle for
+`unlighthouse.keep_warm_sec`, so memory is not held by browsers no scan uses.
+
+Memory and load only hold back additional scans: when nothing is running one
+scan is always admitted, so a busy host slows scans down rather than stopping them.
+
+Scans run in the API process wait here in arrival order, at most `max_queued`
+of them and for at most `queue_timeout_sec`; past either limit Overloaded is
+raised and the API answers 429 with a Retry-After estimated from recent scan
+durations. With scan workers the job queue is the wait queue: submissions are
+refused once `max_queued` jobs are queued, and workers claim a job only while
+`free_slots` allows it (see JobQueue.claim).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from .files import CONFIG
+from .memory import available_memory_bytes, cpu_capacity
+from .metrics import ADMISSION_DECISIONS, ADMISSION_WAITING
+
+_MB = 1024 * 1024
+# How often a waiting scan re-reads memory and load when no scan has finished.
+_POLL_INTERVAL_SEC = 1.0
+# Weight of the newest scan in the running scan duration average.
+_DURATION_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """No capacity for another scan and no room (or time left) to wait for it."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        browser_slots: int = 4,
+        scans_per_cpu: float = 2,
+        scan_memory_mb: int = 768,
+        reserve_memory_mb: int = 256,
+        warmup_sec: float = 30,
+        max_load_per_cpu: float = 2.0,
+        max_queued: int = 16,
+        queue_timeout_sec: float = 300,
+        default_scan_sec: float = 120,
+        max_retry_after_sec: int = 600,
+    ):
+        self.browser_slots = max(1, browser_slots)
+        self.scans_per_cpu = scans_per_cpu
+        self.scan_memory = scan_memory_mb * _MB
+        self.reserve_memory = reserve_memory_mb * _MB
+        self.warmup_sec = warmup_sec
+        self.max_load_per_cpu = max_load_per_cpu
+        self.max_queued = max_queued
+        self.queue_timeout_sec = queue_timeout_sec
+        self.max_retry_after_sec = max_retry_after_sec
+        # Scans admitted in this process (workers=0), and when the recent ones started.
+        self.running = 0
+        self._started: Deque[float] = deque()
+        self._waiters: Deque[object] = deque()
+        self._changed = asyncio.Event()
+        self.scan_sec = default_scan_sec
+
+    # ----- capacity -----
+
+    def slots(self, cpus: float) -> int:
+        """Scans that may run at once on cpus CPUs."""
+        return max(1, min(self.browser_slots, math.floor(cpus * self.scans_per_cpu)))
+
+    def capacity(self, running: int, starting: int) -> Dict[str, Any]:
+        """The signals behind the decision and `free_slots`: how many more scans may start now."""
+        cpus, load = cpu_capacity()
+        slots = self.slots(cpus)
+        free = slots - running
+        memory = available_memory_bytes()
+        load_per_cpu = load / cpus if load is not None else None
+        if running > 0:
+            if memory is not None:
+                free = min(free, (memory - self.reserve_memory) // self.scan_memory - starting)
+            if load_per_cpu is not None and load_per_cpu >= self.max_load_per_cpu:
+                free = 0
+        return {
+            "slots": slots,
+            "running": running,
+            "starting": starting,
+            "free_slots": max(0, int(free)),
+            "memory_available_mb": round(memory / _MB) if memory is not None else None,
+            "cpus": round(cpus, 2),
+            "load_per_cpu": round(load_per_cpu, 2) if load_per_cpu is not None else None,
+        }
+
+    def free_slots(self, running: int, starting: int) -> int:
+        return self.capacity(running, starting)["free_slots"]
+
+    def retry_after(self, queued: int, slots: int, scan_sec: Optional[float] = None) -> int:
+        """Seconds until a request arriving now could start: the queue ahead of it drained `slots` at a time."""
+        scan_sec = scan_sec or self.scan_sec
+        return max(1, min(self.max_retry_after_sec, math.ceil(scan_sec * (queued // max(1, slots) + 1))))
+
+    def status(self, running: int, starting: int, queued: int, scan_sec: Optional[float] = None) -> Dict[str, Any]:
+        """Readiness: ready while a scan could start now or wait in the queue."""
+        capacity = self.capacity(running, starting)
+        room = max(0, self.max_queued - queued)
+        return {
+            "ready": capacity["free_slots"] > 0 or room > 0,
+            **capacity,
+            "queued": queued,
+            "max_queued": self.max_queued,
+            "queue_room": room,
+            "retry_after_sec": self.retry_after(queued, capacity["slots"], scan_sec),
+        }
+
+    def check_queue(self, running: int, starting: int, queued: int, scan_sec: Optional[float] = None) -> None:
+        """Refuse a job submission (scan workers) once max_queued jobs are waiting and none could start."""
+        capacity = self.capacity(running, starting)
+        if queued >= self.max_queued and capacity["free_slots"] <= 0:
+            ADMISSION_DECISIONS.labels(outcome="rejected").inc()
+            raise Overloaded(
+                f"Scan capacity exhausted: {running} running, {queued} queued",
+                self.retry_after(queued, capacity["slots"], scan_sec),
+            )
+        ADMISSION_DECISIONS.labels(outcome="queued" if capacity["free_slots"] <= 0 else "admitted").inc()
+
+    # ----- scans run in this process -----
+
+    def _starting(self) -> int:
+        cutoff = time.monotonic() - self.warmup_sec
+        while self._started and self._started[0] < cutoff:
+            self._started.popleft()
+        return len(self._started)
+
+    def local_status(self) -> Dict[str, Any]:
+        return self.status(self.running, self._starting(), len(self._waiters))
+
+    async def _wait(self) -> None:
+        """Wait for a turn; raises Overloaded when the queue is full or the wait times out."""
+        capacity = self.capacity(self.running, self._starting())
+        if not self._waiters and capacity["free_slots"] > 0:
+            ADMISSION_DECISIONS.labels(outcome="admitted").inc()
+            return
+        if len(self._waiters) >= self.max_queued:
+            ADMISSION_DECISIONS.labels(outcome="rejected").inc()
+            raise Overloaded(
+                f"Scan capacity exhausted: {self.running} running, {len(self._waiters)} waiting",
+                self.retry_after(len(self._waiters), capacity["slots"]),
+            )
+        ADMISSION_DECISIONS.labels(outcome="queued").inc()
+        ticket = object()
+        self._waiters.append(ticket)
+        ADMISSION_WAITING.set(len(self._waiters))
+        deadline = time.monotonic() + self.queue_timeout_sec
+        try:
+            while self._waiters[0] is not ticket or self.free_slots(self.running, self._starting()) <= 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    ADMISSION_DECISIONS.labels(outcome="timed_out").inc()
+                    raise Overloaded(
+                        f"No scan capacity within {self.queue_timeout_sec:g}s",
+                        self.retry_after(len(self._waiters), capacity["slots"]),
+                    )
+                try:
+                    await asyncio.wait_for(self._changed.wait(), min(remaining, _POLL_INTERVAL_SEC))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(ticket)
+            ADMISSION_WAITING.set(len(self._waiters))
+            # The next waiter may now be first in line.
+            self._notify()
+
+    def _notify(self) -> None:
+        # set() wakes every current waiter; clearing right away leaves later waits blocking.
+        self._changed.set()
+        self._changed.clear()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a scan slot in this process for the duration of the block."""
+        await self._wait()
+        self.running += 1
+        self._started.append(time.monotonic())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self.scan_sec += _DURATION_ALPHA * (time.monotonic() - started - self.scan_sec)
+            self._notify()
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        settings = CONFIG.admission
+        _controller = AdmissionController(
+            browser_slots=settings.browser_slots,
+            scans_per_cpu=settings.scans_per_cpu,
+            scan_memory_mb=settings.scan_memory_mb,
+            reserve_memory_mb=settings.reserve_memory_mb,
+            warmup_sec=settings.warmup_sec,
+            max_load_per_cpu=settings.max_load_per_cpu,
+            max_queued=settings.max_queued,
+            queue_timeout_sec=settings.queue_timeout_sec,
+            default_scan_sec=settings.default_scan_sec,
+            max_retry_after_sec=settings.max_retry_after_sec,
+        )
+    return _controller
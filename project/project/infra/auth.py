@@ -0,0 +1,9 @@
+import hmac
+import os
+from typing import Optional
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """True when token matches ADMIN_TOKEN; admin features are off while ADMIN_TOKEN is unset."""
+    expected = os.getenv("ADMIN_TOKEN")
+    return bool(expected and token and hmac.compare_digest(token.encode(), expected.encode()))
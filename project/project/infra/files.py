@@ -11,17 +11,42 @@ def setup_paths(config):
     config.paths.unlighthouse_artifacts = (
         config.paths.temp_dir / config.paths.unlighthouse_artifacts
     )
+    config.paths.discovery_cache = (
+        config.paths.temp_dir / config.paths.discovery_cache
+    )
+    config.paths.results = config.paths.temp_dir / config.paths.results
+    config.paths.host_limits = config.paths.temp_dir / config.paths.host_limits
+    config.paths.profiles = config.paths.temp_dir / config.paths.profiles
+    config.paths.jobs_db = config.paths.temp_dir / config.paths.jobs_db
+    config.paths.worker_metrics = config.paths.temp_dir / config.paths.worker_metrics
+    config.paths.ai_cache = config.paths.temp_dir / config.paths.ai_cache
+    config.paths.body_spill = config.paths.temp_dir / config.paths.body_spill
+    config.paths.archives = config.paths.temp_dir / config.paths.archives
     return config
 
 
-def ensure_dirs(cfg):
-    """Ensure all required directories exist."""
+_dirs_ready = False
+
+
+def ensure_dirs(cfg=None):
+    """
+    Ensure all required directories exist.
+
+    Called before the first write rather than at import, so importing the app
+    (cold start, health checks) does no filesystem work. Idempotent.
+    """
+    global _dirs_ready
+    if _dirs_ready:
+        return
+    cfg = cfg or config
     cfg.paths.temp_dir.mkdir(parents=True, exist_ok=True)
     cfg.paths.unlighthouse_reports.mkdir(parents=True, exist_ok=True)
     cfg.paths.unlighthouse_artifacts.mkdir(parents=True, exist_ok=True)
+    cfg.paths.discovery_cache.mkdir(parents=True, exist_ok=True)
+    cfg.paths.results.mkdir(parents=True, exist_ok=True)
+    _dirs_ready = True
 
 
 config = setup_paths(config)
-ensure_dirs(config)
 
 CONFIG = config
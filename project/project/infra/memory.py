@@ -0,0 +1,140 @@
+"""
+Process memory readings for per-scan reporting, and the container's free
+memory and CPUs for admission control (infra.admission).
+
+Current RSS comes from /proc/self/statm where available (Linux, the Docker
+image); elsewhere the process's peak RSS from getrusage is the best there is.
+Scans in the same process share the RSS, so a scan's peak includes whatever
+ran next to it.
+
+Available memory is the cgroup limit (v2, else v1) minus the cgroup's working
+set (usage less reclaimable inactive page cache, as the OOM killer sees it),
+capped by MemAvailable from /proc/meminfo; None where none of these can be read.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CGROUP = Path("/sys/fs/cgroup")
+# (limit, usage, memory.stat key of the inactive page cache) for cgroup v2 and v1.
+_CGROUP_MEMORY = (
+    ("memory.max", "memory.current", "inactive_file"),
+    ("memory/memory.limit_in_bytes", "memory/memory.usage_in_bytes", "total_inactive_file"),
+)
+
+
+def peak_rss_bytes() -> int:
+    """Highest RSS of this process so far."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def _meminfo_available() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _cgroup_available() -> Optional[int]:
+    for limit_file, usage_file, inactive_key in _CGROUP_MEMORY:
+        limit, usage = _read(_CGROUP / limit_file), _read(_CGROUP / usage_file)
+        if limit is None or usage is None:
+            continue
+        # "max" (v2) or a page-rounded 2**63 (v1) means no limit.
+        if not limit.isdigit() or int(limit) >= 1 << 60:
+            return None
+        stat_dir = Path(limit_file).parent
+        stat = _read(_CGROUP / stat_dir / "memory.stat") or ""
+        inactive = next((int(v) for k, v in (line.split() for line in stat.splitlines()) if k == inactive_key), 0)
+        return max(0, int(limit) - max(0, int(usage) - inactive))
+    return None
+
+
+def available_memory_bytes() -> Optional[int]:
+    """Memory this process's container can still allocate (None when it can't be read)."""
+    readings = [v for v in (_cgroup_available(), _meminfo_available()) if v is not None]
+    return min(readings) if readings else None
+
+
+def cpu_capacity() -> Tuple[float, Optional[float]]:
+    """
+    (CPUs this container may use, 1-minute load average). The CPU count is the
+    cgroup v2 quota where one is set, else the CPUs the process may run on;
+    the load is None where the platform has no load average.
+    """
+    cpus = float(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1)
+    quota = (_read(_CGROUP / "cpu.max") or "max").split()
+    if quota[0].isdigit() and len(quota) == 2:
+        cpus = min(cpus, int(quota[0]) / int(quota[1]))
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load = None
+    return cpus, load
+
+
+class RssSampler:
+    """Samples RSS every `interval` seconds while active; `report()` gives start, peak and end in MB."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.start = self.peak = self.end = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, current_rss_bytes())
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> "RssSampler":
+        self.start = self.peak = current_rss_bytes()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self.end = current_rss_bytes()
+        self.peak = max(self.peak, self.end)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "rss_start_mb": round(self.start / _MB, 1),
+            "rss_peak_mb": round(self.peak / _MB, 1),
+            "rss_end_mb": round(self.end / _MB, 1),
+            "rss_growth_mb": round((self.peak - self.start) / _MB, 1),
+        }
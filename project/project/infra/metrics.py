@@ -0,0 +1,84 @@
+"""
+Prometheus metrics for the scan pipeline and the fetch layer (served at /metrics).
+
+Fetch and parse metrics are labelled with the analyser that caused them via the
+`current_analyser` context variable, which the pipeline sets per analyser task;
+asyncio tasks inherit it, so nothing has to be threaded through call sites.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+
+current_analyser: ContextVar[str] = ContextVar("current_analyser", default="none")
+
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+_PARSE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+_STAGE_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1200)
+_RSS_BUCKETS = tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 384, 512, 768, 1024, 1536, 2048, 4096))
+
+UNLIGHTHOUSE_DURATION = Histogram(
+    "site360_unlighthouse_duration_seconds", "Wall-clock time of one Unlighthouse run", buckets=_STAGE_BUCKETS
+)
+ANALYSER_DURATION = Histogram(
+    "site360_analyser_duration_seconds", "Wall-clock time of one analyser scan", ["analyser"], buckets=_STAGE_BUCKETS
+)
+FETCH_LATENCY = Histogram(
+    "site360_fetch_latency_seconds", "Latency of one page fetch", ["analyser"], buckets=_LATENCY_BUCKETS
+)
+PARSE_DURATION = Histogram(
+    "site360_parse_duration_seconds", "Time to parse one HTML page", ["analyser"], buckets=_PARSE_BUCKETS
+)
+RENDER_DURATION = Histogram(
+    "site360_render_duration_seconds", "Time to render one JS-shell page in the browser", buckets=_LATENCY_BUCKETS
+)
+SCAN_PEAK_RSS = Histogram(
+    "site360_scan_peak_rss_bytes", "Peak resident memory of the scanning process during one scan", buckets=_RSS_BUCKETS
+)
+
+FETCH_BYTES = Counter("site360_fetch_bytes_total", "Response body bytes fetched", ["analyser"])
+FETCH_RESPONSES = Counter(
+    "site360_fetch_responses_total", "Fetch outcomes by HTTP status (\"error\" for transport errors)", ["analyser", "status"]
+)
+FETCH_DECISIONS = Counter(
+    "site360_fetch_decisions_total", "Resilience decisions (retry, hedge, throttled, circuit_open)", ["analyser", "event"]
+)
+AI_REQUESTS = Counter("site360_ai_requests_total", "AI endpoint requests by kind (single, batch)", ["kind"])
+AI_BATCH_PAGES = Histogram(
+    "site360_ai_batch_pages", "Pages packed into one batched AI request", buckets=(1, 2, 3, 5, 8, 10, 15, 20, 30)
+)
+UNLIGHTHOUSE_WORKER_RESTARTS = Counter(
+    "site360_unlighthouse_worker_restarts_total", "Unlighthouse worker processes restarted, by reason (exited, recycled)", ["reason"]
+)
+RENDERS = Counter("site360_renders_total", "JS-shell pages sent to the browser, by outcome (rendered, failed)", ["outcome"])
+CACHE_LOOKUPS = Counter("site360_cache_lookups_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+ADMISSION_DECISIONS = Counter(
+    "site360_admission_decisions_total", "Scan admission outcomes (admitted, queued, rejected, timed_out)", ["outcome"]
+)
+CHECK_RESULTS = Counter(
+    "site360_check_results_total", "Check outcomes by analyser, check id and status", ["analyser", "check_id", "status"]
+)
+
+# livesum: summed over live scan workers when they write multiprocess metrics (see jobs.supervisor).
+SCANS_IN_FLIGHT = Gauge("site360_scans_in_flight", "Scans currently running", multiprocess_mode="livesum")
+BROWSER_CONTEXTS = Gauge(
+    "site360_browser_contexts_open", "Playwright browser contexts currently open", multiprocess_mode="livesum"
+)
+ADMISSION_WAITING = Gauge("site360_admission_waiting", "In-process scans waiting for admission", multiprocess_mode="livesum")
+# Set explicitly on enqueue/dequeue: set_function callbacks are not written to multiprocess files.
+EXECUTOR_QUEUE_DEPTH = Gauge(
+    "site360_executor_queue_depth", "Jobs waiting for a worker thread", ["executor"], multiprocess_mode="livesum"
+)
+
+
+@contextmanager
+def observe_seconds(histogram: Histogram, **labels: str) -> Iterator[None]:
+    """Observe the duration of the block, also when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
@@ -0,0 +1,148 @@
+"""
+Opt-in per-scan profiling (admin only, see routers/analyze.py).
+
+A background thread samples every thread's Python stack at a fixed interval
+(wall clock, so time spent waiting on the network shows up as selector frames
+on the event-loop thread) and aggregates them as folded stacks, the input
+format of flamegraph.pl and speedscope. tracemalloc runs alongside and the
+allocation growth over the scan is reported per source line.
+
+Nothing here is imported or started unless a request asks for profiling.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+from infra.files import CONFIG
+
+
+# tracemalloc and the sampler are process-wide, so only one scan is profiled at a time.
+_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another scan is already being profiled."""
+
+
+def _frame_label(code) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval_sec: float, max_depth: int = 128):
+        self.interval_sec = interval_sec
+        self.max_depth = max_depth
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="site360-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_sec):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack: list[str] = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """One "frame;frame;frame count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ScanProfile:
+    """Context manager wrapping one scan with the sampler and tracemalloc."""
+
+    def __init__(self, run_id: str):
+        settings = CONFIG.profiling
+        self.run_id = run_id
+        self.profiler = SamplingProfiler(settings.interval_ms / 1000)
+        self.top_n = settings.top_allocations
+        self.frames = settings.tracemalloc_frames
+        self.started_at = 0.0
+        self.duration_sec = 0.0
+        self.top_allocations: list[dict[str, Any]] = []
+        self.peak_traced_bytes = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def __enter__(self) -> "ScanProfile":
+        if not _lock.acquire(blocking=False):
+            raise ProfilerBusy("Another scan is being profiled; try again later")
+        tracemalloc.start(self.frames)
+        self._baseline = tracemalloc.take_snapshot()
+        self.started_at = time.perf_counter()
+        self.profiler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self.profiler.stop()
+            self.duration_sec = time.perf_counter() - self.started_at
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.peak_traced_bytes = peak
+            # Leave out the profiler's own bookkeeping.
+            ignore = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+            growth = snapshot.filter_traces(ignore).compare_to(self._baseline.filter_traces(ignore), "lineno")
+            self.top_allocations = [
+                {
+                    "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count_diff,
+                }
+                for stat in growth[: self.top_n]
+                if stat.size_diff > 0
+            ]
+        finally:
+            self._baseline = None
+            _lock.release()
+
+    def save(self) -> Path:
+        """Write <run_id>.folded and <run_id>.allocations.json under paths.profiles."""
+        folder = CONFIG.paths.profiles
+        folder.mkdir(parents=True, exist_ok=True)
+        folded = folder / f"{self.run_id}.folded"
+        folded.write_text(self.profiler.folded(), encoding="utf-8")
+        (folder / f"{self.run_id}.allocations.json").write_text(json.dumps(self.top_allocations), encoding="utf-8")
+        return folded
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "duration_sec": round(self.duration_sec, 3),
+            "samples": self.profiler.samples,
+            "interval_ms": round(self.profiler.interval_sec * 1000, 3),
+            "peak_traced_mb": round(self.peak_traced_bytes / (1024 * 1024), 1),
+            "folded_stacks": f"/api/profiles/{self.run_id}",
+            "top_allocations": self.top_allocations,
+        }
+
+
+def profile_path(run_id: str) -> Path:
+    return CONFIG.paths.profiles / f"{run_id}.folded"
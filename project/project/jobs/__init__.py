@@ -0,0 +1,16 @@
+# Jobs module - durable scan queue and the worker processes that drain it
+
+from .constants import JobStatus
+from .views import Job
+from .queue import JobQueue, get_queue, wait_for_job
+from .supervisor import WorkerSupervisor, worker_count
+
+__all__ = [
+    "JobStatus",
+    "Job",
+    "JobQueue",
+    "get_queue",
+    "wait_for_job",
+    "WorkerSupervisor",
+    "worker_count",
+]
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"  # waiting for a worker (also after a worker was stopped mid-scan)
+    RUNNING = "running"  # leased by a worker that heartbeats until it finishes
+    DONE = "done"  # result written to results/
+    FAILED = "failed"  # the scan raised, or the job ran out of attempts
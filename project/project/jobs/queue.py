@@ -0,0 +1,232 @@
+"""
+Durable scan-job queue in a local SQLite database.
+
+Workers claim jobs under a lease that they keep extending with heartbeats.
+A worker that crashes or is killed stops heartbeating, its lease expires and
+the next claim hands the job to another worker, so queued and running jobs
+survive worker restarts. Claims run in BEGIN IMMEDIATE transactions, which
+serialise concurrent workers; WAL mode lets the API read while they write.
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from infra.files import CONFIG, ensure_dirs
+from .constants import JobStatus
+from .views import Job
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    profile INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    result_path TEXT,
+    profile_summary TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+_QUEUED = JobStatus.QUEUED.value
+_RUNNING = JobStatus.RUNNING.value
+_DONE = JobStatus.DONE.value
+_FAILED = JobStatus.FAILED.value
+
+
+class JobQueue:
+    def __init__(self, path: Path, lease_sec: float, max_attempts: int):
+        self.path = path
+        self.lease_sec = lease_sec
+        self.max_attempts = max_attempts
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: callers run on worker threads
+        # (asyncio.to_thread) and in several processes.
+        ensure_dirs()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    def enqueue(self, url: str, options: Dict[str, Any], profile: bool = False) -> str:
+        """
+        Queue a scan. A profiled scan is refused with ProfilerBusy (infra.profiling)
+        while another profiled job is queued or running, so a worker never meets it.
+        """
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if profile and conn.execute(
+                "SELECT 1 FROM jobs WHERE profile = 1 AND (status = ? OR (status = ? AND lease_expires >= ?)) LIMIT 1",
+                (_QUEUED, _RUNNING, time.time()),
+            ).fetchone():
+                conn.execute("ROLLBACK")
+                from infra.profiling import ProfilerBusy
+
+                raise ProfilerBusy("Another scan is being profiled; try again later")
+            conn.execute(
+                "INSERT INTO jobs (id, url, options, profile, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, url, orjson.dumps(options).decode(), int(profile), _QUEUED, time.time()),
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim(self, worker: str, admit: Optional[Callable[[int, int], bool]] = None) -> Optional[Job]:
+        """
+        Lease the oldest runnable job: queued, or running under an expired lease.
+        `admit(running, starting)` (see infra.admission) is asked inside the
+        claim transaction, so concurrent workers can't both take the last slot.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose workers kept dying on them are given up rather than retried forever.
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (_FAILED, now, "Worker lost the job too many times", _RUNNING, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (_QUEUED, _RUNNING, now),
+            ).fetchone()
+            if row is None or (admit is not None and not admit(*self._running(conn, now))):
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, lease_expires = ?, "
+                "started_at = ? WHERE id = ?",
+                (_RUNNING, worker, now + self.lease_sec, now, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return Job.from_row(job)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update_owned(self, job_id: str, worker: str, assignments: str, params: tuple) -> bool:
+        """Apply an update only while `worker` still holds the job's lease."""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = ?",
+                (*params, job_id, worker, _RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Extend the lease; False once the job was handed to someone else."""
+        return self._update_owned(job_id, worker, "lease_expires = ?", (time.time() + self.lease_sec,))
+
+    def complete(self, job_id: str, worker: str, result_path: Path, profile_summary: Optional[Dict[str, Any]] = None) -> bool:
+        return self._update_owned(
+            job_id,
+            worker,
+            "status = ?, finished_at = ?, result_path = ?, profile_summary = ?, lease_expires = NULL",
+            (_DONE, time.time(), str(result_path), orjson.dumps(profile_summary).decode() if profile_summary else None),
+        )
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._update_owned(
+            job_id, worker, "status = ?, finished_at = ?, error = ?, lease_expires = NULL", (_FAILED, time.time(), error)
+        )
+
+    def release(self, job_id: str, worker: str) -> bool:
+        """Hand a job back untouched (worker shutting down); the interrupted run doesn't count as an attempt."""
+        return self._update_owned(
+            job_id, worker, "status = ?, worker = NULL, attempts = attempts - 1, lease_expires = NULL", (_QUEUED,)
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row is not None else None
+
+    def _running(self, conn: sqlite3.Connection, now: float) -> tuple[int, int]:
+        """(jobs running under a live lease, those of them started in the last admission.warmup_sec)."""
+        row = conn.execute(
+            "SELECT COUNT(*) AS running, COALESCE(SUM(started_at > ?), 0) AS starting FROM jobs "
+            "WHERE status = ? AND lease_expires >= ?",
+            (now - CONFIG.admission.warmup_sec, _RUNNING, now),
+        ).fetchone()
+        return row["running"], row["starting"]
+
+    def activity(self) -> Dict[str, Any]:
+        """Running, starting and queued jobs, and the mean run time of recent jobs (admission control)."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            running, starting = self._running(conn, now)
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (_QUEUED,)).fetchone()[0]
+            mean = conn.execute(
+                "SELECT AVG(finished_at - started_at) FROM "
+                "(SELECT finished_at, started_at FROM jobs WHERE status = ? ORDER BY finished_at DESC LIMIT 20)",
+                (_DONE,),
+            ).fetchone()[0]
+        return {"running": running, "starting": starting, "queued": queued, "scan_sec": mean}
+
+    def counts(self) -> Dict[str, int]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {status.value: 0 for status in JobStatus}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+    def purge(self, older_than_sec: float) -> List[Job]:
+        """Delete finished jobs older than the retention period and return them."""
+        cutoff = time.time() - older_than_sec
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (_DONE, _FAILED, cutoff)
+            ).fetchall()
+            conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (_DONE, _FAILED, cutoff))
+            conn.execute("COMMIT")
+        return [Job.from_row(row) for row in rows]
+
+
+_queue: Optional[JobQueue] = None
+
+
+def get_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        settings = CONFIG.jobs
+        _queue = JobQueue(CONFIG.paths.jobs_db, lease_sec=settings.lease_sec, max_attempts=settings.max_attempts)
+    return _queue
+
+
+async def wait_for_job(job_id: str, timeout_sec: float, queue: Optional[JobQueue] = None) -> Optional[Job]:
+    """Poll until the job is done or failed, or for at most timeout_sec (then the job is returned as it stands)."""
+    queue = queue or get_queue()
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None or job.status in (JobStatus.DONE, JobStatus.FAILED) or time.monotonic() >= deadline:
+            return job
+        await asyncio.sleep(min(CONFIG.jobs.poll_interval_sec, max(0.0, deadline - time.monotonic())))
@@ -0,0 +1,117 @@
+"""
+Starts the scan worker processes next to the API and restarts any that exit.
+
+A worker that dies mid-scan loses nothing: its job's lease expires and the
+replacement (or any other worker) picks the job up again. Workers write their
+Prometheus metrics to paths.worker_metrics, which /metrics aggregates.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from infra.files import CONFIG, ensure_dirs
+from .queue import JobQueue, get_queue
+
+
+APP_DIR = Path(__file__).resolve().parent.parent
+_CHECK_INTERVAL_SEC = 1.0
+# A worker that exits sooner than this after starting is restarted with back-off.
+_MIN_UPTIME_SEC = 10.0
+_MAX_RESTART_DELAY_SEC = 30.0
+_PURGE_INTERVAL_SEC = 600.0
+
+
+def worker_count() -> int:
+    """SCAN_WORKERS, else `jobs.workers` ("auto" = one per core, capped at jobs.max_workers); 0 = scan in-process."""
+    configured = str(os.getenv("SCAN_WORKERS") or CONFIG.jobs.workers).strip().lower()
+    if configured == "auto":
+        return max(1, min(os.cpu_count() or 1, CONFIG.jobs.max_workers))
+    return max(0, int(configured))
+
+
+class _Slot:
+    def __init__(self, index: int):
+        self.index = index
+        self.proc: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.restart_delay = 1.0
+        self.restart_at = 0.0
+
+
+class WorkerSupervisor:
+    def __init__(self, count: int):
+        self.slots = [_Slot(i) for i in range(count)]
+        self.metrics_dir = CONFIG.paths.worker_metrics
+        self._task: Optional[asyncio.Task] = None
+
+    def _spawn(self, slot: _Slot) -> None:
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(self.metrics_dir))
+        slot.proc = subprocess.Popen(
+            [sys.executable, "-m", "jobs.worker", "--name", f"worker-{slot.index}"],
+            cwd=APP_DIR,
+            env=env,
+        )
+        slot.started_at = time.monotonic()
+
+    async def start(self) -> None:
+        ensure_dirs()
+        # Metric files of a previous run's workers would be summed in otherwise.
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        for slot in self.slots:
+            self._spawn(slot)
+        self._task = asyncio.create_task(self._monitor())
+
+    async def _monitor(self) -> None:
+        from prometheus_client import multiprocess
+
+        queue = get_queue()
+        next_purge = time.monotonic()
+        while True:
+            now = time.monotonic()
+            for slot in self.slots:
+                if slot.proc is None:
+                    if now >= slot.restart_at:
+                        self._spawn(slot)
+                    continue
+                code = slot.proc.poll()
+                if code is None:
+                    continue
+                print(f"Scan worker {slot.index} (pid {slot.proc.pid}) exited with {code}; restarting")
+                multiprocess.mark_process_dead(slot.proc.pid, str(self.metrics_dir))
+                crashed_fast = now - slot.started_at < _MIN_UPTIME_SEC
+                slot.restart_delay = min(slot.restart_delay * 2, _MAX_RESTART_DELAY_SEC) if crashed_fast else 1.0
+                slot.restart_at = now + (slot.restart_delay if crashed_fast else 0.0)
+                slot.proc = None
+            if now >= next_purge:
+                await asyncio.to_thread(_purge_finished, queue)
+                next_purge = now + _PURGE_INTERVAL_SEC
+            await asyncio.sleep(_CHECK_INTERVAL_SEC)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        procs: List[subprocess.Popen] = [s.proc for s in self.slots if s.proc is not None]
+        for proc in procs:
+            proc.terminate()
+        # Workers hand their running jobs back to the queue on SIGTERM.
+        deadline = time.monotonic() + 10
+        for proc in procs:
+            try:
+                await asyncio.to_thread(proc.wait, max(0.1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _purge_finished(queue: JobQueue) -> None:
+    for job in queue.purge(CONFIG.jobs.retention_sec):
+        if job.result_path and not CONFIG.results.persist:
+            for path in CONFIG.paths.results.glob(f"{job.id}.*.json"):
+                path.unlink(missing_ok=True)
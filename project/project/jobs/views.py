@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Dict, Optional
+
+import orjson
+from pydantic import BaseModel, Field
+
+from .constants import JobStatus
+
+
+class Job(BaseModel):
+    id: str
+    url: str
+    # ScanOptions as JSON (the worker validates it again).
+    options: Dict[str, Any] = Field(default_factory=dict)
+    profile: bool = False
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    worker: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    # Encoded result of the requested view, written by the worker.
+    result_path: Optional[str] = None
+    profile_summary: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        data = dict(row)
+        data.pop("lease_expires", None)
+        data["options"] = orjson.loads(data["options"])
+        data["profile"] = bool(data["profile"])
+        if data["profile_summary"] is not None:
+            data["profile_summary"] = orjson.loads(data["profile_summary"])
+        return cls.model_validate(data)
+
+    def public(self) -> Dict[str, Any]:
+        """What GET /api/jobs/{job_id} returns (no filesystem paths)."""
+        return self.model_dump(mode="json", exclude={"result_path"})
@@ -0,0 +1,156 @@
+"""
+Scan worker process: claims jobs from the queue, runs the pipeline, writes the
+result under results/ and records the outcome.
+
+    python -m jobs.worker [--name worker-1]      (from project/project, like uvicorn main:app)
+
+Started and restarted by jobs.supervisor; any number can share one queue.
+A slot claims a job only while admission control (infra.admission) has room
+for another scan across all workers; until then the job stays queued.
+While a scan runs its lease is renewed every `jobs.heartbeat_sec`; if the
+lease is lost (the job was handed to another worker) the scan is abandoned.
+SIGTERM/SIGINT hand running jobs back to the queue before exiting.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+import traceback
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from infra.admission import get_admission
+from infra.files import CONFIG
+from pipeline.views import ScanOptions
+from .queue import JobQueue, get_queue
+from .views import Job
+
+
+async def _heartbeat(queue: JobQueue, job: Job, name: str, scan: asyncio.Task) -> None:
+    while True:
+        await asyncio.sleep(CONFIG.jobs.heartbeat_sec)
+        if not await asyncio.to_thread(queue.heartbeat, job.id, name):
+            scan.cancel("lease lost")
+            return
+
+
+async def _scan(job: Job) -> Tuple[Path, Optional[Dict[str, Any]]]:
+    from pipeline.scan_store import result_path
+    from pipeline.service import Pipeline, persist_result
+
+    options = ScanOptions.model_validate(job.options)
+    pipeline = Pipeline(url=job.url, options=options, run_id=job.id)
+    profile = None
+    if job.profile:
+        from infra.profiling import ScanProfile
+
+        with ScanProfile(pipeline.run_id) as profiler:
+            result = await pipeline.run()
+        await asyncio.to_thread(profiler.save)
+        profile = profiler.summary()
+    else:
+        result = await pipeline.run()
+
+    # The full result backs /api/scans/{run_id}/*; the requested view is what the API returns.
+    await persist_result(pipeline.run_id, result.to_json_bytes())
+    path = result_path(pipeline.run_id, options.view, options.evidence)
+    if path != result_path(pipeline.run_id):
+        await persist_result(pipeline.run_id, result.to_json_bytes(options.view, options.evidence), options.view, options.evidence)
+    return path, profile
+
+
+async def run_job(queue: JobQueue, job: Job, name: str) -> None:
+    from infra.profiling import ProfilerBusy
+
+    scan = asyncio.create_task(_scan(job))
+    heartbeat = asyncio.create_task(_heartbeat(queue, job, name, scan))
+    try:
+        path, profile = await scan
+    except asyncio.CancelledError:
+        if heartbeat.done():
+            print(f"[{name}] lost the lease on job {job.id}; abandoning it")
+            return
+        # Shutting down: give the job back so another worker starts it over.
+        scan.cancel()
+        await asyncio.to_thread(queue.release, job.id, name)
+        raise
+    except ProfilerBusy:
+        # Enqueue refuses a second profiled job, so this is one handed back to this
+        # process while its earlier, lease-expired run still holds the profiler.
+        await asyncio.sleep(CONFIG.jobs.heartbeat_sec)
+        await asyncio.to_thread(queue.release, job.id, name)
+        return
+    except Exception as e:
+        traceback.print_exc()
+        await asyncio.to_thread(queue.fail, job.id, name, str(e) or type(e).__name__)
+        return
+    finally:
+        heartbeat.cancel()
+    await asyncio.to_thread(queue.complete, job.id, name, path, profile)
+
+
+def _admit(running: int, starting: int) -> bool:
+    return get_admission().free_slots(running, starting) > 0
+
+
+async def _slot(queue: JobQueue, name: str, parent: int) -> None:
+    while True:
+        # Exit with the supervisor (e.g. the API process was killed).
+        if os.getppid() != parent:
+            return
+        # Jobs wait in the queue until the container has room for another scan.
+        job = await asyncio.to_thread(queue.claim, name, _admit)
+        if job is None:
+            await asyncio.sleep(CONFIG.jobs.poll_interval_sec)
+            continue
+        await run_job(queue, job, name)
+
+
+async def serve(name: str) -> None:
+    from analysis.unlighthouse_worker import set_pool_size
+
+    queue = get_queue()
+    parent = os.getppid()
+    # At most per_worker crawls run here at once; a larger Unlighthouse pool would only keep idle Chromes.
+    set_pool_size(CONFIG.jobs.per_worker)
+    slots = [
+        asyncio.create_task(_slot(queue, f"{name}/{i}", parent))
+        for i in range(max(1, CONFIG.jobs.per_worker))
+    ]
+
+    def stop() -> None:
+        for slot in slots:
+            slot.cancel()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows: no loop signal handlers; the supervisor's terminate() ends the process.
+            pass
+    # return_exceptions: wait for every slot to hand its job back, not just the first to stop.
+    await asyncio.gather(*slots, return_exceptions=True)
+    from analysis.unlighthouse_worker import shutdown_pool
+
+    await shutdown_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run one scan worker.")
+    parser.add_argument("--name", default=f"{socket.gethostname()}-{os.getpid()}", help="worker name shown on its jobs")
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    asyncio.run(serve(args.name))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,20 +11,44 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 import os
 
 # Load environment variables
 load_dotenv()
 
-from routers import analyze_router, test_router
+from infra.files import CONFIG
+from routers import analyze_router, test_router, scans_router, metrics_router, profiles_router, jobs_router
+from jobs import WorkerSupervisor, worker_count
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scans run in worker processes fed by the job queue (0 workers = scans run in this process).
+    supervisor = None
+    count = worker_count()
+    if count:
+        supervisor = WorkerSupervisor(count)
+        await supervisor.start()
+    try:
+        yield
+    finally:
+        if supervisor is not None:
+            await supervisor.stop()
+        from analysis.unlighthouse_worker import shutdown_pool
+
+        await shutdown_pool()
+
 
 app = FastAPI(
     title="SEO-GEO-AEO API",
     description="Standalone API for SEO, GEO, and AEO website analysis",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -36,8 +60,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (scan results are mostly repetitive JSON)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=CONFIG.compression.minimum_size,
+    compresslevel=CONFIG.compression.level,
+)
+
 # Include routers
 app.include_router(analyze_router)
+app.include_router(scans_router)
+app.include_router(metrics_router)
+app.include_router(profiles_router)
+app.include_router(jobs_router)
 app.include_router(test_router)  # Test mode without Playwright
 
 # Mount static files for frontend
@@ -60,7 +95,15 @@ async def root():
         "status": "running",
         "endpoints": {
             "analyze": "POST /api/analyze",
+            "checks": "GET /api/checks",
+            "scan_summary": "GET /api/scans/{run_id}/summary",
+            "scan_checks": "GET /api/scans/{run_id}/checks",
+            "submit_job": "POST /api/jobs",
+            "job_status": "GET /api/jobs/{job_id}",
+            "job_result": "GET /api/jobs/{job_id}/result",
             "health": "GET /api/health",
+            "ready": "GET /api/ready",
+            "metrics": "GET /metrics",
         }
     }
 
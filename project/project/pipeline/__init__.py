@@ -1,10 +1,19 @@
 # Pipeline module
-from .views import PreContext, DiscoveredPage, PipelineResult
-from .constants import PageCategories
+from .views import PreContext, DiscoveredPage, PipelineResult, ScanOptions, ScanBudget, SiteIndex, PageFeatures, LinkStats
+from .constants import PageCategories, DiscoveryModes, LighthouseAudits, ResultViews, EvidenceLevels
 
 __all__ = [
     "PreContext",
     "DiscoveredPage",
     "PipelineResult",
+    "ScanOptions",
+    "ScanBudget",
+    "SiteIndex",
+    "PageFeatures",
+    "LinkStats",
     "PageCategories",
+    "DiscoveryModes",
+    "LighthouseAudits",
+    "ResultViews",
+    "EvidenceLevels",
 ]
@@ -0,0 +1,42 @@
+"""
+Compressed on-disk store for the few raw page bodies a scan needs again.
+
+The SiteIndex keeps compact feature records, not HTML. A check that must
+re-read a body later (the user side of the GEO cloaking comparison) gets it
+from here: zlib-compressed, one file per page under
+temp/body_spill/<run_id>, removed when the scan ends.
+"""
+from __future__ import annotations
+
+import shutil
+import zlib
+from pathlib import Path
+from typing import Tuple
+
+from infra.files import ensure_dirs
+
+
+class BodySpill:
+    def __init__(self, directory: Path, level: int = 1):
+        self.directory = directory
+        self.level = level
+        self.count = 0
+        self.bytes = 0
+
+    def write(self, name: str, body: str) -> Tuple[str, int]:
+        """Compress and store one body; returns (path, compressed size)."""
+        ensure_dirs()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(body.encode("utf-8"), self.level)
+        path = self.directory / f"{name}.z"
+        path.write_bytes(data)
+        self.count += 1
+        self.bytes += len(data)
+        return str(path), len(data)
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def read_body(path: str) -> str:
+    return zlib.decompress(Path(path).read_bytes()).decode("utf-8")
@@ -0,0 +1,162 @@
+"""
+Columnar per-scan check results.
+
+Every check outcome of a scan becomes one row of four parallel NumPy columns
+(page index, check id, status code, evidence ref). Site-wide summaries are
+vectorized counts over those columns, and drill-down slices are boolean masks,
+so large sites never need the nested per-page JSON to be walked.
+"""
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+STATUS_CODES: Dict[str, int] = {"pass": 0, "warn": 1, "fail": 2, "not_evaluated": 3}
+STATUS_NAMES: List[str] = list(STATUS_CODES)
+_MAX_CHECK_ID = 255
+
+
+class CheckTable:
+    __slots__ = ("page_index", "check_id", "status", "evidence_ref", "page_analyser", "analysers", "pages", "checks")
+
+    def __init__(
+        self,
+        page_index: np.ndarray,
+        check_id: np.ndarray,
+        status: np.ndarray,
+        evidence_ref: np.ndarray,
+        page_analyser: np.ndarray,
+        analysers: List[str],
+        pages: List[Dict[str, Any]],
+        checks: List[Dict[str, Any]],
+    ):
+        self.page_index = page_index
+        self.check_id = check_id
+        self.status = status
+        self.evidence_ref = evidence_ref
+        # Per-page index into analysers.
+        self.page_analyser = page_analyser
+        self.analysers = analysers
+        # Row-independent lookups: pages[page_index] and checks[evidence_ref]
+        # (the original check dicts, holding details and evidence).
+        self.pages = pages
+        self.checks = checks
+
+    @classmethod
+    def from_results(cls, results: Dict[Any, List[Dict[str, Any]]]) -> "CheckTable":
+        page_index, check_id, status, evidence_ref = array("i"), array("B"), array("B"), array("i")
+        page_analyser = array("B")
+        analysers: List[str] = []
+        pages: List[Dict[str, Any]] = []
+        checks: List[Dict[str, Any]] = []
+        for analyser, page_results in results.items():
+            analyser_name = getattr(analyser, "value", str(analyser))
+            analysers.append(analyser_name)
+            for page in page_results:
+                p_idx = len(pages)
+                page_analyser.append(len(analysers) - 1)
+                pages.append({"analyser": analyser_name, "page_id": page.get("page_id"), "url": page.get("url")})
+                for check in page.get("checks") or []:
+                    cid = check.get("id")
+                    code = STATUS_CODES.get(check.get("status"))
+                    if not isinstance(cid, int) or not 0 <= cid <= _MAX_CHECK_ID or code is None:
+                        continue
+                    page_index.append(p_idx)
+                    check_id.append(cid)
+                    status.append(code)
+                    evidence_ref.append(len(checks))
+                    checks.append(check)
+        return cls(
+            page_index=np.frombuffer(page_index, dtype=np.int32).copy(),
+            check_id=np.frombuffer(check_id, dtype=np.uint8).copy(),
+            status=np.frombuffer(status, dtype=np.uint8).copy(),
+            evidence_ref=np.frombuffer(evidence_ref, dtype=np.int32).copy(),
+            page_analyser=np.frombuffer(page_analyser, dtype=np.uint8).copy(),
+            analysers=analysers,
+            pages=pages,
+            checks=checks,
+        )
+
+    def __len__(self) -> int:
+        return int(self.check_id.shape[0])
+
+    def summary(self) -> Dict[str, Any]:
+        """Pass/warn/fail counts per check, per analyser and site-wide."""
+        n_status = len(STATUS_NAMES)
+        per_check = np.bincount(
+            self.check_id.astype(np.int64) * n_status + self.status,
+            minlength=(_MAX_CHECK_ID + 1) * n_status,
+        ).reshape(_MAX_CHECK_ID + 1, n_status)
+
+        checks: Dict[str, Dict[str, Any]] = {}
+        for cid in np.flatnonzero(per_check.sum(axis=1)):
+            first = self.checks[int(self.evidence_ref[np.argmax(self.check_id == cid)])]
+            counts = {name: int(per_check[cid, code]) for code, name in enumerate(STATUS_NAMES)}
+            checks[str(int(cid))] = {
+                "type": first.get("type"),
+                "check_item": first.get("check_item"),
+                "total": int(per_check[cid].sum()),
+                **counts,
+            }
+
+        per_analyser = np.bincount(
+            self.page_analyser[self.page_index].astype(np.int64) * n_status + self.status,
+            minlength=len(self.analysers) * n_status,
+        ).reshape(len(self.analysers), n_status)
+        analysers: Dict[str, Dict[str, int]] = {}
+        for a_idx, name in enumerate(self.analysers):
+            counts = per_analyser[a_idx]
+            analysers[name] = {"total": int(counts.sum()), **{s: int(counts[c]) for c, s in enumerate(STATUS_NAMES)}}
+
+        totals = np.bincount(self.status, minlength=n_status)
+        return {
+            "pages": len(self.pages),
+            "checks": len(self),
+            "site": {s: int(totals[c]) for c, s in enumerate(STATUS_NAMES)},
+            "by_analyser": analysers,
+            "by_check": checks,
+        }
+
+    def grouped_counts(self) -> List[Tuple[str, int, str, int]]:
+        """(analyser, check_id, status, count) for every combination present in the table."""
+        n_status = len(STATUS_NAMES)
+        key = (
+            self.page_analyser[self.page_index].astype(np.int64) * (_MAX_CHECK_ID + 1) + self.check_id
+        ) * n_status + self.status
+        values, counts = np.unique(key, return_counts=True)
+        rows = []
+        for value, count in zip(values.tolist(), counts.tolist()):
+            rest, status = divmod(value, n_status)
+            a_idx, cid = divmod(rest, _MAX_CHECK_ID + 1)
+            rows.append((self.analysers[a_idx], cid, STATUS_NAMES[status], count))
+        return rows
+
+    def slice(
+        self,
+        check_id: Optional[int] = None,
+        status: Optional[str] = None,
+        analyser: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """Drill-down rows matching the filters, with their page and full check record."""
+        mask = np.ones(len(self), dtype=bool)
+        if analyser is not None:
+            a_idx = self.analysers.index(analyser) if analyser in self.analysers else -1
+            mask &= self.page_analyser[self.page_index] == a_idx
+        if check_id is not None:
+            mask &= self.check_id == check_id
+        if status is not None:
+            mask &= self.status == STATUS_CODES[status]
+        rows = np.flatnonzero(mask)
+        window = rows[offset:offset + limit]
+        return {
+            "total": int(rows.shape[0]),
+            "offset": offset,
+            "limit": limit,
+            "items": [
+                {**self.pages[int(self.page_index[r])], "check": self.checks[int(self.evidence_ref[r])]}
+                for r in window
+            ],
+        }
@@ -12,3 +12,25 @@ class PageCategories(Enum):
     LOGIN = "login"
     DASHBOARD = "dashboard"
     OTHER = "other"
+
+
+class DiscoveryModes(Enum):
+    UNLIGHTHOUSE = "unlighthouse"  # Node + Chromium crawl with Lighthouse summaries
+    NATIVE = "native"  # robots.txt + sitemaps + link BFS over httpx, no scores
+
+
+class LighthouseAudits(Enum):
+    FULL = "full"  # every Lighthouse category (performance, accessibility, best practices, SEO)
+    ACCESSIBILITY = "accessibility"  # only the category DiscoveredPage carries
+    NONE = "none"  # crawl only: no Lighthouse runs, pages carry no scores
+
+
+class ResultViews(Enum):
+    FULL = "full"  # per-page results plus the site summary
+    SUMMARY = "summary"  # site summary only; drill down via /api/scans/{run_id}/checks
+
+
+class EvidenceLevels(Enum):
+    FULL = "full"  # every evidence field the check produced
+    SUMMARY = "summary"  # the fields each check declares in analysis.checks (CheckSpec.summary_evidence)
+    NONE = "none"  # status and details only
@@ -0,0 +1,57 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from infra.files import CONFIG, ensure_dirs
+from .constants import DiscoveryModes
+from .views import DiscoveredPage
+
+
+def _cache_file(domain: str, mode: DiscoveryModes) -> Path:
+    safe_domain = re.sub(r"[^A-Za-z0-9_.-]", "_", domain.lower())
+    return CONFIG.paths.discovery_cache / f"{safe_domain}.{mode.value}.json"
+
+
+def load_discovered_pages(
+    domain: str, mode: DiscoveryModes, ttl_sec: float, need_scores: bool = False
+) -> Optional[List[DiscoveredPage]]:
+    """
+    Return the cached discovery result for a domain and mode, or None when there is no
+    entry, the entry is older than ttl_sec, the file cannot be read, or need_scores is
+    set and the entry was crawled without Lighthouse scores.
+    """
+    cache_file = _cache_file(domain, mode)
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+    created_at = data.get("created_at")
+    if not isinstance(created_at, (int, float)) or time.time() - created_at > ttl_sec:
+        return None
+    if need_scores and data.get("scored") is False:
+        return None
+
+    try:
+        return [DiscoveredPage(**p) for p in data.get("pages") or []]
+    except Exception:
+        return None
+
+
+def store_discovered_pages(domain: str, mode: DiscoveryModes, pages: List[DiscoveredPage], scored: bool = True) -> None:
+    """Persist a discovery result for a domain and mode (atomic replace, safe for concurrent scans)."""
+    ensure_dirs()
+    cache_file = _cache_file(domain, mode)
+    payload = {
+        "domain": domain,
+        "mode": mode.value,
+        "created_at": time.time(),
+        "scored": scored,
+        "pages": [p.model_dump() for p in pages],
+    }
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.{time.monotonic_ns()}.tmp")
+    tmp_file.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp_file, cache_file)
@@ -0,0 +1,83 @@
+"""
+Response shaping for check evidence.
+
+Site-level evidence that every page result would otherwise repeat (the site
+identity signals) is hoisted into one top-level `site` section; the pages keep
+a {"$ref": "#/site/<key>"} in its place. The evidence level then trims what is
+left: "full" keeps everything, "summary" keeps the fields each check declares
+(CheckSpec.summary_evidence), "none" drops evidence.
+
+Shaping copies only the check dicts it changes; the analysers' results (which
+back the in-memory drill-down) are never modified.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from .constants import EvidenceLevels
+
+# Evidence key -> key of the top-level `site` section it is hoisted into.
+SITE_EVIDENCE: Dict[str, str] = {"site_identity": "identity"}
+
+
+def _ref(site_key: str) -> Dict[str, str]:
+    return {"$ref": f"#/site/{site_key}"}
+
+
+def shape_results(
+    results: Dict[Any, List[Dict[str, Any]]], level: EvidenceLevels = EvidenceLevels.FULL
+) -> Tuple[Dict[Any, List[Dict[str, Any]]], Dict[str, Any]]:
+    """(shaped results, site section) for the given evidence level."""
+    from analysis.checks import CHECKS
+
+    site: Dict[str, Any] = {}
+
+    def shape_evidence(check_id: Any, evidence: Dict[str, Any]) -> Dict[str, Any]:
+        if level == EvidenceLevels.NONE:
+            return {}
+        if level == EvidenceLevels.SUMMARY:
+            spec = CHECKS.get(check_id)
+            keys = spec.summary_evidence if spec is not None else ()
+            evidence = {k: evidence[k] for k in keys if k in evidence}
+        shaped = None
+        for key, site_key in SITE_EVIDENCE.items():
+            value = evidence.get(key)
+            if value is None:
+                continue
+            # The first page's value becomes the shared one; a differing value stays inline.
+            if site.setdefault(site_key, value) == value:
+                if shaped is None:
+                    shaped = dict(evidence)
+                shaped[key] = _ref(site_key)
+        return shaped if shaped is not None else evidence
+
+    shaped_results: Dict[Any, List[Dict[str, Any]]] = {}
+    for analyser, pages in results.items():
+        shaped_pages = []
+        for page in pages:
+            checks = page.get("checks") or []
+            shaped_checks = []
+            changed = False
+            for check in checks:
+                evidence = check.get("evidence") or {}
+                shaped = shape_evidence(check.get("id"), evidence)
+                if shaped is not evidence:
+                    check = {**check, "evidence": shaped}
+                    changed = True
+                shaped_checks.append(check)
+            shaped_pages.append({**page, "checks": shaped_checks} if changed else page)
+        shaped_results[analyser] = shaped_pages
+    return shaped_results, site
+
+
+def inline_site_evidence(results: Dict[str, List[Dict[str, Any]]], site: Dict[str, Any]) -> None:
+    """Replace hoisted references in decoded results with the site section's values (in place)."""
+    if not site:
+        return
+    for pages in results.values():
+        for page in pages:
+            for check in page.get("checks") or []:
+                evidence = check.get("evidence") or {}
+                for key, site_key in SITE_EVIDENCE.items():
+                    if evidence.get(key) == _ref(site_key):
+                        evidence[key] = site.get(site_key)
@@ -0,0 +1,71 @@
+"""
+Numeric page features of a site as one NumPy matrix.
+
+One row per page of SiteIndex.pages (in its order), one int64 column per
+feature in COLUMNS. The per-page check rules (analysis.engines_optimization.page_rules)
+are evaluated over whole columns at once instead of page by page; the
+analysers then look up each page's row while building its result.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Collection, Dict, Iterator, Mapping, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .views import PageFeatures
+
+
+COLUMNS: Tuple[str, ...] = (
+    # Fetched and not failed (skipped and failed pages are 0 in every other column too).
+    "fetched",
+    "text_length",
+    "outbound_links",
+    "hidden_pattern_hits",
+    "spam_keywords",
+    "dates",
+    "author",
+    "stuffing_suspect",
+    "unrendered_shell",
+)
+_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+
+
+def _row(f: "PageFeatures") -> Iterator[int]:
+    yield f.error is None and not f.skipped
+    yield f.text_length
+    yield f.outbound_links
+    yield f.hidden_pattern_hits
+    yield len(f.spam_keywords)
+    yield len(f.dates)
+    yield bool(f.author)
+    yield f.keyword_stuffing.get("suspect") is True
+    yield f.unrendered_shell
+
+
+class FeatureMatrix:
+    __slots__ = ("urls", "rows", "values")
+
+    def __init__(self, urls: Tuple[str, ...], values: np.ndarray):
+        self.urls = urls
+        # URL -> row
+        self.rows: Dict[str, int] = {u: i for i, u in enumerate(urls)}
+        self.values = values
+
+    @classmethod
+    def from_pages(cls, pages: Mapping[str, "PageFeatures"]) -> "FeatureMatrix":
+        n = len(pages)
+        values = np.fromiter(
+            (v for f in pages.values() for v in _row(f)), dtype=np.int64, count=n * len(COLUMNS)
+        ).reshape(n, len(COLUMNS))
+        return cls(tuple(pages), values)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[:, _INDEX[column]]
+
+    def mask(self, urls: Collection[str]) -> np.ndarray:
+        """Boolean row mask of the pages in urls."""
+        return np.fromiter((u in urls for u in self.urls), dtype=bool, count=len(self.urls))
@@ -0,0 +1,143 @@
+"""
+Offline re-scoring of a recorded scan.
+
+    python -m pipeline.replay <run_id> [--checks 4,9] [--out result.json]
+
+A scan run with ScanOptions.record writes its fetch archive to
+temp/archives/<run_id>.sqlite3 (see engines_optimization.archive). Replaying
+it rebuilds the scan's PreContext from the archive, answers every page fetch
+and rendered page from it, and runs the analysers again. The network is never
+touched, so new thresholds or heuristics can be checked against a customer
+site without re-crawling it.
+
+Only checks whose inputs are archived (page fetches) run by default. GSC and
+Safe Browsing are live API calls, so they run only when asked for with --checks.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from analysis.checks import CHECKS, required_analysers
+from analysis.constants import CheckInputs
+from analysis.engines_optimization.archive import ArchiveRenderer, FetchArchive
+from analysis.engines_optimization.fetcher import PageFetcher
+from infra.metrics import current_analyser
+from .check_table import CheckTable
+from .constants import PageCategories
+from .scan_store import archive_path, remember_scan
+from .site_index import build_site_index
+from .views import DiscoveredPage, PipelineResult, PreContext
+
+_ARCHIVED_INPUTS = frozenset({CheckInputs.SITE_INDEX, CheckInputs.BOT_FETCH})
+REPLAYABLE_CHECKS: List[int] = [c.id for c in CHECKS.values() if c.inputs <= _ARCHIVED_INPUTS]
+
+
+def archive_meta(url: str, run_id: str, pre_context: PreContext) -> Dict[str, Any]:
+    """What replay needs besides the responses: the scanned URL, the discovered pages and the sample."""
+    return {
+        "url": url,
+        "run_id": run_id,
+        "recorded_at": time.time(),
+        "page_type": pre_context.page_type.value,
+        "discovered_pages": [p.model_dump(mode="json") for p in pre_context.discovered_pages],
+        "scan_targets": [p.url for p in pre_context.scan_targets],
+        "sampling": pre_context.coverage,
+        "checks": pre_context.checks,
+    }
+
+
+async def rescore(run_id: str, checks: Optional[List[int]] = None, path: Optional[Path] = None) -> PipelineResult:
+    """Re-run the analysers over the archive of run_id (or the archive at path)."""
+    from analysis import AeoAnalyzer, GeoAnalyzer, SeoAnalyzer
+
+    started = time.monotonic()
+    archive = await asyncio.to_thread(FetchArchive.load, path or archive_path(run_id))
+    meta = archive.meta
+    url = meta["url"]
+    checks = checks if checks is not None else REPLAYABLE_CHECKS
+
+    discovered = [DiscoveredPage(**p) for p in meta["discovered_pages"]]
+    by_url = {p.url: p for p in discovered}
+    pre_context = PreContext(
+        page_type=PageCategories(meta.get("page_type", PageCategories.OTHER.value)),
+        discovered_pages=discovered,
+        scan_targets=[by_url[u] for u in meta["scan_targets"] if u in by_url],
+        coverage=meta.get("sampling") or {},
+        checks=checks,
+    )
+
+    # The recording already reflects the original budget; replay fetches whatever it holds.
+    async with PageFetcher(archive=archive) as fetcher:
+        pre_context.site_index = await build_site_index(url, pre_context, fetcher, renderer=ArchiveRenderer(archive))
+        selected = required_analysers(checks)
+        analysers = [
+            cls(url=url, page=None, pre_context=pre_context, fetcher=fetcher)
+            for cls in (SeoAnalyzer, AeoAnalyzer, GeoAnalyzer)
+            if cls.name in selected
+        ]
+
+        async def run(analyser):
+            current_analyser.set(analyser.name.value)
+            return analyser.name, await analyser.scan()
+
+        results = dict(await asyncio.gather(*(run(a) for a in analysers)))
+        usage = fetcher.usage()
+
+    replay_id = uuid.uuid4().hex
+    table = CheckTable.from_results(results)
+    remember_scan(replay_id, table)
+    return PipelineResult.from_analyser_results(
+        results,
+        page_type=pre_context.page_type,
+        run_id=replay_id,
+        summary=table.summary(),
+        coverage={
+            "replay": {
+                "recorded_run_id": meta.get("run_id"),
+                "checks": checks,
+                "responses_served": usage["requests"],
+                "elapsed_sec": round(time.monotonic() - started, 3),
+            },
+            "sampling": pre_context.coverage,
+        },
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("run_id", help="run_id of a scan recorded with \"record\": true, or a path to its archive")
+    parser.add_argument("--checks", help=f"comma-separated check ids (default: {','.join(map(str, REPLAYABLE_CHECKS))})")
+    parser.add_argument("--out", type=Path, help="write the full result JSON here (default: print the summary)")
+    args = parser.parse_args()
+
+    checks = None
+    if args.checks:
+        from .views import ScanOptions
+
+        try:
+            checks = ScanOptions(checks=[int(v) for v in args.checks.split(",") if v.strip()]).checks
+        except ValueError as e:
+            parser.error(str(e))
+    path = Path(args.run_id) if args.run_id.endswith(".sqlite3") else None
+
+    try:
+        result = asyncio.run(rescore(args.run_id, checks, path))
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.out:
+        args.out.write_bytes(result.to_json_bytes())
+    print(orjson.dumps({"summary": result.summary["site"], **result.coverage["replay"]}, option=orjson.OPT_INDENT_2).decode())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
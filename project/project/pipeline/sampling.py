@@ -0,0 +1,128 @@
+"""
+Stratified page sampling for large sites.
+
+Discovered URLs are grouped by (page category, path template) and the scan
+budget is spread across those groups, so a 20,000-page site is assessed on a
+representative sample instead of the first N URLs in alphabetical order.
+"""
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from .constants import PageCategories
+from .views import DiscoveredPage
+
+
+_NUMERIC = re.compile(r"^\d+$")
+_HEXID = re.compile(r"^(?=.*\d)[0-9a-f]{8,}$|^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.I)
+_DATE = re.compile(r"^\d{4}(-\d{2}){0,2}$")
+
+# Ordered: the first matching rule wins.
+_CATEGORY_RULES: List[Tuple[PageCategories, Tuple[str, ...]]] = [
+    (PageCategories.LOGIN, ("login", "signin", "sign-in", "signup", "register", "account")),
+    (PageCategories.DASHBOARD, ("dashboard", "admin", "portal")),
+    (PageCategories.PRICING, ("pricing", "plans")),
+    (PageCategories.CONTACT, ("contact",)),
+    (PageCategories.ABOUT, ("about", "team", "company")),
+    (PageCategories.DOCUMENTATION, ("docs", "documentation", "guide", "guides", "help", "faq", "api", "reference")),
+    (PageCategories.BLOG_ARTICLE, ("blog", "news", "article", "articles", "posts", "post", "stories")),
+    (PageCategories.PRODUCT_DETAILS, ("product", "products", "item", "p", "dp")),
+    (PageCategories.PRODUCT_LISTING, ("shop", "store", "category", "categories", "collections", "catalog")),
+]
+
+
+def _template_segment(segment: str) -> str:
+    if _NUMERIC.match(segment):
+        return "{n}"
+    if _DATE.match(segment):
+        return "{date}"
+    if _HEXID.match(segment):
+        return "{id}"
+    # Long hyphenated segments are article/product slugs.
+    if segment.count("-") >= 2 or len(segment) > 40:
+        return "{slug}"
+    return segment.lower()
+
+
+def path_template(url: str) -> str:
+    """Collapse variable path segments, e.g. /blog/2024/my-first-post -> /blog/{date}/{slug}."""
+    segments = [s for s in urlparse(url).path.split("/") if s]
+    if not segments:
+        return "/"
+    return "/" + "/".join(_template_segment(s) for s in segments)
+
+
+def categorize_url(url: str) -> PageCategories:
+    segments = [s.lower() for s in urlparse(url).path.split("/") if s]
+    if not segments:
+        return PageCategories.HOME
+    for category, keys in _CATEGORY_RULES:
+        if any(seg in keys or seg.split(".")[0] in keys for seg in segments):
+            return category
+    return PageCategories.OTHER
+
+
+def _spread(items: List[DiscoveredPage], quota: int) -> List[DiscoveredPage]:
+    """Pick `quota` evenly spaced items so one stratum isn't represented only by its head."""
+    n = len(items)
+    if quota >= n:
+        return list(items)
+    return [items[(i * n) // quota] for i in range(quota)]
+
+
+def stratified_sample(pages: List[DiscoveredPage], max_pages: int) -> Tuple[List[DiscoveredPage], Dict[str, Any]]:
+    """
+    Select at most max_pages pages spread across (category, path template) strata.
+
+    The budget is handed out round-robin, largest strata first, so every
+    stratum gets a page before any stratum gets a second one. The home page is
+    always included when discovered. Returns (sample, coverage).
+    """
+    strata: Dict[Tuple[str, str], List[DiscoveredPage]] = defaultdict(list)
+    for p in pages:
+        strata[(categorize_url(p.url).value, path_template(p.url))].append(p)
+
+    ordered = sorted(strata.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+    quotas = {key: 0 for key, _ in ordered}
+    remaining = max(0, max_pages)
+    while remaining > 0:
+        progressed = False
+        for key, members in ordered:
+            if remaining == 0:
+                break
+            if quotas[key] < len(members):
+                quotas[key] += 1
+                remaining -= 1
+                progressed = True
+        if not progressed:
+            break
+
+    sample: List[DiscoveredPage] = []
+    for key, members in ordered:
+        sample.extend(_spread(members, quotas[key]))
+
+    home = next((p for p in pages if categorize_url(p.url) == PageCategories.HOME), None)
+    if home is not None and home not in sample and max_pages > 0:
+        # Make room for the home page by dropping the last (smallest-stratum) pick.
+        sample = [home] + sample[: max_pages - 1]
+
+    by_category: Dict[str, Dict[str, int]] = defaultdict(lambda: {"discovered": 0, "sampled": 0})
+    for (category, _template), members in strata.items():
+        by_category[category]["discovered"] += len(members)
+    sampled_strata = set()
+    for p in sample:
+        category = categorize_url(p.url).value
+        by_category[category]["sampled"] += 1
+        sampled_strata.add((category, path_template(p.url)))
+
+    coverage = {
+        "discovered_pages": len(pages),
+        "sampled_pages": len(sample),
+        "page_ratio": round(len(sample) / len(pages), 4) if pages else 1.0,
+        "strata": len(strata),
+        "strata_sampled": len(sampled_strata),
+        "by_category": dict(by_category),
+    }
+    sample.sort(key=lambda p: p.url)
+    return sample, coverage
@@ -0,0 +1,70 @@
+import asyncio
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import orjson
+
+from infra.files import CONFIG
+from .constants import EvidenceLevels, ResultViews
+
+if TYPE_CHECKING:
+    from .check_table import CheckTable
+
+
+# Most recent scans' check tables, for summary / drill-down requests after the scan returns.
+_scans: "OrderedDict[str, CheckTable]" = OrderedDict()
+
+
+def result_path(run_id: str, view: ResultViews = ResultViews.FULL, evidence: EvidenceLevels = EvidenceLevels.FULL) -> Path:
+    """
+    Where an encoded PipelineResult of the given view and evidence level is
+    written (results/<run_id>.result.json for the full view with full evidence).
+    """
+    if view != ResultViews.FULL:
+        # Without per-page results the evidence level makes no difference.
+        suffix = view.value
+    elif evidence != EvidenceLevels.FULL:
+        suffix = f"evidence-{evidence.value}"
+    else:
+        suffix = "result"
+    return CONFIG.paths.results / f"{run_id}.{suffix}.json"
+
+
+def archive_path(run_id: str) -> Path:
+    """Where the fetch archive of a scan run with ScanOptions.record is written (see pipeline.replay)."""
+    return CONFIG.paths.archives / f"{run_id}.sqlite3"
+
+
+def remember_scan(run_id: str, table: "CheckTable") -> None:
+    _scans[run_id] = table
+    _scans.move_to_end(run_id)
+    while len(_scans) > CONFIG.results.keep_in_memory:
+        _scans.popitem(last=False)
+
+
+def _load_table(path: Path) -> "CheckTable":
+    from .check_table import CheckTable
+    from .evidence import inline_site_evidence
+
+    data = orjson.loads(path.read_bytes())
+    results = data.get("results") or {}
+    inline_site_evidence(results, data.get("site") or {})
+    return CheckTable.from_results(results)
+
+
+async def get_scan(run_id: str) -> Optional["CheckTable"]:
+    """
+    The scan's check table: from memory when this process ran the scan,
+    otherwise rebuilt from its persisted full result (scans run by workers)
+    off the event loop.
+    """
+    table = _scans.get(run_id)
+    if table is not None:
+        return table
+    path = result_path(run_id)
+    if not path.is_file():
+        return None
+    table = await asyncio.to_thread(_load_table, path)
+    remember_scan(run_id, table)
+    return table
@@ -6,45 +6,174 @@ from analysis import (
     GeoAnalyzer,
     AeoAnalyzer,
 )
-from playwright.async_api import async_playwright
-from typing import Any, List, Type
-from .views import PipelineResult, PreContext, DiscoveredPage
-from playwright.async_api import Browser
+from typing import TYPE_CHECKING, Any, List, Optional, Type
+from .views import PipelineResult, PreContext, DiscoveredPage, ScanOptions, ScanBudget
+from .constants import DiscoveryModes, EvidenceLevels, LighthouseAudits, ResultViews
+from .discovery_cache import load_discovered_pages, store_discovered_pages
+from .sampling import stratified_sample
+from .check_table import CheckTable
+from .scan_store import archive_path, remember_scan, result_path
+from .site_index import build_site_index
+from .body_spill import BodySpill
+from .replay import archive_meta
 from typing import Dict
+from urllib.parse import urlparse
 import asyncio
-import json
+import time
 import uuid
 
+from analysis.checks import required_analysers
 from analysis.unlighthouse_routes import run_unlighthouse, collect_page_artifacts, cleanup_unlighthouse_run
+from analysis.native_discovery import discover_pages as native_discover_pages
+from analysis.engines_optimization.archive import FetchArchive
+from analysis.engines_optimization.fetcher import PageFetcher
+from analysis.engines_optimization.rendering import PageRenderer
+from infra.files import CONFIG, ensure_dirs
+from infra.memory import RssSampler
+from infra.metrics import (
+    ANALYSER_DURATION,
+    BROWSER_CONTEXTS,
+    CACHE_LOOKUPS,
+    CHECK_RESULTS,
+    SCAN_PEAK_RSS,
+    SCANS_IN_FLIGHT,
+    current_analyser,
+    observe_seconds,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser
 
 
-def sanitize_for_json(obj: Any) -> Any:
-    """
-    Recursively convert any non-JSON-serializable objects to strings.
-    This prevents PydanticSerializationError from Playwright Error objects
-    or other complex types embedded in the data.
-    """
-    if obj is None:
-        return None
-    if isinstance(obj, (bool, int, float, str)):
-        return obj
-    if isinstance(obj, dict):
-        return {str(k): sanitize_for_json(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [sanitize_for_json(item) for item in obj]
-    if hasattr(obj, "model_dump"):
-        return sanitize_for_json(obj.model_dump())
-    if hasattr(obj, "__dict__"):
-        return sanitize_for_json(obj.__dict__)
-    return str(obj)
+async def persist_result(
+    run_id: str, payload: bytes, view: ResultViews = ResultViews.FULL, evidence: EvidenceLevels = EvidenceLevels.FULL
+) -> None:
+    """Write an encoded PipelineResult to results/ (see scan_store.result_path) off the event loop."""
+    ensure_dirs()
+    await asyncio.to_thread(result_path(run_id, view, evidence).write_bytes, payload)
 
 
 class Pipeline:
-    def __init__(self, url: str, external_analyzers: List[BaseAnalyser] = []):
+    def __init__(
+        self,
+        url: str,
+        external_analyzers: List[BaseAnalyser] = [],
+        options: Optional[ScanOptions] = None,
+        run_id: Optional[str] = None,
+    ):
         self.url = url
         self.external_analyzers = external_analyzers
+        self.options = options or ScanOptions()
+        # Identifies this scan's Unlighthouse output and persisted result file
+        # (queued scans reuse their job id, so a retried job writes the same files).
+        self.run_id = run_id or uuid.uuid4().hex
+        # Absolute time.monotonic() deadline of the current run (see resolve_deadline).
+        self.deadline: Optional[float] = None
+        self.analyser_coverage: Dict[str, Dict[str, Any]] = {}
+
+    async def discover_pages(self, pre_context: PreContext) -> None:
+        """
+        Fill pre_context.discovered_pages for the site.
+
+        A fresh per-domain cache entry skips discovery entirely; otherwise the
+        selected discovery mode runs and the result is cached for the next scan.
+        A crawl without Lighthouse scores (lighthouse_audits "none") is not reused
+        for a scan that audits.
+        """
+        domain = urlparse(self.url).netloc
+        mode = self.options.discovery
+        audits = self.options.lighthouse_audits or LighthouseAudits(CONFIG.unlighthouse.audits)
+        if not self.options.refresh_discovery:
+            cached = load_discovered_pages(
+                domain, mode, CONFIG.discovery.cache_ttl_sec, need_scores=audits != LighthouseAudits.NONE
+            )
+            CACHE_LOOKUPS.labels(cache="discovery", result="hit" if cached else "miss").inc()
+            if cached:
+                pre_context.unlighthouse_domain = domain
+                pre_context.discovered_pages = cached
+                pre_context.discovery_cached = True
+                return
+
+        if mode == DiscoveryModes.NATIVE:
+            native = CONFIG.discovery.native
+            pages = await native_discover_pages(
+                self.url,
+                max_pages=native.max_pages,
+                max_depth=native.max_depth,
+                concurrency=native.concurrency,
+                timeout_sec=native.timeout_sec,
+            )
+            pre_context.unlighthouse_domain = domain
+            pre_context.discovered_pages = [
+                DiscoveredPage(
+                    page_id=p.page_id,
+                    page_name=p.page_name,
+                    url=p.url,
+                    timestamp=p.timestamp,
+                )
+                for p in pages
+            ]
+            if pre_context.discovered_pages:
+                store_discovered_pages(domain, mode, pre_context.discovered_pages, scored=False)
+            return
+
+        # Run Unlighthouse ONCE and share discovered pages with all analysers.
+        pre_context.unlighthouse_run_id = self.run_id
+
+        def on_progress(message: Dict[str, Any]) -> None:
+            pre_context.unlighthouse_progress = {k: v for k, v in message.items() if k not in ("type", "id")}
+
+        domain, domain_path = await run_unlighthouse(self.url, self.run_id, on_progress, audits=audits)
+        artifacts = collect_page_artifacts(domain_path)
+        pre_context.unlighthouse_domain = domain
+        pre_context.unlighthouse_domain_path = str(domain_path)
+        pre_context.discovered_pages = [
+            DiscoveredPage(
+                page_id=a.page_id,
+                page_name=a.page_name,
+                url=a.url,
+                timestamp=a.timestamp,
+                accessibility_score=a.accessibility_score,
+            )
+            for a in artifacts
+        ]
+        if pre_context.discovered_pages:
+            store_discovered_pages(domain, mode, pre_context.discovered_pages, scored=audits != LighthouseAudits.NONE)
+
+    def resolve_budget(self) -> ScanBudget:
+        """Request-level budget fields override the `scan_budget` defaults from config.yml."""
+        defaults = CONFIG.scan_budget
+        requested = self.options.budget or ScanBudget()
+        return ScanBudget(
+            max_pages=requested.max_pages or defaults.max_pages,
+            max_bytes=requested.max_bytes or defaults.max_bytes,
+            max_seconds=requested.max_seconds or defaults.max_seconds,
+        )
+
+    def resolve_deadline(self) -> float:
+        """Seconds the whole scan may take: the request's deadline_sec, else `scan_deadline` from config.yml."""
+        return self.options.deadline_sec or CONFIG.scan_deadline.default_sec
 
-    async def parallel_run_analysers(self, analysers: list[Type[BaseAnalyser]], browser: Browser, pre_context: PreContext) -> list:
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic()) if self.deadline is not None else float("inf")
+
+    def complete_records(self, analyser: BaseAnalyser, records: list, reason: str) -> list:
+        """Order records by target and append a not-evaluated record for every page the analyser didn't report."""
+        pending = analyser.pending_pages()
+        order = {p.url: i for i, p in enumerate(pending)}
+        reported = {r.get("url") for r in records}
+        records = sorted(records, key=lambda r: order.get(r.get("url"), len(order)))
+        records.extend(analyser.not_evaluated(p, reason) for p in pending if p.url not in reported)
+        return records
+
+    def select_targets(self, pre_context: PreContext) -> None:
+        """Pick a representative, budget-sized sample of the discovered pages."""
+        pre_context.scan_budget = self.resolve_budget()
+        pre_context.scan_targets, pre_context.coverage = stratified_sample(
+            pre_context.discovered_pages, pre_context.scan_budget.max_pages
+        )
+
+    async def parallel_run_analysers(self, analysers: list[Type[BaseAnalyser]], browser: "Browser", pre_context: PreContext, fetcher: Optional[PageFetcher] = None) -> list:
 
         async def run_single_analyser(analyser: Type[BaseAnalyser]):
             # Get the analyzer name from the CLASS (not instance) for safe error handling
@@ -53,10 +182,14 @@ class Pipeline:
             context = await browser.new_context(
                 viewport={"width": 1280, "height": 720}
             )
+            BROWSER_CONTEXTS.inc()
 
             page = await context.new_page()
             cdp_session = await context.new_cdp_session(page)
             result = []  # Default to empty list
+            _analyser: Optional[BaseAnalyser] = None
+            timed_out = False
+            error: Optional[str] = None
 
             try:
                 _analyser = analyser(
@@ -65,16 +198,44 @@ class Pipeline:
                     pre_context=pre_context,
                     context=context,
                     cdp_session=cdp_session,
+                    fetcher=fetcher,
                 )
-                result = await _analyser.scan()
                 analyzer_name = getattr(_analyser, "name", analyzer_name)
+                label = getattr(analyzer_name, "value", str(analyzer_name))
+                # Fetch/parse metrics inside scan() are labelled with this analyser.
+                current_analyser.set(label)
+                with observe_seconds(ANALYSER_DURATION, analyser=label):
+                    # Cancelled at the deadline; pages finished so far are kept from partial_results.
+                    result = await asyncio.wait_for(_analyser.scan(), timeout=self.remaining() if self.deadline else None)
+            except asyncio.TimeoutError:
+                timed_out = True
+                result = list(_analyser.partial_results)
             except Exception as e:
                 print(f"Analyzer {analyzer_name} failed: {e}")
                 import traceback
                 traceback.print_exc()
-                result = []
+                error = str(e)
+                result = list(_analyser.partial_results) if _analyser is not None else []
             finally:
                 await context.close()
+                BROWSER_CONTEXTS.dec()
+
+            if _analyser is not None:
+                evaluated = len(result)
+                if timed_out or (fetcher is not None and fetcher.deadline_reached):
+                    reason = "Not evaluated: scan deadline reached."
+                elif error is not None:
+                    reason = f"Not evaluated: analyser failed ({error})."
+                else:
+                    reason = "Not evaluated: scan budget exhausted."
+                result = self.complete_records(_analyser, result, reason)
+                self.analyser_coverage[getattr(analyzer_name, "value", str(analyzer_name))] = {
+                    "expected": len(_analyser.pending_pages()),
+                    "evaluated": evaluated,
+                    "not_evaluated": len(result) - evaluated,
+                    "timed_out": timed_out,
+                    "error": error,
+                }
 
             return {analyzer_name: result}
 
@@ -87,63 +248,128 @@ class Pipeline:
 
     async def run(self) -> PipelineResult:
         """Runs SEO/GEO/AEO analysers and outputs as {analyser_name: list_of_results}"""
+        with SCANS_IN_FLIGHT.track_inprogress():
+            return await self._run()
+
+    async def _run(self) -> PipelineResult:
+        # Playwright is only needed once a scan actually runs; keep it off the app's import path.
+        from playwright.async_api import async_playwright
+
+        ensure_dirs()
+
+        started = time.monotonic()
+        deadline_sec = self.resolve_deadline()
+        self.deadline = started + deadline_sec
 
-        async with async_playwright() as p:
+        # Compressed bodies for checks that re-read a page (see pipeline.body_spill).
+        spill = BodySpill(CONFIG.paths.body_spill / self.run_id, CONFIG.memory.compression_level) if CONFIG.memory.spill_bodies else None
+        sampler = RssSampler(CONFIG.memory.sample_interval_sec)
+        # Every response the analysers receive, for offline re-scoring (see pipeline.replay).
+        archive = FetchArchive(
+            compression_level=CONFIG.archive.compression_level,
+            dict_samples=CONFIG.archive.dict_samples,
+            dict_bytes=CONFIG.archive.dict_bytes,
+        ) if self.options.record else None
+
+        async with sampler, async_playwright() as p:
             browser = await p.chromium.launch()
+            # Only pages detected as JS shells are rendered (see engines_optimization.rendering).
+            rendering = CONFIG.rendering
+            renderer = PageRenderer(
+                browser,
+                contexts=rendering.contexts,
+                max_pages=rendering.max_pages,
+                timeout_sec=rendering.timeout_sec,
+                blocked_resources=rendering.blocked_resources,
+                archive=archive,
+            ) if rendering.enabled else None
             pre_context = PreContext()
             global_context = await browser.new_context()
+            BROWSER_CONTEXTS.inc()
             results: List[Dict] = []
-            run_id: str | None = None
             try:
                 global_page = await global_context.new_page()
 
-                await global_page.goto(self.url, timeout=60000)
-                await global_page.wait_for_load_state("networkidle")
+                await global_page.goto(self.url, timeout=max(1000, min(60000, self.remaining() * 1000)))
+                await global_page.wait_for_load_state("networkidle", timeout=max(1000, min(30000, self.remaining() * 1000)))
 
-                pre_context = PreContext()
+                await self.discover_pages(pre_context)
+                self.select_targets(pre_context)
+                pre_context.checks = self.options.checks
 
-                # Run Unlighthouse ONCE and share discovered pages with all analysers.
-                run_id = uuid.uuid4().hex
-                domain, domain_path = await run_unlighthouse(self.url, run_id)
-                artifacts = collect_page_artifacts(domain_path)
-                pre_context.unlighthouse_run_id = run_id
-                pre_context.unlighthouse_domain = domain
-                pre_context.unlighthouse_domain_path = str(domain_path)
-                pre_context.discovered_pages = [
-                    DiscoveredPage(
-                        page_id=a.page_id,
-                        page_name=a.page_name,
-                        url=a.url,
-                        timestamp=a.timestamp,
-                        accessibility_score=a.accessibility_score,
+                budget = pre_context.scan_budget
+                # Fetching stops a little before the deadline so analysers can score what they already have.
+                grace = min(CONFIG.scan_deadline.grace_sec, deadline_sec / 4)
+                async with PageFetcher(
+                    max_bytes=budget.max_bytes,
+                    max_seconds=budget.max_seconds,
+                    deadline=self.deadline - grace,
+                    archive=archive,
+                ) as fetcher:
+                    # Fetch and parse the sample once; analysers read the index instead of re-fetching.
+                    pre_context.site_index = await build_site_index(self.url, pre_context, fetcher, spill, renderer)
+                    # Only analysers owning a selected check run (see analysis.checks).
+                    selected = required_analysers(self.options.checks)
+                    results = await self.parallel_run_analysers(
+                        analysers=[a for a in (SeoAnalyzer, AeoAnalyzer, GeoAnalyzer) if a.name in selected],
+                        browser=browser,
+                        pre_context=pre_context,
+                        fetcher=fetcher,
                     )
-                    for a in artifacts
-                ]
-
-                results = await self.parallel_run_analysers(
-                    analysers=[
-                        SeoAnalyzer,
-                        AeoAnalyzer,
-                        GeoAnalyzer,
-                    ],
-                    browser=browser,
-                    pre_context=pre_context
-                )
             finally:
+                if renderer is not None:
+                    await renderer.close()
                 await global_context.close()
+                BROWSER_CONTEXTS.dec()
                 await browser.close()
-                if run_id:
-                    cleanup_unlighthouse_run(run_id)
+                if pre_context.unlighthouse_run_id:
+                    cleanup_unlighthouse_run(pre_context.unlighthouse_run_id)
+                if spill is not None:
+                    await asyncio.to_thread(spill.cleanup)
 
+        # Analysers already return JSON-safe dicts (model_dump(mode="json")),
+        # so the result is assembled without another validation pass.
         result = {}
         for r in results:
-            for k, v in r.items():
-                # Sanitize each analyzer's results to ensure JSON serializability
-                result[k] = sanitize_for_json(v)
-
-        result = PipelineResult(results=result, page_type=pre_context.page_type)
-        print(result)
-        with open('temp.result.json', 'w', encoding='utf-8') as f:
-            f.write(result.model_copy().model_dump_json(indent=2))
-            
-        return result
+            result.update(r)
+
+        table = CheckTable.from_results(result)
+        remember_scan(self.run_id, table)
+        for analyser, check_id, status, count in table.grouped_counts():
+            CHECK_RESULTS.labels(analyser=analyser, check_id=str(check_id), status=status).inc(count)
+
+        elapsed = time.monotonic() - started
+        index = pre_context.site_index
+        coverage = {
+            "complete": all(c["not_evaluated"] == 0 and c["error"] is None for c in self.analyser_coverage.values()),
+            "deadline_sec": deadline_sec,
+            "elapsed_sec": round(elapsed, 3),
+            "deadline_reached": elapsed >= deadline_sec or any(c["timed_out"] for c in self.analyser_coverage.values()),
+            "by_analyser": self.analyser_coverage,
+            "sampling": pre_context.coverage,
+            "rendering": {
+                "js_shell_pages": index.js_shell_pages if index is not None else 0,
+                "rendered_pages": index.rendered_pages if index is not None else 0,
+                "failed": renderer.failed if renderer is not None else 0,
+            },
+            "memory": {
+                **sampler.report(),
+                "spilled_bodies": spill.count if spill is not None else 0,
+                "spilled_bytes": spill.bytes if spill is not None else 0,
+            },
+        }
+        if pre_context.unlighthouse_progress is not None:
+            coverage["unlighthouse"] = pre_context.unlighthouse_progress
+        SCAN_PEAK_RSS.observe(sampler.peak)
+        if archive is not None:
+            archive.meta = archive_meta(self.url, self.run_id, pre_context)
+            await asyncio.to_thread(archive.save, archive_path(self.run_id))
+            coverage["archive"] = {"run_id": self.run_id, **archive.stats()}
+
+        return PipelineResult.from_analyser_results(
+            result,
+            page_type=pre_context.page_type,
+            run_id=self.run_id,
+            summary=table.summary(),
+            coverage=coverage,
+        )
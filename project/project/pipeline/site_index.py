@@ -0,0 +1,197 @@
+"""
+SiteIndex pre-stage: fetch every scan target once and compute the site-wide
+facts the analysers share.
+
+Runs after discovery and sampling, on the scan's PageFetcher, so the budget,
+deadline and per-host limits apply as for any analyser fetch. Identity signals,
+duplicate-content clusters, per-page features and link stats are computed here
+once instead of separately in each analyser.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from analysis.checks import required_inputs
+from analysis.constants import CheckInputs
+from analysis.engines_optimization.common import (
+    BAIT_PHRASES,
+    DEFAULT_UA,
+    DISCLOSURE_KEYWORDS,
+    SPAM_KEYWORDS,
+    count_keyword_matches,
+    detect_hidden_link_patterns,
+    extract_from_html,
+    keyword_stuffing_score,
+    normalize_text,
+    split_internal_external_links,
+    text_hash,
+)
+from analysis.engines_optimization.fetcher import BudgetExhausted, PageFetcher
+from analysis.engines_optimization.rendering import RenderFailed, js_shell_reason
+from analysis.engines_optimization.resilience import FetchFailed
+from infra.files import CONFIG
+from infra.metrics import current_analyser
+from .views import DiscoveredPage, LinkStats, PageFeatures, PreContext, SiteIndex
+
+if TYPE_CHECKING:
+    from analysis.engines_optimization.rendering import PageRenderer
+    from .body_spill import BodySpill
+
+
+_IDENTITY_PATHS = {
+    "has_about": ["/about"],
+    "has_contact": ["/contact"],
+    "has_privacy": ["/privacy"],
+    "has_terms": ["/terms"],
+    "has_refund": ["refund", "return", "returns", "shipping"],
+}
+_TOP_DOMAINS = 20
+
+
+def site_identity_signals(urls: List[str]) -> Dict[str, bool]:
+    paths = [urlparse(u).path.lower() for u in urls]
+    return {
+        signal: any(any(k in p for k in keys) for p in paths)
+        for signal, keys in _IDENTITY_PATHS.items()
+    }
+
+
+def page_features(
+    url: str,
+    final_url: str,
+    status_code: int,
+    html: str,
+    domain: str,
+    trace: tuple = (),
+    body_path: Optional[str] = None,
+    js_shell: Optional[str] = None,
+    rendered: bool = False,
+) -> Tuple[PageFeatures, List[str]]:
+    """
+    Features of one fetched page, plus its external links (for the domain-level
+    stats). The caller drops html afterwards. js_shell is detected from html
+    unless given (a rendered page keeps the reason found in its raw HTML).
+    """
+    extracted = extract_from_html(html)
+    text = extracted.get("text", "") or ""
+    t_norm = normalize_text(text)
+    internal, external = split_internal_external_links(extracted.get("links") or [], domain)
+    if js_shell is None and not rendered:
+        settings = CONFIG.rendering
+        js_shell = js_shell_reason(
+            extracted["scripts"], len(html or ""), len(t_norm), settings.min_text_chars, settings.script_share
+        )
+    return PageFeatures(
+        url=url,
+        final_url=final_url,
+        status_code=status_code,
+        trace=trace,
+        title=extracted.get("title"),
+        author=extracted.get("author"),
+        dates=tuple((extracted.get("dates") or [])[:5]),
+        text_length=len(t_norm),
+        text_hash=text_hash(text),
+        internal_links=len(internal),
+        outbound_links=len(external),
+        hidden_pattern_hits=detect_hidden_link_patterns(html),
+        spam_keywords=tuple(count_keyword_matches(text, SPAM_KEYWORDS)),
+        keyword_stuffing=keyword_stuffing_score(text),
+        disclosure_keywords=tuple(k for k in DISCLOSURE_KEYWORDS if k in t_norm),
+        bait_phrases=tuple(b for b in BAIT_PHRASES if b in t_norm),
+        body_path=body_path,
+        js_shell=js_shell,
+        rendered=rendered,
+    ), external
+
+
+async def build_site_index(
+    url: str,
+    pre_context: PreContext,
+    fetcher: PageFetcher,
+    spill: Optional["BodySpill"] = None,
+    renderer: Optional["PageRenderer"] = None,
+) -> SiteIndex:
+    """
+    Fetch pre_context.scan_targets once (browser UA) and index them. When none
+    of the selected checks (pre_context.checks) needs page content, nothing is
+    fetched and only the identity signals are filled in.
+
+    Only the compact PageFeatures are kept. When the cloaking check is selected
+    and a spill is given, each body is also compressed to disk so the check can
+    compare it with the bot fetch instead of fetching the page again.
+
+    Pages whose raw HTML looks like a JS shell are rendered with renderer (when
+    given) and indexed from the rendered DOM; all other pages are never rendered.
+    """
+    identity = site_identity_signals([p.url for p in pre_context.discovered_pages])
+    inputs = required_inputs(pre_context.checks)
+    if CheckInputs.SITE_INDEX not in inputs and (CheckInputs.BOT_FETCH not in inputs or spill is None):
+        return SiteIndex(identity=identity)
+    if CheckInputs.BOT_FETCH not in inputs:
+        spill = None
+
+    domain = urlparse(url).netloc
+    pages: Dict[str, PageFeatures] = {}
+    outbound_domains: Counter[str] = Counter()
+    token = current_analyser.set("site_index")
+
+    async def index_one(p: DiscoveredPage) -> None:
+        try:
+            r = await fetcher.get(p.url, user_agent=DEFAULT_UA)
+        except BudgetExhausted:
+            pages[p.url] = PageFeatures(url=p.url, skipped=True)
+            return
+        except FetchFailed as e:
+            pages[p.url] = PageFeatures(url=p.url, error=str(e), trace=e.trace)
+            return
+        except Exception as e:
+            pages[p.url] = PageFeatures(url=p.url, error=str(e) or type(e).__name__)
+            return
+        body_path = None
+        if spill is not None:
+            name = hashlib.sha1(p.url.encode("utf-8")).hexdigest()
+            body_path, _ = await asyncio.to_thread(spill.write, name, r.text)
+        features, external = page_features(p.url, r.final_url, r.status_code, r.text, domain, r.trace, body_path)
+        if features.js_shell is not None and renderer is not None and not fetcher.deadline_reached:
+            try:
+                html = await renderer.render(r.final_url, timeout_sec=fetcher.remaining)
+            except RenderFailed:
+                html = None
+            if html is not None:
+                features, external = page_features(
+                    p.url, r.final_url, r.status_code, html, domain, r.trace, body_path, features.js_shell, rendered=True
+                )
+        pages[p.url] = features
+        outbound_domains.update(urlparse(href).netloc.lower() for href in external)
+
+    try:
+        await asyncio.gather(*(index_one(p) for p in pre_context.scan_targets))
+    finally:
+        current_analyser.reset(token)
+
+    by_hash: Dict[str, List[str]] = defaultdict(list)
+    for f in pages.values():
+        if f.text_hash is not None:
+            by_hash[f.text_hash].append(f.url)
+    fetched = [f for f in pages.values() if not f.skipped and f.error is None]
+
+    return SiteIndex(
+        identity=identity,
+        pages=pages,
+        clusters={h: tuple(sorted(urls)) for h, urls in by_hash.items() if len(urls) >= 2},
+        links=LinkStats(
+            pages=len(fetched),
+            internal_links=sum(f.internal_links for f in fetched),
+            outbound_links=sum(f.outbound_links for f in fetched),
+            pages_with_outbound=sum(1 for f in fetched if f.outbound_links),
+            top_outbound_domains=tuple(outbound_domains.most_common(_TOP_DOMAINS)),
+        ),
+        spilled_bodies=spill.count if spill is not None else 0,
+        spilled_bytes=spill.bytes if spill is not None else 0,
+        js_shell_pages=sum(1 for f in fetched if f.js_shell is not None),
+        rendered_pages=sum(1 for f in fetched if f.rendered),
+    )
@@ -6,7 +6,6 @@ if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
 from .service import Pipeline
-import json
 
 async def test(url: str):
     scanner = Pipeline(url)
@@ -16,13 +15,11 @@ async def test(url: str):
         # assert res.value == actual_value
         # pass
 
-    # Convert to JSON-safe format
-    safe_result = result.model_dump(mode='json')
-    # Write to file
-    with open("temp.result.json", "w") as f:
-        json.dump(safe_result, f, indent=2, ensure_ascii=False)
+    # Already JSON-safe; encode once and write to file
+    with open("temp.result.json", "wb") as f:
+        f.write(result.to_json_bytes())
     
-    print("\nResults successfully saved to result.json")
+    print("\nResults successfully saved to temp.result.json")
 
 if __name__ == "__main__":
     site = input("Enter site url : ").strip() or 'https://example.com'
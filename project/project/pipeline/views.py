@@ -1,7 +1,12 @@
 from __future__ import annotations
-from pydantic import BaseModel, Field, model_validator
-from typing import Dict, List, Optional, Any
-from .constants import PageCategories
+import orjson
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, model_validator
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
+from .constants import PageCategories, DiscoveryModes, LighthouseAudits, ResultViews, EvidenceLevels
+
+if TYPE_CHECKING:
+    from .feature_matrix import FeatureMatrix
 
 
 class DiscoveredPage(BaseModel):
@@ -15,6 +20,11 @@ class DiscoveredPage(BaseModel):
 class PipelineResult(BaseModel):
     results: Dict[Any, List] = Field(default_factory=dict)
     page_type: PageCategories = PageCategories.OTHER
+    run_id: Optional[str] = None
+    # Server-side pass/warn/fail counts (see pipeline.check_table.CheckTable.summary).
+    summary: Dict[str, Any] = Field(default_factory=dict)
+    # Which pages each analyser evaluated before the deadline, plus the sampling coverage.
+    coverage: Dict[str, Any] = Field(default_factory=dict)
 
     @model_validator(mode="after")
     def ensure_all_analysers_present(self):
@@ -23,6 +33,168 @@ class PipelineResult(BaseModel):
             self.results.setdefault(analyser, [])
         return self
 
+    @classmethod
+    def from_analyser_results(
+        cls,
+        results: Dict[Any, List],
+        page_type: PageCategories = PageCategories.OTHER,
+        run_id: Optional[str] = None,
+        summary: Optional[Dict[str, Any]] = None,
+        coverage: Optional[Dict[str, Any]] = None,
+    ) -> "PipelineResult":
+        """Build from analyser output that is already JSON-safe, skipping re-validation."""
+        from analysis.constants import ANALYSERS
+        for analyser in ANALYSERS:
+            results.setdefault(analyser, [])
+        return cls.model_construct(
+            results=results, page_type=page_type, run_id=run_id, summary=summary or {}, coverage=coverage or {}
+        )
+
+    def to_json_bytes(self, view: ResultViews = ResultViews.FULL, evidence: EvidenceLevels = EvidenceLevels.FULL) -> bytes:
+        """
+        Encode once with orjson; unexpected objects in evidence fall back to str().
+        Per-page results carry evidence at the given level, with site-level
+        evidence hoisted into `site` (see pipeline.evidence).
+        """
+        data: Dict[str, Any] = {
+            "run_id": self.run_id,
+            "page_type": self.page_type,
+            "summary": self.summary,
+            "coverage": self.coverage,
+        }
+        if view == ResultViews.FULL:
+            from .evidence import shape_results
+
+            data["results"], data["site"] = shape_results(self.results, evidence)
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS, default=str)
+
+
+class ScanBudget(BaseModel):
+    # Unset fields fall back to `scan_budget` in config.yml.
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    max_bytes: Optional[int] = Field(default=None, ge=1)
+    max_seconds: Optional[float] = Field(default=None, gt=0)
+
+
+class ScanOptions(BaseModel):
+    # Ignore any cached discovery result and re-crawl the site.
+    refresh_discovery: bool = False
+    # How pages are discovered; "native" skips Node/Chromium (no Lighthouse scores).
+    discovery: DiscoveryModes = DiscoveryModes.UNLIGHTHOUSE
+    # Lighthouse categories the Unlighthouse crawl audits; unset uses `unlighthouse.audits`.
+    lighthouse_audits: Optional[LighthouseAudits] = None
+    # Per-request override of the scan budget (pages / bytes / wall-clock).
+    budget: Optional[ScanBudget] = None
+    # "summary" omits per-page results from the response.
+    view: ResultViews = ResultViews.FULL
+    # How much per-check evidence the per-page results carry (full / summary / none).
+    evidence: EvidenceLevels = EvidenceLevels.FULL
+    # Record every response the analysers receive for offline re-scoring (see pipeline.replay).
+    record: bool = False
+    # Wall-clock limit for the whole scan; unfinished pages come back as "not_evaluated".
+    deadline_sec: Optional[float] = Field(default=None, gt=0)
+    # Run only these check ids (see analysis.checks); unset runs every check.
+    checks: Optional[List[int]] = None
+
+    @field_validator("checks")
+    @classmethod
+    def known_checks(cls, checks: Optional[List[int]]) -> Optional[List[int]]:
+        if checks is None:
+            return None
+        from analysis.checks import CHECKS
+
+        unknown = sorted(set(checks) - set(CHECKS))
+        if unknown:
+            raise ValueError(f"Unknown check id(s) {unknown}; known: {sorted(CHECKS)}")
+        if not checks:
+            raise ValueError("checks must name at least one check id")
+        return sorted(set(checks))
+
+
+@dataclass(frozen=True, slots=True)
+class PageFeatures:
+    """
+    What the analysers need from one fetched page (see pipeline.site_index).
+
+    Built as soon as the body arrives; the raw HTML is dropped afterwards (or
+    compressed to disk when a later check needs it, see body_path). A slotted
+    dataclass rather than a model: one is kept per scanned page.
+    """
+    url: str
+    final_url: Optional[str] = None
+    status_code: Optional[int] = None
+    # Not fetched because the scan budget or deadline ran out; analysers skip the page.
+    skipped: bool = False
+    # The fetch failed (after retries); analysers report the page as a warning.
+    error: Optional[str] = None
+    # Resilience decisions of the fetch (see fetch_evidence).
+    trace: Tuple[Dict[str, Any], ...] = ()
+    title: Optional[str] = None
+    author: Optional[str] = None
+    dates: Tuple[str, ...] = ()
+    text_length: int = 0
+    text_hash: Optional[str] = None
+    internal_links: int = 0
+    outbound_links: int = 0
+    hidden_pattern_hits: int = 0
+    spam_keywords: Tuple[str, ...] = ()
+    keyword_stuffing: Dict[str, Any] = field(default_factory=dict)
+    disclosure_keywords: Tuple[str, ...] = ()
+    bait_phrases: Tuple[str, ...] = ()
+    # Compressed raw body on disk (pipeline.body_spill), kept only when a selected check re-reads it.
+    body_path: Optional[str] = None
+    # Why the raw HTML looks client-rendered (see rendering.js_shell_reason), and whether the
+    # features above come from the browser-rendered DOM instead.
+    js_shell: Optional[str] = None
+    rendered: bool = False
+
+    @property
+    def unrendered_shell(self) -> bool:
+        """Client-rendered page scored from its near-empty shell: text-based checks can't judge it."""
+        return self.js_shell is not None and not self.rendered
+
+
+class LinkStats(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    pages: int = 0
+    internal_links: int = 0
+    outbound_links: int = 0
+    pages_with_outbound: int = 0
+    # Most-linked external domains with their link counts.
+    top_outbound_domains: Tuple[Tuple[str, int], ...] = ()
+
+
+class SiteIndex(BaseModel):
+    """Site-wide facts computed once per scan, after discovery and fetch, and shared by all analysers."""
+    model_config = ConfigDict(frozen=True)
+
+    # has_about / has_contact / ... from the discovered URLs.
+    identity: Dict[str, bool] = Field(default_factory=dict)
+    # Page features by scan target URL.
+    pages: Dict[str, PageFeatures] = Field(default_factory=dict)
+    # Normalized-text hash -> URLs sharing it (only hashes seen on 2+ pages).
+    clusters: Dict[str, Tuple[str, ...]] = Field(default_factory=dict)
+    links: LinkStats = Field(default_factory=LinkStats)
+    # Bodies compressed to disk for later checks (see PageFeatures.body_path).
+    spilled_bodies: int = 0
+    spilled_bytes: int = 0
+    # Pages flagged as JS shells, and how many of them were rendered in the browser.
+    js_shell_pages: int = 0
+    rendered_pages: int = 0
+    _features: Optional["FeatureMatrix"] = PrivateAttr(default=None)
+
+    def duplicate_urls(self, min_size: int = 2) -> set[str]:
+        return {u for urls in self.clusters.values() if len(urls) >= min_size for u in urls}
+
+    def feature_matrix(self) -> "FeatureMatrix":
+        """The pages' numeric features as one matrix (built on first use, then shared by the analysers)."""
+        if self._features is None:
+            from .feature_matrix import FeatureMatrix
+
+            self._features = FeatureMatrix.from_pages(self.pages)
+        return self._features
+
 
 class PreContext(BaseModel):
     page_type: PageCategories = PageCategories.OTHER
@@ -30,4 +202,16 @@ class PreContext(BaseModel):
     unlighthouse_run_id: Optional[str] = None
     unlighthouse_domain: Optional[str] = None
     unlighthouse_domain_path: Optional[str] = None
+    # Last message from the Unlighthouse worker: progress while crawling, then routes/seconds/warm.
+    unlighthouse_progress: Optional[Dict[str, Any]] = None
     discovered_pages: List[DiscoveredPage] = Field(default_factory=list)
+    # True when discovered_pages came from the per-domain discovery cache.
+    discovery_cached: bool = False
+    # Resolved budget and the stratified sample of discovered_pages that analysers scan.
+    scan_budget: ScanBudget = Field(default_factory=ScanBudget)
+    scan_targets: List[DiscoveredPage] = Field(default_factory=list)
+    coverage: Dict[str, Any] = Field(default_factory=dict)
+    # Built by the pipeline after sampling (see pipeline.site_index); read by the analysers.
+    site_index: Optional[SiteIndex] = None
+    # Check ids selected for this scan (ScanOptions.checks); None runs every check.
+    checks: Optional[List[int]] = None
@@ -1,5 +1,9 @@
 # Routers module
 from .analyze import router as analyze_router
 from .test_router import router as test_router
+from .scans import router as scans_router
+from .metrics import router as metrics_router
+from .profiles import router as profiles_router
+from .jobs import router as jobs_router
 
-__all__ = ["analyze_router", "test_router"]
+__all__ = ["analyze_router", "test_router", "scans_router", "metrics_router", "profiles_router", "jobs_router"]
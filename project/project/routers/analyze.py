@@ -1,50 +1,241 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Optional
-from pipeline.service import Pipeline
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+from pathlib import Path
+import asyncio
+import orjson
+
+from infra.admission import Overloaded, get_admission
+from infra.auth import is_admin
+from infra.files import CONFIG
+from jobs import JobStatus, get_queue, wait_for_job, worker_count
+from pipeline.views import ScanOptions
+from pipeline.constants import EvidenceLevels, ResultViews
+
+if TYPE_CHECKING:
+    from pipeline.service import Pipeline
+    from pipeline.views import PipelineResult
 
 router = APIRouter(prefix="/api", tags=["Analysis"])
 
+# Size of each body chunk when streaming an encoded result to the client.
+_STREAM_CHUNK_SIZE = 64 * 1024
+
 
-class AnalyzeRequest(BaseModel):
+class AnalyzeRequest(ScanOptions):
     url: HttpUrl
+    # Admin only (X-Admin-Token header): run the scan under the sampling profiler and tracemalloc.
+    profile: bool = False
 
 
 class AnalyzeResponse(BaseModel):
     success: bool
     message: str
     data: Optional[dict] = None
+    profile: Optional[dict] = None
+
+
+def _envelope(message: str, data: bytes, profile: Optional[Dict[str, Any]] = None) -> bytes:
+    """Wrap already-encoded result bytes in the AnalyzeResponse shape without re-encoding them."""
+    extra = b',"profile":' + orjson.dumps(profile) if profile is not None else b""
+    return b'{"success":true,"message":' + orjson.dumps(message) + b',"data":' + data + extra + b"}"
+
+
+def _iter_chunks(body: bytes) -> Iterator[bytes]:
+    view = memoryview(body)
+    for start in range(0, len(view), _STREAM_CHUNK_SIZE):
+        yield bytes(view[start:start + _STREAM_CHUNK_SIZE])
+
+
+def _stream(body: bytes) -> StreamingResponse:
+    return StreamingResponse(
+        _iter_chunks(body),
+        media_type="application/json",
+        headers={"content-length": str(len(body))},
+    )
+
+
+async def _run_profiled(
+    pipeline: "Pipeline", view: ResultViews, evidence: EvidenceLevels
+) -> Tuple["PipelineResult", bytes, Dict[str, Any]]:
+    """Run and encode the scan under the profiler; the folded stacks are saved for GET /api/profiles/{run_id}."""
+    from infra.profiling import ProfilerBusy, ScanProfile
+
+    try:
+        with ScanProfile(pipeline.run_id) as profile:
+            result = await pipeline.run()
+            payload = result.to_json_bytes(view, evidence)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    await asyncio.to_thread(profile.save)
+    return result, payload, profile.summary()
+
+
+def _too_many_requests(e: Overloaded) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+
+async def _enqueue(url: str, options: ScanOptions, profile: bool) -> str:
+    """
+    Queue a scan for the workers; 429 when admission control's queue is full,
+    409 for a profiled scan while another profiled one is queued or running.
+    """
+    from infra.profiling import ProfilerBusy
+
+    queue = get_queue()
+    activity = await asyncio.to_thread(queue.activity)
+    try:
+        get_admission().check_queue(**activity)
+    except Overloaded as e:
+        raise _too_many_requests(e)
+    try:
+        return await asyncio.to_thread(queue.enqueue, url, options.model_dump(mode="json"), profile)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def _run_queued(url: str, options: ScanOptions, profile: bool) -> Tuple[bytes, Optional[Dict[str, Any]]]:
+    """
+    Hand the scan to a worker process and wait for the encoded result it writes:
+    at most the admission queue timeout plus the scan deadline and its grace,
+    then 504 pointing at GET /api/jobs/{job_id}.
+    """
+    job_id = await _enqueue(url, options, profile)
+    timeout_sec = (
+        CONFIG.admission.queue_timeout_sec
+        + (options.deadline_sec or CONFIG.scan_deadline.default_sec)
+        + CONFIG.scan_deadline.grace_sec
+    )
+    job = await wait_for_job(job_id, timeout_sec)
+    if job is None or job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error if job else f"Job {job_id} disappeared")
+    if job.status != JobStatus.DONE:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Job {job_id} is still {job.status.value}; poll GET /api/jobs/{job_id}",
+            headers={"location": f"/api/jobs/{job_id}"},
+        )
+    payload = await asyncio.to_thread(Path(job.result_path).read_bytes)
+    return payload, job.profile_summary
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_url(request: AnalyzeRequest):
+async def analyze_url(
+    request: AnalyzeRequest,
+    background_tasks: BackgroundTasks,
+    x_admin_token: Optional[str] = Header(default=None),
+):
     """
     Analyze a URL for SEO, GEO, and AEO metrics.
     
     This endpoint:
-    1. Crawls the website using Unlighthouse to discover all pages
+    1. Discovers the site's pages with Unlighthouse, or natively from robots.txt,
+       sitemaps and links when `discovery="native"` (reused from the per-domain
+       cache unless `refresh_discovery` is set); `lighthouse_audits` ("full",
+       "accessibility" or "none") sets what Lighthouse audits on each crawled page
     2. Runs SEO analysis (GSC checks, Safe Browsing, Spam protection)
     3. Runs GEO analysis (Factual accuracy, Transparent intent, AI spam, Cloaking)
     4. Runs AEO analysis (Factual accuracy, EEAT/No misleading claims)
+
+    `checks` (optional) limits the scan to those check ids (see GET /api/checks);
+    only the analysers and inputs (page fetches, cloaking fetches, GSC, Safe
+    Browsing) those checks need are run.
     
-    Returns analysis results for all discovered pages.
+    Returns analysis results for all scanned pages plus a server-side summary
+    (`view="summary"` returns only the summary and `run_id`; drill down with
+    GET /api/scans/{run_id}/checks). `evidence` ("full", "summary" or "none")
+    sets how much evidence each check carries; site-level evidence is sent once
+    in `site` and referenced from the pages. The result is encoded
+    once and streamed (gzip-compressed when the client accepts it); it is
+    persisted in the background when `results.persist` is enabled in config.yml.
+
+    `profile=true` (admins only) also returns the top allocation sites and
+    stores a folded-stack profile of the scan.
+
+    When scan workers are enabled (`jobs.workers` / SCAN_WORKERS) the scan is
+    queued and run by a worker process; this request waits for it, for at most
+    the admission queue timeout plus the scan deadline (then 504 with the job
+    to poll). Use POST /api/jobs to submit without waiting.
+
+    Scans start only while admission control (`admission` in config.yml) has
+    memory, CPU and a browser slot for them; beyond that up to
+    `admission.max_queued` wait, and further requests get 429 with Retry-After.
     """
+    if request.profile and not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+
+    profile = None
     try:
-        pipeline = Pipeline(url=str(request.url))
-        result = await pipeline.run()
-        
-        return AnalyzeResponse(
-            success=True,
-            message="Analysis completed successfully",
-            data=result.model_dump()
-        )
+        options = ScanOptions.model_validate(request.model_dump(exclude={"url", "profile"}))
+        if worker_count():
+            payload, profile = await _run_queued(str(request.url), options, request.profile)
+            return _stream(_envelope("Analysis completed successfully", payload, profile))
+
+        # The pipeline (Playwright, analysers, NumPy) loads on the first in-process scan, not at app start.
+        from pipeline.service import Pipeline, persist_result
+
+        pipeline = Pipeline(url=str(request.url), options=options)
+        async with get_admission().admit():
+            if request.profile:
+                result, payload, profile = await _run_profiled(pipeline, options.view, options.evidence)
+            else:
+                result = await pipeline.run()
+                payload = result.to_json_bytes(options.view, options.evidence)
+    except Overloaded as e:
+        raise _too_many_requests(e)
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+    if CONFIG.results.persist:
+        is_full = options.view == ResultViews.FULL and options.evidence == EvidenceLevels.FULL
+        full = payload if is_full else result.to_json_bytes()
+        background_tasks.add_task(persist_result, pipeline.run_id, full)
+
+    return _stream(_envelope("Analysis completed successfully", payload, profile))
+
+
+@router.get("/checks")
+async def list_checks():
+    """The check registry: ids accepted by `checks` on /api/analyze and /api/jobs, with the inputs each needs."""
+    from analysis.checks import CHECKS
+
+    return [
+        {
+            "id": c.id,
+            "type": c.type,
+            "category": c.category,
+            "check_item": c.check_item,
+            "what_to_verify": c.what_to_verify,
+            "impact": c.impact,
+            "inputs": sorted(i.value for i in c.inputs),
+        }
+        for c in CHECKS.values()
+    ]
+
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "SEO-GEO-AEO-API"}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness for the load balancer: the remaining scan capacity (free slots,
+    queue room, available memory, load). 503 with Retry-After while a new scan
+    would be refused with 429.
+    """
+    admission = get_admission()
+    if worker_count():
+        status = admission.status(**await asyncio.to_thread(get_queue().activity))
+    else:
+        status = admission.local_status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status, headers={"Retry-After": str(status["retry_after_sec"])})
+    return status
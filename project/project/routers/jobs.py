@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
+from pathlib import Path
+from typing import Optional
+import asyncio
+
+from infra.auth import is_admin
+from jobs import JobStatus, get_queue, worker_count
+from pipeline.views import ScanOptions
+from .analyze import AnalyzeRequest, _enqueue, _envelope, _stream
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+@router.post("", status_code=202)
+async def submit_job(request: AnalyzeRequest, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Queue a scan (same body as POST /api/analyze) and return its job id without
+    waiting; 429 with Retry-After once `admission.max_queued` jobs are waiting.
+    """
+    if not worker_count():
+        raise HTTPException(status_code=503, detail="Scan workers are disabled (jobs.workers / SCAN_WORKERS is 0)")
+    if request.profile and not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+    options = ScanOptions.model_validate(request.model_dump(exclude={"url", "profile"}))
+    job_id = await _enqueue(str(request.url), options, request.profile)
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "status": JobStatus.QUEUED.value},
+        headers={"location": f"/api/jobs/{job_id}"},
+    )
+
+
+async def _get_job(job_id: str):
+    job = await asyncio.to_thread(get_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    """Status, attempts and timings of a queued scan."""
+    return (await _get_job(job_id)).public()
+
+
+@router.get("/{job_id}/result")
+async def job_result(job_id: str):
+    """The scan result in the POST /api/analyze response shape, once the job is done."""
+    job = await _get_job(job_id)
+    if job.status == JobStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != JobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status.value}")
+    payload = await asyncio.to_thread(Path(job.result_path).read_bytes)
+    return _stream(_envelope("Analysis completed successfully", payload, job.profile_summary))
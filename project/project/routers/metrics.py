@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+
+from infra.files import CONFIG
+from jobs import worker_count
+
+router = APIRouter(tags=["Metrics"])
+
+
+class _WithWorkers:
+    """
+    This process's metrics merged with the scan workers' combined metrics.
+
+    The API process keeps its own (admission control, in-process scans), so a
+    family reported by both is merged and samples with the same labels are summed.
+    """
+
+    def __init__(self, path: str):
+        from prometheus_client import multiprocess
+
+        self.workers = CollectorRegistry()
+        multiprocess.MultiProcessCollector(self.workers, path=path)
+
+    def collect(self):
+        families = {m.name: m for m in self.workers.collect()}
+        for metric in REGISTRY.collect():
+            merged = families.get(metric.name)
+            if merged is None:
+                families[metric.name] = metric
+                continue
+            index = {(s.name, tuple(sorted(s.labels.items()))): i for i, s in enumerate(merged.samples)}
+            for sample in metric.samples:
+                # Creation timestamps of this process's series don't add up with the workers'.
+                if sample.name.endswith("_created"):
+                    continue
+                i = index.get((sample.name, tuple(sorted(sample.labels.items()))))
+                if i is None:
+                    merged.samples.append(sample)
+                else:
+                    merged.samples[i] = merged.samples[i]._replace(value=merged.samples[i].value + sample.value)
+        return families.values()
+
+
+def _registry():
+    """This process's metrics, plus the scan workers' combined metrics when scans run in workers."""
+    if not worker_count() or not CONFIG.paths.worker_metrics.is_dir():
+        return REGISTRY
+    return _WithWorkers(str(CONFIG.paths.worker_metrics))
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus scrape endpoint."""
+    return Response(content=generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
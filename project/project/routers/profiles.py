@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from infra.auth import is_admin
+
+router = APIRouter(prefix="/api/profiles", tags=["Profiling"])
+
+_RUN_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+@router.get("/{run_id}", response_class=PlainTextResponse)
+async def get_profile(run_id: str, x_admin_token: Optional[str] = Header(default=None)):
+    """Folded stacks of a profiled scan (feed to flamegraph.pl or speedscope). Admins only."""
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Profiles are restricted to admins")
+    from infra.profiling import profile_path
+
+    path = profile_path(run_id) if _RUN_ID.match(run_id) else None
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail=f"No profile for scan {run_id}")
+    return PlainTextResponse(path.read_text(encoding="utf-8"))
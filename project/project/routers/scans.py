@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import TYPE_CHECKING, Literal, Optional
+
+from pipeline.scan_store import get_scan
+
+if TYPE_CHECKING:
+    from pipeline.check_table import CheckTable
+
+router = APIRouter(prefix="/api/scans", tags=["Scans"])
+
+
+async def _get_table(run_id: str) -> "CheckTable":
+    table = await get_scan(run_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Scan {run_id} not found (or no longer in memory)")
+    return table
+
+
+@router.get("/{run_id}/summary")
+async def scan_summary(run_id: str):
+    """Site-wide pass/warn/fail counts per check and per analyser for a recent scan."""
+    return (await _get_table(run_id)).summary()
+
+
+@router.get("/{run_id}/checks")
+async def scan_checks(
+    run_id: str,
+    check_id: Optional[int] = Query(default=None, ge=0, le=255),
+    status: Optional[Literal["pass", "warn", "fail", "not_evaluated"]] = None,
+    analyser: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """Drill-down slice of individual check outcomes, e.g. every failing check 9."""
+    return (await _get_table(run_id)).slice(check_id=check_id, status=status, analyser=analyser, offset=offset, limit=limit)
@@ -2,6 +2,8 @@ import runUnlighthouse from '../dist/unlighthouse_engine.js'
 
 const urlArg = process.argv[2];
 const runIdArg = process.argv[3]; // optional: isolate output folder per run
+const auditsArg = process.argv[4]; // optional: full | accessibility | none
+const concurrencyArg = process.argv[5]; // optional: pages crawled at once
 
 if (!urlArg) {
     console.error("Error: Please provide a URL.");
@@ -10,7 +12,10 @@ if (!urlArg) {
 
 // Execute the imported function
 console.log('Scanning : ', urlArg);
-runUnlighthouse(urlArg, runIdArg)
+runUnlighthouse(urlArg, runIdArg, {
+    audits: auditsArg,
+    concurrency: concurrencyArg ? Number(concurrencyArg) : undefined,
+})
     .then((result) => {
         // console.log(JSON.stringify(result)); // Print JSON so Python can parse it
         process.exit(0);
@@ -0,0 +1,88 @@
+// Long-lived Unlighthouse worker, started and restarted by analysis/unlighthouse_worker.py.
+//
+// Reads crawl jobs from stdin, one JSON object per line:
+// {"id", "url", "run_id", "audits", "concurrency"} (see RunOptions in unlighthouse_engine.ts).
+// Replies on stdout with lines prefixed "@@unlh " (anything else on stdout is log
+// output): "ready" once Chrome is up, "progress" as each route is scanned, then
+// "done" or "error" for the job. Jobs run one at a time; the Unlighthouse modules
+// and Chrome stay loaded between them. Exits when stdin closes.
+import readline from 'node:readline'
+import puppeteer from 'puppeteer'
+import runUnlighthouse from '../dist/unlighthouse_engine.js'
+
+const MARK = '@@unlh '
+
+function send(message) {
+    process.stdout.write(MARK + JSON.stringify(message) + '\n')
+}
+
+let browser = null
+
+async function warmBrowser() {
+    if (browser === null || !browser.connected) {
+        browser = await puppeteer.launch({ headless: true, args: ['--no-sandbox', '--disable-dev-shm-usage'] })
+    }
+    return browser
+}
+
+async function crawl(job) {
+    const started = Date.now()
+    try {
+        const warm = browser !== null && browser.connected
+        const result = await runUnlighthouse(job.url, job.run_id, {
+            audits: job.audits,
+            concurrency: job.concurrency,
+            browser: await warmBrowser(),
+            onProgress: (progress) => send({ type: 'progress', id: job.id, ...progress }),
+        })
+        send({
+            type: 'done',
+            id: job.id,
+            routes: result.scannedRoutes,
+            seconds: (Date.now() - started) / 1000,
+            warm,
+        })
+    } catch (err) {
+        send({ type: 'error', id: job.id, message: String((err && err.stack) || err) })
+    }
+}
+
+let jobs = Promise.resolve()
+const input = readline.createInterface({ input: process.stdin })
+
+input.on('line', (line) => {
+    if (!line.trim()) {
+        return
+    }
+    let job
+    try {
+        job = JSON.parse(line)
+    } catch (err) {
+        send({ type: 'error', id: null, message: `Invalid job: ${line}` })
+        return
+    }
+    jobs = jobs.then(() => crawl(job))
+})
+
+// The Python side closes stdin to stop the worker (or died): finish the job, close Chrome, exit.
+input.on('close', async () => {
+    await jobs
+    if (browser !== null) {
+        await browser.close().catch(() => {})
+    }
+    process.exit(0)
+})
+
+// Anything that escaped a job leaves the worker in an unknown state; the Python side restarts it.
+process.on('unhandledRejection', (err) => {
+    console.error(err)
+    process.exit(1)
+})
+
+warmBrowser().then(
+    () => send({ type: 'ready', pid: process.pid }),
+    (err) => {
+        console.error(err)
+        process.exit(1)
+    },
+)
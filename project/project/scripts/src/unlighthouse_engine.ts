@@ -1,11 +1,13 @@
 import { createUnlighthouse } from '@unlighthouse/core'
 import { writeFile } from 'node:fs/promises'
 import { join } from 'path'
+import os from 'node:os'
 import { fileURLToPath } from 'url'
 import path from 'path'
 import fs from "fs"
 import { ensureDir } from './utils.js'
 import whyIsNodeRunning from 'why-is-node-running'
+import type { Browser } from 'puppeteer'
 
 const __filename = fileURLToPath(import.meta.url)
 const src_folder = path.dirname(__filename)
@@ -27,7 +29,91 @@ ensureDir(CONFIG.unligthouse_reports_dir)
 console.log(CONFIG);
 
 
-async function runUnlighthouse(site_url, runId?: string) {
+export interface RunProgress {
+  done: number
+  total: number
+  path?: string
+}
+
+// Lighthouse categories audited on each route (LighthouseAudits in pipeline/constants.py).
+// Only the accessibility score is read back, so "accessibility" skips the performance
+// traces and other categories; "none" only crawls.
+export type LighthouseAudits = 'full' | 'accessibility' | 'none'
+
+export interface RunOptions {
+  audits?: LighthouseAudits
+  // Routes scanned at once (defaults to the machine's available parallelism).
+  concurrency?: number
+  // Already running Chrome to crawl with (see api/unlighthouse_worker.js). The crawl
+  // opens its pages in it and leaves it running instead of launching and closing its own.
+  browser?: Browser
+  // Called as each route's scan completes.
+  onProgress?: (progress: RunProgress) => void
+}
+
+// puppeteer-cluster launches its browser through `puppeteer.launch`; this hands it the
+// shared one, with close() as a no-op so the cluster closing doesn't stop it.
+function sharedPuppeteer(browser: Browser) {
+  const shared = new Proxy(browser, {
+    get(target, prop) {
+      if (prop === 'close') {
+        return async () => {}
+      }
+      const value = Reflect.get(target, prop)
+      return typeof value === 'function' ? value.bind(target) : value
+    },
+  })
+  return { launch: async () => shared }
+}
+
+function defaultConcurrency(): number {
+  return Math.max(1, os.availableParallelism ? os.availableParallelism() : os.cpus().length)
+}
+
+// audits "none": Unlighthouse queues a Lighthouse task for every route its HTML
+// inspection (which also finds the links to crawl) completes. Those tasks are answered
+// without running Lighthouse; the route gets a lighthouse.json with only its URL and
+// fetch time, which is all collect_page_artifacts needs when there are no scores.
+//
+// This relies on Unlighthouse internals (the worker's cluster and its task names), so
+// anything unexpected fails the run through `fail` instead of silently auditing: a task
+// that is neither the HTML inspection nor Lighthouse stops the crawl before it runs, and
+// runUnlighthouse rejects a finished crawl in which no Lighthouse task was intercepted.
+function skipLighthouse(worker, fail: (err: Error) => void): { skipped: number } {
+  const cluster = worker?.cluster
+  if (!cluster) {
+    throw new Error('Unlighthouse worker not created before start(); cannot skip Lighthouse')
+  }
+  const state = { skipped: 0 }
+  const execute = cluster.execute.bind(cluster)
+  cluster.execute = async (routeReport, task) => {
+    const name: string = task?.name || ''
+    if (name.startsWith('inspectHtmlTask')) {
+      return execute(routeReport, task)
+    }
+    if (!name.startsWith('runLighthouseTask')) {
+      fail(new Error(`Unknown Unlighthouse task "${name}"; cannot run with audits "none"`))
+      return routeReport
+    }
+    state.skipped++
+    ensureDir(routeReport.artifactPath)
+    await writeFile(
+      join(routeReport.artifactPath, 'lighthouse.json'),
+      JSON.stringify({
+        requestedUrl: routeReport.route.url,
+        finalUrl: routeReport.route.url,
+        fetchTime: new Date().toISOString(),
+        categories: {},
+      }),
+      'utf-8'
+    )
+    routeReport.tasks.runLighthouseTask = 'completed'
+    return routeReport
+  }
+  return state
+}
+
+async function runUnlighthouse(site_url, runId?: string, options: RunOptions = {}) {
   return new Promise(async (resolve, reject) => {
     const start = new Date()
 
@@ -44,10 +130,24 @@ async function runUnlighthouse(site_url, runId?: string) {
           outputPath,
           // NOTE: Do NOT set `urls` here if you want Unlighthouse to discover/crawl routes.
           // Setting `urls: [site_url]` effectively restricts scanning to a single page.
+          puppeteerClusterOptions: {
+            maxConcurrency: options.concurrency || defaultConcurrency(),
+            ...(options.browser ? { puppeteer: sharedPuppeteer(options.browser) } : {}),
+          },
+          ...(options.audits === 'accessibility'
+            ? { lighthouseOptions: { onlyCategories: ['accessibility'] } }
+            : {}),
         },
         { name: 'cli' }
       )
 
+      const skip = options.audits === 'none'
+        ? skipLighthouse(unlighthouse.worker, (err) => {
+            unlighthouse.worker.cluster.close().catch(() => {})
+            reject(err)
+          })
+        : null
+
       // Start the scan
       const { routes } = await unlighthouse.start()
 
@@ -57,9 +157,20 @@ async function runUnlighthouse(site_url, runId?: string) {
 
       const { hooks, worker } = unlighthouse
 
+      if (options.onProgress) {
+        hooks.hook('task-complete', (path) => {
+          const monitor = worker.monitor()
+          options.onProgress({ done: monitor.doneTargets, total: monitor.allTargets, path })
+        })
+      }
+
       // Wait for scan completion
       hooks.hook('worker-finished', async () => {
         try {
+          if (skip !== null && skip.skipped === 0) {
+            await worker.cluster.close().catch(() => {})
+            throw new Error('No Lighthouse task was intercepted; the crawl audited despite audits "none"')
+          }
           const end = new Date()
           const seconds = Math.round(
             (end.getTime() - start.getTime()) / 1000
@@ -1,132 +1,162 @@
 """
 Azure AI Foundry Integration Module
 This module integrates Azure OpenAI services with the SEO-GEO-AEO API project
+
+Requests go through the async AI service in project/project/ai: bounded
+concurrency, content truncated to a token budget, and a persistent response
+cache keyed by content hash, analysis type and prompt version (see the `ai`
+section of project/config.yml). The synchronous helpers are kept for scripts;
+code that already runs an event loop should await the *_async variants.
+
+    python run_model.py           # against AZURE_OPENAI_ENDPOINT
+    python run_model.py --mock    # offline, against a local stand-in endpoint
 """
+import argparse
+import asyncio
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
 from typing import Optional, List, Dict
 
 # Load environment variables from .env file
 load_dotenv()
 
+# The AI service lives in the API project (as for startup.py).
+sys.path.insert(0, str(Path(__file__).parent / "project" / "project"))
+
+from ai import AIServiceError, get_ai_service  # noqa: E402
+from ai.service import DEFAULT_DEPLOYMENT, DEFAULT_ENDPOINT  # noqa: E402
+
 # Configuration from environment variables
-AZURE_OPENAI_ENDPOINT = os.getenv(
-    "AZURE_OPENAI_ENDPOINT", 
-    "https://johngeorge-2562-resource.openai.azure.com/openai/v1/"
-)
-AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
-AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY", "<your-api-key>")
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT", DEFAULT_ENDPOINT)
+AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT", DEFAULT_DEPLOYMENT)
+
 
-# Initialize OpenAI client
-client = OpenAI(
-    base_url=AZURE_OPENAI_ENDPOINT,
-    api_key=AZURE_OPENAI_API_KEY
-)
+async def chat_completion_async(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.7,
+    max_tokens: Optional[int] = None
+) -> str:
+    """Async chat completion from Azure OpenAI (raises AIServiceError on failure)."""
+    return await get_ai_service().chat(messages, temperature=temperature, max_tokens=max_tokens)
 
 
 def chat_completion(
-    messages: List[Dict[str, str]], 
+    messages: List[Dict[str, str]],
     temperature: float = 0.7,
     max_tokens: Optional[int] = None
 ) -> str:
     """
     Get a chat completion from Azure OpenAI
-    
+
     Args:
         messages: List of message dictionaries with 'role' and 'content'
         temperature: Sampling temperature (0.0 to 2.0)
         max_tokens: Maximum tokens in response (None for default)
-    
+
     Returns:
         str: The completion response content
     """
     try:
-        completion = client.chat.completions.create(
-            model=AZURE_OPENAI_DEPLOYMENT,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return completion.choices[0].message.content
-    except Exception as e:
+        return asyncio.run(chat_completion_async(messages, temperature, max_tokens))
+    except AIServiceError as e:
         print(f"Error calling Azure OpenAI: {e}")
         return f"Error: {str(e)}"
 
 
+async def analyze_content_with_ai_async(content: str, analysis_type: str = "SEO") -> str:
+    """Async, cached analysis of one content (raises AIServiceError on failure)."""
+    return (await get_ai_service().analyze(content, analysis_type)).text
+
+
+async def analyze_contents_with_ai(contents: List[str], analysis_type: str = "SEO") -> List[str]:
+    """Analyze several contents concurrently (bounded by ai.concurrency), in input order."""
+    return [a.text for a in await get_ai_service().analyze_many(contents, analysis_type)]
+
+
 def analyze_content_with_ai(
     content: str,
     analysis_type: str = "SEO"
 ) -> str:
     """
     Analyze content using Azure OpenAI for SEO, GEO, or AEO insights
-    
+
     Args:
         content: The content to analyze
         analysis_type: Type of analysis (SEO, GEO, or AEO)
-    
+
     Returns:
         str: AI-generated analysis
     """
-    prompts = {
-        "SEO": "Analyze the following content for SEO optimization. Provide insights on keyword usage, meta information, and content quality:",
-        "GEO": "Analyze the following content for Generative Engine Optimization (GEO). Check for factual accuracy, transparent intent, and AI spam:",
-        "AEO": "Analyze the following content for Answer Engine Optimization (AEO). Verify factual accuracy and EEAT compliance:"
-    }
-    
-    prompt = prompts.get(analysis_type, prompts["SEO"])
-    
-    messages = [
-        {
-            "role": "system",
-            "content": "You are an expert in web content optimization for search engines and AI systems."
-        },
-        {
-            "role": "user",
-            "content": f"{prompt}\n\n{content}"
-        }
-    ]
-    
-    return chat_completion(messages, temperature=0.7)
+    try:
+        return asyncio.run(analyze_content_with_ai_async(content, analysis_type))
+    except AIServiceError as e:
+        print(f"Error calling Azure OpenAI: {e}")
+        return f"Error: {str(e)}"
 
 
-def main():
-    """Main function for testing the Azure AI Foundry integration"""
-    print("🚀 Testing Azure AI Foundry Integration\n")
-    print(f"Endpoint: {AZURE_OPENAI_ENDPOINT}")
-    print(f"Deployment: {AZURE_OPENAI_DEPLOYMENT}\n")
-    
+async def _demo(endpoint: str) -> None:
+    service = get_ai_service()
+
     # Test basic completion
     print("=" * 50)
     print("Test 1: Basic Chat Completion")
     print("=" * 50)
-    
+
     messages = [
         {
             "role": "user",
             "content": "What is the capital of France?",
         }
     ]
-    
-    response = chat_completion(messages)
+
+    response = await service.chat(messages)
     print(f"Response: {response}\n")
-    
+
     # Test content analysis
     print("=" * 50)
-    print("Test 2: SEO Content Analysis")
+    print("Test 2: SEO / GEO / AEO Content Analysis (concurrent, cached)")
     print("=" * 50)
-    
+
     sample_content = """
     Welcome to our website! We offer the best products in the market.
     Our services include web development, SEO optimization, and digital marketing.
     Contact us today to learn more about our offerings.
     """
-    
-    seo_analysis = analyze_content_with_ai(sample_content, "SEO")
-    print(f"SEO Analysis:\n{seo_analysis}\n")
-    
+
+    for analysis in await asyncio.gather(*(service.analyze(sample_content, t) for t in ("SEO", "GEO", "AEO"))):
+        source = "cache" if analysis.cached else endpoint
+        print(f"{analysis.analysis_type.value} Analysis ({source}):\n{analysis.text}\n")
+
+    await service.aclose()
+
+
+def main():
+    """Main function for testing the Azure AI Foundry integration"""
+    parser = argparse.ArgumentParser(description="Test the Azure AI Foundry integration.")
+    parser.add_argument("--mock", action="store_true", help="use a local stand-in endpoint (no network or key)")
+    args = parser.parse_args()
+
+    print("🚀 Testing Azure AI Foundry Integration\n")
+    try:
+        if not args.mock:
+            print(f"Endpoint: {AZURE_OPENAI_ENDPOINT}")
+            print(f"Deployment: {AZURE_OPENAI_DEPLOYMENT}\n")
+            asyncio.run(_demo(AZURE_OPENAI_ENDPOINT))
+        else:
+            from benchmarks.servers import serve
+
+            with serve("openai") as endpoint:
+                os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+                print(f"Endpoint: {endpoint} (local stand-in)\n")
+                asyncio.run(_demo(endpoint))
+    except AIServiceError as e:
+        print(f"Error calling Azure OpenAI: {e}")
+        return
+
     print("✅ Azure AI Foundry integration test complete!")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()